@@ -1,4 +1,7 @@
 class AggregatedData:
+    # Un'istanza per file Excel analizzato: niente __dict__ per istanza
+    __slots__ = ('excel_path', 'txt_path', 'excel_metadata', 'connection_info')
+
     def __init__(self, excel_path, txt_path, excel_metadata, connection_info):
         self.excel_path = excel_path
         self.txt_path = txt_path
@@ -2,6 +2,7 @@ from Finder.Excel_Finder import ExcelFinder
 from Finder.TXT_Finder import TxtFinder
 from Finder.Xls_Finder import XlsFinder
 from Finder.Sql_Finder import SqlFinder
+from Finder.IFinder import IFinder
 from .Excel_Metadata_Extractor import ExcelMetadataExtractor
 from .Txt_Source_Lines import TxtSplitLines
 from Connection.IConnection import IConnection
@@ -13,7 +14,7 @@ from Connection.IConnection import EmptyConnection
 from Connection.Connessione_Senza_Txt import ConnessioniSenzaTxt
 from Connection.Get_Xml_Connection import GetXmlConnection
 from .SQL_Explorer import SqlExplorer
-from typing import List
+from typing import List, Tuple
 import os
 
 class BusinessLogic:
@@ -23,9 +24,17 @@ class BusinessLogic:
         self.txt_finder = TxtFinder(root_path_txt)
         self.xls_finder = XlsFinder(root_path_excel)
         self.sql_finder = SqlFinder(root_path_excel)
+        # Elenco dei file SQL: una sola visita della cartella condivisa da
+        # sql_file_list e sql_into_from_join
+        self._sql_files = None
+
+    def _sql_file_paths(self) -> list[str]:
+        if self._sql_files is None:
+            self._sql_files = self.sql_finder.file_finder()
+        return self._sql_files
 
     def sql_file_list(self) -> list[list[str]]:
-        sql_files = self.sql_finder.file_finder()
+        sql_files = self._sql_file_paths()
         result = []
         for file_path in sql_files:
             dir_path, file_name = os.path.split(file_path)
@@ -34,7 +43,17 @@ class BusinessLogic:
 
 
     def _excel_file_list(self) -> list[str]:
-        return self.xls_finder.file_finder() + self.excel_finder.file_finder()
+        # Stessa cartella per le due estensioni: una sola visita invece di due,
+        # mantenendo l'ordine (prima i file di XlsFinder, poi quelli di ExcelFinder)
+        extensions = (self.xls_finder.EXTENSION, self.excel_finder.EXTENSION)
+        if self.xls_finder.root_path != self.excel_finder.root_path:
+            return self.xls_finder.file_finder() + self.excel_finder.file_finder()
+        try:
+            by_ext = IFinder.files_by_extension(self.excel_finder.root_path, extensions)
+        except Exception as e:
+            print(f"Errore nella ricerca dei file {extensions}: {e}")
+            return []
+        return [path for ext in extensions for path in by_ext[ext]]
 
     def get_excel_file_paths(self) -> list[str]:
         # Accessor pubblico per i percorsi completi dei file Excel
@@ -119,52 +138,58 @@ class BusinessLogic:
         return connections
 
 
+    @staticmethod
+    def _connection_type(conn: IConnection) -> str:
+        # Usa l'attributo type se presente, altrimenti deduci dal nome classe
+        conn_type = getattr(conn, 'type', None)
+        if conn_type:
+            return conn_type
+        return {
+            'GetSqlConnection': 'Sql',
+            'GetSharePointConnection': 'SharePoint',
+            'GetExcelConnection': 'Excel',
+        }.get(conn.__class__.__name__, 'Unknown')
+
     def get_aggregated_info_for_files(self, excel_files: list[str]) -> List[list]:
         metadata = self._excel_metadata_for_files(excel_files)
         connection_info = self._get_connection_info()
+        # Campi e tipo di ogni connessione calcolati una volta sola: il ciclo sui file
+        # fa solo il confronto sul nome del txt e concatena le due parti della riga
+        conn_fields = [
+            (
+                conn.txt_file,
+                [
+                    getattr(conn, 'source', None),
+                    getattr(conn, 'server', None),
+                    getattr(conn, 'database', None),
+                    getattr(conn, 'schema', None),
+                    getattr(conn, 'table', None),
+                    self._connection_type(conn),
+                ],
+            )
+            for conn in connection_info
+        ]
         print_string = []
         for data in metadata:
             if data.nome_file:
                 name_wo_extension = data.nome_file.replace('.xlsx', '')
             else:
                 name_wo_extension = ''
+            file_fields = [
+                data.nome_file,
+                data.creatore_file,
+                data.ultimo_modificatore,
+                data.data_creazione,
+                data.data_ultima_modifica,
+                data.collegamento_esterno,
+            ]
             matched = False
-            for conn in connection_info:
-                if name_wo_extension in conn.txt_file:
-                    # Usa l'attributo type se presente, altrimenti deduci dal nome classe
-                    conn_type = getattr(conn, 'type', None)
-                    if not conn_type:
-                        if conn.__class__.__name__ == 'GetSqlConnection':
-                            conn_type = 'Sql'
-                        elif conn.__class__.__name__ == 'GetSharePointConnection':
-                            conn_type = 'SharePoint'
-                        elif conn.__class__.__name__ == 'GetExcelConnection':
-                            conn_type = 'Excel'
-                        else:
-                            conn_type = 'Unknown'
-                    print_string.append([
-                        data.nome_file,
-                        data.creatore_file,
-                        data.ultimo_modificatore,
-                        data.data_creazione,
-                        data.data_ultima_modifica,
-                        data.collegamento_esterno,
-                        getattr(conn, 'source', None),
-                        getattr(conn, 'server', None),
-                        getattr(conn, 'database', None),
-                        getattr(conn, 'schema', None),
-                        getattr(conn, 'table', None),
-                        conn_type
-                    ])
+            for txt_file, fields in conn_fields:
+                if name_wo_extension in txt_file:
+                    print_string.append(file_fields + fields)
                     matched = True
             if not matched:
-                print_string.append([
-                    data.nome_file,
-                    data.creatore_file,
-                    data.ultimo_modificatore,
-                    data.data_creazione,
-                    data.data_ultima_modifica,
-                    data.collegamento_esterno,
+                print_string.append(file_fields + [
                     None,
                     None,
                     None,
@@ -210,9 +235,15 @@ class BusinessLogic:
                 continue
         return connections
 
-    def connessioni_xml(self, excel_files: list[str]) -> List[list]:
+    def connessioni_xml_e_join(self, excel_files: list[str]) -> Tuple[List[list], List[list]]:
+        """
+        Un solo passaggio sui file: ogni workbook viene letto ed analizzato una volta
+        e le righe finiscono in due liste parallele.
+        Ritorna (righe connessioni_xml, righe connessioni_xml_with_join).
+        """
         metadata_list = self._excel_metadata_for_files(excel_files)
         connessioni_xml = []
+        join_rows: List[list] = []
         total = len(metadata_list)
         for idx, meta in enumerate(metadata_list, start=1):
             if meta.collegamento_esterno != 'Si':
@@ -222,6 +253,9 @@ class BusinessLogic:
             if not infos:
                 print(f"[Connessioni] Nessuna connessione rilevata: {meta.file_path}")
             for info in infos:
+                join = info.get('Join')
+                if join:
+                    join_rows.append([xml.file_name, join])
                 server = info.get('Server')
                 database = info.get('Database')
                 schema = info.get('Schema')
@@ -234,7 +268,10 @@ class BusinessLogic:
                 print("\n"+str(row)+"\n")
                 connessioni_xml.append(row)
             print(f"[Connessioni] Elaborazione file {idx}/{total}: {meta.file_path}")
-        return connessioni_xml
+        return connessioni_xml, join_rows
+
+    def connessioni_xml(self, excel_files: list[str]) -> List[list]:
+        return self.connessioni_xml_e_join(excel_files)[0]
 
     def connessioni_xml_with_join(self, excel_files: list[str]) -> List[list]:
         """
@@ -242,24 +279,7 @@ class BusinessLogic:
         lista delle tabelle di JOIN nel formato "schema1.tab1;schema2.tab2;...".
         Ritorna solo le righe con Join valorizzato.
         """
-        metadata_list = self._excel_metadata_for_files(excel_files)
-        rows: List[list] = []
-        total = len(metadata_list)
-        for idx, meta in enumerate(metadata_list, start=1):
-            if meta.collegamento_esterno != 'Si':
-                continue
-            xml = GetXmlConnection(meta.file_path)
-            infos = xml.extract_connection_info()
-            if not infos:
-                print(f"[Connessioni] Nessuna connessione rilevata: {meta.file_path}")
-            for info in infos:
-                join = info.get('Join')
-                if not join:
-                    continue
-                row = [xml.file_name, join]
-                rows.append(row)
-            print(f"[Connessioni] Elaborazione file {idx}/{total}: {meta.file_path}")
-        return rows
+        return self.connessioni_xml_e_join(excel_files)[1]
     
     def connessioni_dirette(self, excel_files: list[str]) -> List[list]:
         """
@@ -283,7 +303,7 @@ class BusinessLogic:
         [File_Name, Into, From, Join] per ogni statement rilevato.
         """
         rows: List[list] = []
-        sql_files = self.sql_finder.file_finder()
+        sql_files = self._sql_file_paths()
         total = len(sql_files)
         for idx, path in enumerate(sql_files, start=1):
             print(f"[SQL] Elaborazione file {idx}/{total}: {path}")
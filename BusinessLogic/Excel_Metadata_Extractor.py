@@ -3,6 +3,9 @@ import zipfile
 from openpyxl import load_workbook
 
 class ExcelMetadataExtractor():
+    # Un'istanza per file Excel, conservata in metadata_list
+    __slots__ = ('file_path', 'nome_file', 'creatore_file', 'ultimo_modificatore',
+                 'data_creazione', 'data_ultima_modifica', 'collegamento_esterno')
 
     def __init__(self, file_path):
         self.file_path = file_path
@@ -1,6 +1,35 @@
 
 import os
 import re
+from functools import lru_cache
+
+# Tabella di traduzione per eliminare delimitatori di identificatori senza regex
+_NAME_DELIMITERS = str.maketrans("", "", '[]"')
+_DOT_WS_RE = re.compile(r"\s*\.\s*")
+# Pattern compilati una volta sola: vengono applicati a ogni blocco di ogni file SQL
+_BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_LINE_COMMENT_RE = re.compile(r"--.*?$", re.M)
+_GO_RE = re.compile(r"^\s*go\s*$", re.I | re.M)
+_FROM_SEGMENT_RE = re.compile(r"\bfrom\b\s+(.*?)(?=\bwhere\b|\bgroup\b|\border\b|\bhaving\b|\bunion\b|;|$)", re.I | re.S)
+_INTO_RE = re.compile(r"\binto\b\s+(?P<into>(?:\[[^\]]+\]|\"[^\"]+\"|[\w\.]+)(?:\s*\.\s*(?:\[[^\]]+\]|\"[^\"]+\"|[\w\.]+))?)", re.I)
+_JOIN_TABLE_RE = re.compile(r"(?:\binner\b|\bleft\b(?:\s+outer)?|\bright\b(?:\s+outer)?|\bfull\b(?:\s+outer)?|\bcross\b)?\s+join\s+(?P<t>(?:\[[^\]]+\]|\"[^\"]+\"|\w+)(?:\s*\.\s*(?:\[[^\]]+\]|\"[^\"]+\"|\w+))?)", re.I)
+_JOIN_RE = re.compile(r"\bjoin\b", re.I)
+_TABLE_NAME_RE = re.compile(r"(?P<t>(?:\[[^\]]+\]|\"[^\"]+\"|\w+)(?:\s*\.\s*(?:\[[^\]]+\]|\"[^\"]+\"|\w+))?)")
+_SELECT_RE = re.compile(r"\bselect\b", re.I)
+_INSERT_INTO_RE = re.compile(r"\binsert\b\s+\binto\b", re.I)
+_INSERT_TABLE_RE = re.compile(r"\binsert\b\s+\binto\b\s+(?P<t>(?:\[[^\]]+\]|\"[^\"]+\"|\w+)(?:\s*\.\s*(?:\[[^\]]+\]|\"[^\"]+\"|\w+))?)", re.I)
+
+
+@lru_cache(maxsize=4096)
+def _clean_identifier(name: str) -> str:
+    # Gli stessi nomi di tabella ricorrono in molti statement e file: pulizia una volta per nome
+    name = name.strip()
+    # Remove brackets and quotes
+    name = name.translate(_NAME_DELIMITERS)
+    # Collapse whitespace around dot
+    if "." in name:
+        name = _DOT_WS_RE.sub(".", name)
+    return name
 
 class SqlExplorer:
     
@@ -25,40 +54,33 @@ class SqlExplorer:
                 return ""
 
     def _strip_comments(self, sql: str) -> str:
-        sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.S)
-        sql = re.sub(r"--.*?$", " ", sql, flags=re.M)
+        sql = _BLOCK_COMMENT_RE.sub(" ", sql)
+        sql = _LINE_COMMENT_RE.sub(" ", sql)
         # Remove batch separators like GO on their own line
-        sql = re.sub(r"^\s*go\s*$", " ", sql, flags=re.I | re.M)
+        sql = _GO_RE.sub(" ", sql)
         return sql
 
     def _clean_name(self, name: str) -> str:
-        name = name.strip()
-        # Remove brackets and quotes
-        name = re.sub(r"^\[|\]$", "", name)
-        name = name.replace("[", "").replace("]", "")
-        name = name.replace('"', "")
-        # Collapse whitespace around dot
-        name = re.sub(r"\s*\.\s*", ".", name)
-        return name
+        return _clean_identifier(name)
 
     def _extract_from_segment(self, block: str) -> str:
-        m = re.search(r"\bfrom\b\s+(.*?)(?=\bwhere\b|\bgroup\b|\border\b|\bhaving\b|\bunion\b|;|$)", block, flags=re.I | re.S)
+        m = _FROM_SEGMENT_RE.search(block)
         return m.group(1) if m else ""
 
     def _extract_into_table(self, block: str) -> str | None:
-        m = re.search(r"\binto\b\s+(?P<into>(?:\[[^\]]+\]|\"[^\"]+\"|[\w\.]+)(?:\s*\.\s*(?:\[[^\]]+\]|\"[^\"]+\"|[\w\.]+))?)", block, flags=re.I)
+        m = _INTO_RE.search(block)
         return self._clean_name(m.group("into")) if m else None
 
     def _extract_join_tables(self, seg: str) -> list:
         joins = []
-        for jm in re.finditer(r"(?:\binner\b|\bleft\b(?:\s+outer)?|\bright\b(?:\s+outer)?|\bfull\b(?:\s+outer)?|\bcross\b)?\s+join\s+(?P<t>(?:\[[^\]]+\]|\"[^\"]+\"|\w+)(?:\s*\.\s*(?:\[[^\]]+\]|\"[^\"]+\"|\w+))?)", seg, flags=re.I):
+        for jm in _JOIN_TABLE_RE.finditer(seg):
             t = self._clean_name(jm.group("t"))
             joins.append(t)
         return joins
 
     def _extract_from_tables(self, seg: str) -> list:
         # Consider only part before first JOIN to capture base FROM tables
-        jpos = re.search(r"\bjoin\b", seg, flags=re.I)
+        jpos = _JOIN_RE.search(seg)
         head = seg[:jpos.start()] if jpos else seg
         head = head.strip()
         if head.startswith("("):  # derived table
@@ -84,23 +106,21 @@ class SqlExplorer:
             p = p.strip()
             if not p:
                 continue
-            m = re.match(r"(?P<t>(?:\[[^\]]+\]|\"[^\"]+\"|\w+)(?:\s*\.\s*(?:\[[^\]]+\]|\"[^\"]+\"|\w+))?)", p)
+            m = _TABLE_NAME_RE.match(p)
             if m:
                 tables.append(self._clean_name(m.group("t")))
         return tables
 
     def _split_select_blocks(self, sql: str) -> list:
         blocks = []
-        selects = list(re.finditer(r"\bselect\b", sql, flags=re.I))
+        selects = list(_SELECT_RE.finditer(sql))
         for i, m in enumerate(selects):
             start = m.start()
             next_select_pos = selects[i + 1].start() if i + 1 < len(selects) else None
             # Prefer terminating at the first semicolon after start, if it appears before the next SELECT
-            semi_m = re.search(r";", sql[start:])
-            if semi_m:
-                semi_pos = start + semi_m.start() + 1
-            else:
-                semi_pos = None
+            # (str.find dalla posizione: niente copia del resto del file per ogni blocco)
+            semi = sql.find(";", start)
+            semi_pos = semi + 1 if semi != -1 else None
             if semi_pos and (next_select_pos is None or semi_pos <= next_select_pos):
                 end = semi_pos
             else:
@@ -110,11 +130,11 @@ class SqlExplorer:
 
     def _split_insert_blocks(self, sql: str) -> list:
         blocks = []
-        for m in re.finditer(r"\binsert\b\s+\binto\b", sql, flags=re.I):
+        for m in _INSERT_INTO_RE.finditer(sql):
             start = m.start()
             # End at next semicolon or end of string
-            sm = re.search(r";", sql[start:], flags=re.S)
-            end = (start + sm.start() + 1) if sm else len(sql)
+            semi = sql.find(";", start)
+            end = semi + 1 if semi != -1 else len(sql)
             blocks.append(sql[start:end])
         return blocks
 
@@ -139,7 +159,7 @@ class SqlExplorer:
             ])
         # Also parse INSERT INTO statements (e.g., INSERT INTO dbo.T ... VALUES ... or SELECT ... FROM ...)
         for iblock in self._split_insert_blocks(sql):
-            m_into = re.search(r"\binsert\b\s+\binto\b\s+(?P<t>(?:\[[^\]]+\]|\"[^\"]+\"|\w+)(?:\s*\.\s*(?:\[[^\]]+\]|\"[^\"]+\"|\w+))?)", iblock, flags=re.I)
+            m_into = _INSERT_TABLE_RE.search(iblock)
             into_table = self._clean_name(m_into.group("t")) if m_into else None
             from_seg = self._extract_from_segment(iblock)
             from_tables = self._extract_from_tables(from_seg) if from_seg else []
@@ -6,6 +6,7 @@ except Exception:
     olefile = None
 
 class GetXlsConnection(IConnection):
+    __slots__ = ()
 
     def __init__(self, txt_file: str):
         super().__init__(txt_file)
@@ -147,6 +148,8 @@ class GetExcelConnection(IConnection):
     Classe placeholder per compatibilità con BusinessLogic._get_connection_info.
     La logica di estrazione per .xlsx è gestita altrove (XML/ConnessioniSenzaTxt).
     """
+    __slots__ = ()
+
     def __init__(self, txt_file: str):
         super().__init__(txt_file)
         self.type = 'Excel'
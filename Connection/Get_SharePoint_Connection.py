@@ -2,6 +2,8 @@ from Connection.IConnection import IConnection
 import re
 
 class GetSharePointConnection(IConnection):
+    __slots__ = ()
+
     def __init__(self, txt_file):
         super().__init__(txt_file)
 
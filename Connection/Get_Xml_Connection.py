@@ -1,6 +1,44 @@
 import zipfile
 import os
+import re
 import xml.etree.ElementTree as ET
+from functools import lru_cache
+
+# Pattern compilati una volta sola: vengono applicati a ogni command di ogni connessione
+_EXCEL_NEWLINE_RE = re.compile(r'_x000[dD]__x000[aA]_')
+_WS_RE = re.compile(r'\s+')
+_BRACKET_RE = re.compile(r'\[([^\]]+)\]')
+_DOT_RE = re.compile(r'\s*\.\s*')
+_USE_RE = re.compile(r'\buse\b\s+([A-Za-z0-9_\[\]"]+)', re.IGNORECASE)
+_SELECT_RE = re.compile(r'\bselect\b', re.IGNORECASE)
+_FROM_QUOTED_RE = re.compile(r'\bfrom\b\s+((?:\[[^\]]+\]|\"[^\"]+\"|[^\s,);])+)', re.IGNORECASE)
+_FROM_RE = re.compile(r'\bfrom\b\s+([^\s;]+)', re.IGNORECASE)
+_JOIN_RE = re.compile(r'\bjoin\b\s+([^\s;]+)', re.IGNORECASE)
+# Tabelle di workbook.xml associate a una connessione (name="..." ... connection="...")
+_WORKBOOK_TABLE_RE = re.compile(r'name\s*=\s*"([^"]+)"\s+[^>]*connection\s*=\s*"([^"]*)"', re.IGNORECASE)
+# Delimitatori [] e " rimossi con una sola passata di str.translate
+_IDENT_DELIMITERS = str.maketrans('', '', '[]"')
+
+
+@lru_cache(maxsize=4096)
+def _choose_database(conn_db, cmd_db):
+    """
+    Restituisce (Database scelto, DatabaseMismatch) per la coppia DB della connection
+    string / DB del command. Le coppie si ripetono su tutte le connessioni dei file
+    analizzati: la normalizzazione (strip + lower) viene fatta una volta per coppia.
+    - Se conn_db è "ANALISI" (o manca), dai priorità al DB trovato nel command
+    - Altrimenti usa conn_db, salvo che nel command ci sia un esplicito USE <db>
+      o un riferimento qualificato a un DB diverso, nel qual caso preferisci quello del command
+    """
+    if not cmd_db:
+        return conn_db, False
+    if not conn_db:
+        return cmd_db, False
+    c_low = conn_db.strip().lower()
+    mismatch = c_low != cmd_db.strip().lower()
+    if mismatch or c_low == 'analisi' or c_low.startswith('analisi_'):
+        return cmd_db, mismatch
+    return conn_db, False
 
 
 class GetXmlConnection:
@@ -77,26 +115,9 @@ class GetXmlConnection:
 
                         # Database/Schema/Tabella dal command (priorità al DB del command)
                         cmd_db, schema, table = self._parse_command(command)
-                        # Decidi il Database finale rispettando le regole richieste:
-                        # - Se conn_db è "ANALISI" (o manca), dai priorità al DB trovato nel command
-                        # - Altrimenti usa conn_db, salvo che nel command ci sia un esplicito USE <db>
-                        #   o un riferimento qualificato a un DB diverso, nel qual caso preferisci quello del command
+                        # Decidi il Database finale (vedi _choose_database per le regole)
                         info['DatabaseFromQuery'] = cmd_db
-                        chosen_db = conn_db
-                        if cmd_db:
-                            if not conn_db:
-                                chosen_db = cmd_db
-                            else:
-                                c_low = conn_db.strip().lower()
-                                q_low = cmd_db.strip().lower()
-                                if c_low == 'analisi' or c_low.startswith('analisi_'):
-                                    chosen_db = cmd_db
-                                elif c_low != q_low:
-                                    # mismatch: preferisci il DB del command
-                                    chosen_db = cmd_db
-                        info['Database'] = chosen_db
-                        if conn_db and cmd_db and conn_db.strip().lower() != cmd_db.strip().lower():
-                            info['DatabaseMismatch'] = True
+                        info['Database'], info['DatabaseMismatch'] = _choose_database(conn_db, cmd_db)
                         info['Schema'] = schema
                         info['Tabella'] = table
 
@@ -131,14 +152,18 @@ class GetXmlConnection:
                         # anche se alcune informazioni non sono presenti.
                         results.append(info)
 
-                    # Multiple Tables: connection type 100 o name contenente 'Multiple Tables'
+                    # Multiple Tables: connection type 100 o name contenente 'Multiple Tables'.
+                    # workbook.xml viene letto e scansionato una volta sola per tutte le connessioni
+                    workbook_tables = None
                     for conn in connections:
                         name_attr = conn.attrib.get('name', '') or ''
                         conn_type = conn.attrib.get('type', '') or ''
                         looks_multiple = ('multiple' in name_attr.lower()) or (conn_type == '100')
                         if not looks_multiple:
                             continue
-                        tables = self._tables_from_workbook(z, name_attr)
+                        if workbook_tables is None:
+                            workbook_tables = self._workbook_tables_by_connection(z)
+                        tables = workbook_tables.get(name_attr.lower(), [])
                         srv, db = self._infer_server_database_from_name(name_attr)
                         for t in tables:
                             # print("\n"+
@@ -192,7 +217,6 @@ class GetXmlConnection:
         Se non trova il database, ritorna (None, schema, tabella).
         Se non riesce a riconoscere, ritorna (None, None, None).
         """
-        import re
         if not command:
             return None, None, None
 
@@ -200,8 +224,8 @@ class GetXmlConnection:
 
         def split_qualified(token: str):
             # Normalizza [x] in "x" e spazi attorno al punto
-            token = re.sub(r'\[([^\]]+)\]', r'"\1"', token)
-            token = re.sub(r'\s*\.\s*', '.', token)
+            token = _BRACKET_RE.sub(r'"\1"', token)
+            token = _DOT_RE.sub('.', token)
             parts = [p for p in token.split('.') if p]
             clean = []
             for p in parts:
@@ -212,16 +236,16 @@ class GetXmlConnection:
             return [c for c in clean if c]
 
         # Esplicito USE <db>
-        muse = re.search(r'\buse\b\s+([A-Za-z0-9_\[\]"]+)', cmd, flags=re.IGNORECASE)
+        muse = _USE_RE.search(cmd)
         if muse:
             token = muse.group(1)
-            token = token.replace('[', '').replace(']', '').replace('"', '').strip()
+            token = token.translate(_IDENT_DELIMITERS).strip()
             if token:
                 return token, None, None
 
         # Caso semplice: il command è solo un identificatore qualificato (nessuno spazio/parola chiave)
         cmd_lower = cmd.lower()
-        if not re.search(r'\s', cmd_lower) and all(k not in cmd_lower for k in ('select', 'from', 'join', 'where')):
+        if not _WS_RE.search(cmd_lower) and all(k not in cmd_lower for k in ('select', 'from', 'join', 'where')):
             simple_parts = split_qualified(cmd)
             if len(simple_parts) == 3:
                 return simple_parts[0], simple_parts[1], simple_parts[2]
@@ -229,9 +253,9 @@ class GetXmlConnection:
                 return None, simple_parts[0], simple_parts[1]
 
         # Caso SELECT ... FROM ...
-        if re.search(r'\bselect\b', cmd, flags=re.IGNORECASE):
+        if _SELECT_RE.search(cmd):
             # cattura il primo token dopo FROM, includendo parti tra [] o "" che possono contenere spazi
-            mfrom = re.search(r'\bfrom\b\s+((?:\[[^\]]+\]|\"[^\"]+\"|[^\s,);])+)', cmd, flags=re.IGNORECASE)
+            mfrom = _FROM_QUOTED_RE.search(cmd)
             if mfrom:
                 token = mfrom.group(1)
                 parts = split_qualified(token)
@@ -251,21 +275,19 @@ class GetXmlConnection:
         - rimuove CR/LF, normalizza doppi spazi
         - decodifica &quot;
         """
-        import re
         if not s:
             return ''
         # replace XML-encoded quotes
         s = s.replace('&quot;', '"')
         # replace Excel newline placeholders (case-insensitive)
-        s = re.sub(r'_x000[dD]__x000[aA]_', ' ', s)
+        s = _EXCEL_NEWLINE_RE.sub(' ', s)
         # replace real newlines
         s = s.replace('\r', ' ').replace('\n', ' ')
         # collapse spaces
-        s = re.sub(r'\s+', ' ', s).strip()
+        s = _WS_RE.sub(' ', s).strip()
         return s
 
     def _parse_all_tables(self, command):
-        import re
         results = []
         if not command:
             return results
@@ -273,31 +295,29 @@ class GetXmlConnection:
         # Normalizza separatori e rimuove quoting [] e "
         def split_parts(token):
             token = token.strip()
-            token = token.replace('[', '').replace(']', '').replace('"', '')
+            token = token.translate(_IDENT_DELIMITERS)
             # Rimuovi eventuali alias: es. schema.tabella AS t -> prendi prima parola
             token = token.split()[0]
             parts = [p for p in token.split('.') if p]
             return parts
 
         # FROM principale
-        mfrom = re.search(r'\bfrom\b\s+([^\s;]+)', cmd, flags=re.IGNORECASE)
+        mfrom = _FROM_RE.search(cmd)
         if mfrom:
             parts = split_parts(mfrom.group(1))
             if len(parts) >= 2:
                 results.append((parts[-2], parts[-1]))
 
-        # Tutte le JOIN
-        for m in re.finditer(r'\bjoin\b\s+([^\s;]+)', cmd, flags=re.IGNORECASE):
+        # Tutte le JOIN (dict come insieme ordinato: dedup senza scansioni della lista)
+        seen = dict.fromkeys(results)
+        for m in _JOIN_RE.finditer(cmd):
             parts = split_parts(m.group(1))
             if len(parts) >= 2:
-                tup = (parts[-2], parts[-1])
-                if tup not in results:
-                    results.append(tup)
+                seen.setdefault((parts[-2], parts[-1]))
 
-        return results
+        return list(seen)
     def _parse_join_tables(self, command):
         """Ritorna solo le coppie (schema, tabella) presenti nelle JOIN del command."""
-        import re
         joins = []
         if not command:
             return joins
@@ -305,18 +325,17 @@ class GetXmlConnection:
 
         def split_parts(token):
             token = token.strip()
-            token = token.replace('[', '').replace(']', '').replace('"', '')
+            token = token.translate(_IDENT_DELIMITERS)
             token = token.split()[0]
             parts = [p for p in token.split('.') if p]
             return parts
 
-        for m in re.finditer(r'\bjoin\b\s+([^\s;]+)', cmd, flags=re.IGNORECASE):
+        seen = {}
+        for m in _JOIN_RE.finditer(cmd):
             parts = split_parts(m.group(1))
             if len(parts) >= 2:
-                tup = (parts[-2], parts[-1])
-                if tup not in joins:
-                    joins.append(tup)
-        return joins
+                seen.setdefault((parts[-2], parts[-1]))
+        return list(seen)
     def _infer_server_database_from_name(self, name_attr):
         if not name_attr:
             return None, None
@@ -339,20 +358,26 @@ class GetXmlConnection:
             break
         return server, database
 
-    def _tables_from_workbook(self, zip_obj, connection_name):
+    def _workbook_tables_by_connection(self, zip_obj):
+        """Mappa nome connessione (minuscolo) -> tabelle di workbook.xml, con una sola scansione."""
         try:
             names = zip_obj.namelist()
             target = next((n for n in names if n.endswith('xl/workbook.xml')), None)
             if not target:
-                return []
+                return {}
             with zip_obj.open(target) as f:
                 xml_text = f.read().decode('utf-8', errors='ignore')
         except Exception:
-            return []
-        import re
-        pattern = re.compile(r'name\s*=\s*"([^"]+)"\s+[^>]*connection\s*=\s*"' + re.escape(connection_name) + r'"', re.IGNORECASE)
-        names = [m.group(1) for m in pattern.finditer(xml_text)]
-        return [n for n in names if n and n != 'ThisWorkbookDataModel']
+            return {}
+        by_connection = {}
+        for m in _WORKBOOK_TABLE_RE.finditer(xml_text):
+            name = m.group(1)
+            if name and name != 'ThisWorkbookDataModel':
+                by_connection.setdefault(m.group(2).lower(), []).append(name)
+        return by_connection
+
+    def _tables_from_workbook(self, zip_obj, connection_name):
+        return list(self._workbook_tables_by_connection(zip_obj).get(connection_name.lower(), []))
 
     
         
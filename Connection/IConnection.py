@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
 
 class IConnection(ABC):
-    
+    # Un oggetto per ogni file txt: niente __dict__ per istanza
+    __slots__ = ('txt_file', 'source', 'server', 'database', 'schema', 'table', 'type')
+
     def __init__(self, txt_file):
         self.txt_file = txt_file
         self.source = None
@@ -18,6 +20,8 @@ class IConnection(ABC):
         pass
 
 class EmptyConnection(IConnection):
+    __slots__ = ('error',)
+
     def __init__(self, txt_file, error=None):
         super().__init__(txt_file)
         self.error = error
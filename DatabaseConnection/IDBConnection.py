@@ -1,11 +1,32 @@
 
 from abc import ABC, abstractmethod
+from functools import lru_cache
 import pyodbc
-from typing import List
+from typing import List, Tuple
 
 # Opzioni di cifratura/Trust. Regola se necessario.
 ODBC_ENCRYPT_OPTS: str = "Encrypt=no;TrustServerCertificate=yes;"
 
+# Ordine di preferenza dei driver, calcolato una volta sola a livello di modulo
+_PREFERRED_DRIVERS: Tuple[str, ...] = (
+    "ODBC Driver 18 for SQL Server",
+    "ODBC Driver 17 for SQL Server",
+    "SQL Server",
+    "SQL Server Native Client 11.0",
+    "ODBC Driver 13 for SQL Server",
+    "ODBC Driver 11 for SQL Server",
+)
+
+
+@lru_cache(maxsize=1)
+def _installed_sql_server_drivers() -> Tuple[str, ...]:
+    # I driver installati non cambiano durante l'esecuzione: li leggiamo una volta per processo
+    try:
+        return tuple(d for d in pyodbc.drivers() if "sql server" in d.lower())
+    except Exception:
+        return ()
+
+
 class IDBConnection(ABC):
     DRIVER: str  # Contratto: ogni sottoclasse può specificare un driver preferito
 
@@ -16,24 +37,15 @@ class IDBConnection(ABC):
         self.table = table
 
     def _candidate_drivers(self) -> List[str]:
-        try:
-            installed = [d for d in pyodbc.drivers() if "sql server" in d.lower()]
-        except Exception:
-            installed = []
-        preferred = [
-            "ODBC Driver 18 for SQL Server",
-            "ODBC Driver 17 for SQL Server",
-            "SQL Server",
-            "SQL Server Native Client 11.0",
-            "ODBC Driver 13 for SQL Server",
-            "ODBC Driver 11 for SQL Server",
-            self.DRIVER if getattr(self, "DRIVER", None) else "",
-        ]
-        preferred = [d for d in preferred if d]
-        ordered = [d for d in preferred if d in installed]
-        ordered += [d for d in installed if d not in ordered]
+        installed = _installed_sql_server_drivers()
+        preferred = _PREFERRED_DRIVERS
+        if getattr(self, "DRIVER", None):
+            preferred += (self.DRIVER,)
+        installed_set = frozenset(installed)
+        # dict.fromkeys: deduplica mantenendo l'ordine di inserimento
+        ordered = list(dict.fromkeys([d for d in preferred if d in installed_set] + list(installed)))
         if not ordered:
-            ordered = preferred or installed
+            ordered = list(dict.fromkeys(preferred))
         return ordered
 
     def _connect(self):
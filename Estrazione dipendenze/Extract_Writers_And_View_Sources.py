@@ -14,10 +14,11 @@ Output (Excel): due fogli
   - ViewSources: Server | DB | Schema | View | SourceSchema | SourceName | SourceType
 
 Dipendenze Python:
-  pip install pyodbc pandas openpyxl
+  pip install pyodbc openpyxl
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 
 try:
@@ -26,20 +27,22 @@ except Exception:
     pyodbc = None  # type: ignore
 
 try:
-    import pandas as pd  # type: ignore
+    from openpyxl import load_workbook, Workbook  # type: ignore
 except Exception:
-    pd = None  # type: ignore
+    load_workbook = None  # type: ignore
+    Workbook = None  # type: ignore
 
 try:
-    from openpyxl import load_workbook  # type: ignore
+    from python_calamine import CalamineWorkbook  # lettore xlsx in Rust, opzionale
 except Exception:
-    load_workbook = None  # type: ignore
+    CalamineWorkbook = None  # type: ignore
 
 
 # ------------------------ Configurazione base ------------------------
 INPUT_EXCEL_PATH: Optional[str] = None   # es: r"C:\\path\\lista_oggetti.xlsx"
 OUTPUT_EXCEL_PATH: Optional[str] = None  # es: r"C:\\path\\writers_e_view_sources.xlsx"
 ROWS_PER_FILE: int = 20  # scrivi un file ogni N righe analizzate
+BATCH_TARGETS: int = 1000  # oggetti per query di tipo/sorgenti (2 parametri ciascuno, max 2100 per comando)
 DEFAULT_SERVER: str = "EPCP3"
 DEFAULT_SERVER: str = "EPCP3"
 DEFAULT_DB: str = "master"
@@ -59,6 +62,17 @@ SQL_PASSWORD: Optional[str] = None
 CONNECTION_TEST_TIMEOUT: int = 3
 QUERY_TIMEOUT: int = 60
 ODBC_ENCRYPT_OPTS: str = "Encrypt=no;TrustServerCertificate=yes;"
+# Dimensione del pacchetto di rete (byte, max 32767): meno pacchetti per le definizioni lunghe
+ODBC_PACKET_SIZE: int = 32767
+# Righe lette per volta (fetchmany) dalle query su cataloghi e moduli
+FETCH_BATCH_SIZE: int = 500
+
+# Attributo ODBC SQL_ATTR_PACKET_SIZE (non esposto come costante da pyodbc)
+_SQL_ATTR_PACKET_SIZE = 112
+
+
+WRITERS_HEADERS: List[str] = ["Server", "DB", "Schema", "Object", "ObjectType", "WriterName", "WriterType", "DMLType"]
+VIEW_SOURCES_HEADERS: List[str] = ["Server", "DB", "Schema", "View", "SourceSchema", "SourceName", "SourceType"]
 
 
 def _derive_part_path(base_path: str, part_index: int) -> str:
@@ -74,12 +88,55 @@ def _derive_part_path(base_path: str, part_index: int) -> str:
     return f"{root}_part{part_index}{ext}"
 
 
+def _fetch_in_batches(cur):
+    """Itera le righe del cursore leggendone FETCH_BATCH_SIZE per volta invece di tutte con fetchall."""
+    while True:
+        rows = cur.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+def _set_unicode_decoding(conn) -> None:
+    """Le definizioni nvarchar(max) vengono decodificate direttamente da UTF-16LE,
+    senza passare da una transcodifica intermedia per ogni cella."""
+    conn.setdecoding(pyodbc.SQL_WCHAR, encoding="utf-16le")
+    conn.setdecoding(pyodbc.SQL_CHAR, encoding="utf-8")
+    conn.setencoding(encoding="utf-16le")
+
+
+def _calamine_value(v: Any) -> Any:
+    # calamine restituisce "" per le celle vuote e float per ogni numero: si riporta tutto ai valori di openpyxl
+    if v == "":
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _read_first_sheet_rows(path: str) -> List[Tuple[Any, ...]]:
+    """Righe del primo foglio come tuple di valori (None per le celle vuote).
+
+    Con python-calamine il file viene letto in Rust senza costruire celle openpyxl;
+    senza calamine, o se la lettura fallisce, si usa openpyxl in read_only.
+    """
+    if CalamineWorkbook is not None:
+        try:
+            sheet = CalamineWorkbook.from_path(path).get_sheet_by_index(0)
+            return [tuple(_calamine_value(v) for v in r) for r in sheet.to_python(skip_empty_area=False)]
+        except Exception as e:
+            print(f"[DEP] Lettura con calamine non riuscita ({e}), uso openpyxl")
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return list(wb.worksheets[0].iter_rows(min_row=1, values_only=True))
+    finally:
+        wb.close()
+
+
 class WritersAndViewSourcesExtractor:
     def __init__(self, input_excel: str, output_excel: str, rows_per_file: int = ROWS_PER_FILE):
         if pyodbc is None:
             raise RuntimeError("pyodbc non installato. Esegui: pip install pyodbc")
-        if pd is None:
-            raise RuntimeError("pandas non installato. Esegui: pip install pandas openpyxl")
         if load_workbook is None:
             raise RuntimeError("openpyxl non installato. Esegui: pip install openpyxl")
         if not input_excel or not os.path.exists(input_excel):
@@ -92,40 +149,35 @@ class WritersAndViewSourcesExtractor:
 
     # ------------------------ Lettura input ------------------------
     def _read_items(self) -> List[Tuple[str, str, str, str]]:
-        wb = load_workbook(self.input_excel, read_only=True, data_only=True)
-        try:
-            ws = wb.worksheets[0]
-            rows = list(ws.iter_rows(min_row=1, values_only=True))
-            if not rows:
-                return []
-
-            headers = [str(x).strip().lower() if x is not None else "" for x in rows[0]]
-            # Colonne richieste: Server, DB/Database, Schema, Object/Table/View/Name
-            idx_server = headers.index("server") if "server" in headers else None
-            idx_db = headers.index("db") if "db" in headers else (headers.index("database") if "database" in headers else None)
-            idx_schema = headers.index("schema") if "schema" in headers else None
-            name_keys = [k for k in ("object", "table", "view", "name") if k in headers]
-            idx_name = headers.index(name_keys[0]) if name_keys else None
-
-            if None in (idx_server, idx_db, idx_schema, idx_name):
-                raise RuntimeError(
-                    "Il foglio deve contenere le colonne: Server, DB (o Database), Schema, Object (o Table/View/Name)."
-                )
-
-            items: List[Tuple[str, str, str, str]] = []
-            for r in rows[1:]:
-                if not r:
-                    continue
-                server = str(r[idx_server]).strip() if r[idx_server] else DEFAULT_SERVER
-                db = str(r[idx_db]).strip() if r[idx_db] else DEFAULT_DB
-                schema = str(r[idx_schema]).strip() if r[idx_schema] else "dbo"
-                name = str(r[idx_name]).strip() if r[idx_name] else ""
-                if not name:
-                    continue
-                items.append((server, db, schema, name))
-            return items
-        finally:
-            wb.close()
+        rows = _read_first_sheet_rows(self.input_excel)
+        if not rows:
+            return []
+
+        headers = [str(x).strip().lower() if x is not None else "" for x in rows[0]]
+        # Colonne richieste: Server, DB/Database, Schema, Object/Table/View/Name
+        idx_server = headers.index("server") if "server" in headers else None
+        idx_db = headers.index("db") if "db" in headers else (headers.index("database") if "database" in headers else None)
+        idx_schema = headers.index("schema") if "schema" in headers else None
+        name_keys = [k for k in ("object", "table", "view", "name") if k in headers]
+        idx_name = headers.index(name_keys[0]) if name_keys else None
+
+        if None in (idx_server, idx_db, idx_schema, idx_name):
+            raise RuntimeError(
+                "Il foglio deve contenere le colonne: Server, DB (o Database), Schema, Object (o Table/View/Name)."
+            )
+
+        items: List[Tuple[str, str, str, str]] = []
+        for r in rows[1:]:
+            if not r:
+                continue
+            server = str(r[idx_server]).strip() if r[idx_server] else DEFAULT_SERVER
+            db = str(r[idx_db]).strip() if r[idx_db] else DEFAULT_DB
+            schema = str(r[idx_schema]).strip() if r[idx_schema] else "dbo"
+            name = str(r[idx_name]).strip() if r[idx_name] else ""
+            if not name:
+                continue
+            items.append((server, db, schema, name))
+        return items
 
     # ------------------------ Connessione ODBC ------------------------
     def _candidate_drivers(self) -> List[str]:
@@ -205,16 +257,112 @@ class WritersAndViewSourcesExtractor:
         except Exception:
             return ("", "ERROR")
 
+    def _get_targets_info(self, conn, targets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[str, str, List[Tuple[str, str, str]]]]:
+        """Tipo oggetto e (per le viste) sorgenti di più oggetti dello stesso DB.
+
+        Una query ogni BATCH_TARGETS oggetti invece di due query per oggetto
+        (_get_object_type + _find_view_sources). Chiave (schema, name) come in input;
+        in caso di errore ritorna {} e l'analisi ripiega sulle query per singolo oggetto.
+        """
+        targets = list(dict.fromkeys(targets))
+        info: Dict[Tuple[str, str], Tuple[str, str, List[Tuple[str, str, str]]]] = {}
+        cur = conn.cursor()
+        try:
+            for start in range(0, len(targets), BATCH_TARGETS):
+                chunk = targets[start:start + BATCH_TARGETS]
+                values = ", ".join("(?, ?)" for _ in chunk)
+                sql = (
+                    f"""
+                    SELECT DISTINCT t.schema_name, t.object_name, o.type, o.type_desc,
+                           s2.name AS source_schema, ref.name AS source_name, ref.type_desc AS source_type_desc
+                    FROM (VALUES {values}) AS t(schema_name, object_name)
+                    LEFT JOIN sys.objects o
+                      ON o.object_id = OBJECT_ID(QUOTENAME(t.schema_name) + N'.' + QUOTENAME(t.object_name))
+                    LEFT JOIN sys.sql_expression_dependencies d
+                      ON o.type = 'V' AND d.referencing_id = o.object_id
+                    LEFT JOIN sys.objects ref ON d.referenced_id = ref.object_id AND ref.type IN ('U','V')
+                    LEFT JOIN sys.schemas s2 ON ref.schema_id = s2.schema_id
+                    """
+                )
+                cur.execute(sql, [value for pair in chunk for value in pair])
+                for r in _fetch_in_batches(cur):
+                    key = (str(r[0]), str(r[1]))
+                    if key not in info:
+                        if r[2] is None and r[3] is None:
+                            info[key] = ("", "NOT_FOUND", [])
+                        else:
+                            code = str(r[2]) if r[2] is not None else ""
+                            desc = str(r[3]) if r[3] is not None else ""
+                            info[key] = (code, desc, [])
+                    if r[5] is not None:
+                        info[key][2].append((str(r[4]), str(r[5]), str(r[6])))
+        except Exception as e:
+            print(f"[DEP] Lettura tipi/sorgenti in blocco non riuscita ({e}), uso le query per oggetto")
+            return {}
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                pass
+        return info
+
     # ------------------------ Writers (chi scrive) ------------------------
-    def _find_writers(self, conn, schema: str, name: str) -> List[Tuple[str, str, str]]:
+    def _get_writer_modules(self, conn, targets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Tuple[int, str, str]]]:
+        """Moduli (SP/trigger/funzioni) che referenziano più oggetti dello stesso DB.
+
+        Una query ogni BATCH_TARGETS oggetti invece di una per oggetto in _find_writers.
+        Ritorna (schema, name) -> [(object_id, nome, type_desc)], con lista vuota per gli
+        oggetti senza moduli; in caso di errore ritorna {} e _find_writers ripiega sulla
+        query per singolo oggetto.
+        """
+        targets = list(dict.fromkeys(targets))
+        modules: Dict[Tuple[str, str], List[Tuple[int, str, str]]] = {target: [] for target in targets}
+        cur = conn.cursor()
+        try:
+            for start in range(0, len(targets), BATCH_TARGETS):
+                chunk = targets[start:start + BATCH_TARGETS]
+                values = ", ".join("(?, ?)" for _ in chunk)
+                sql = (
+                    f"""
+                    SELECT DISTINCT t.schema_name, t.object_name, o.object_id, o.name, o.type_desc
+                    FROM (VALUES {values}) AS t(schema_name, object_name)
+                    JOIN sys.sql_expression_dependencies d
+                      ON d.referenced_id = OBJECT_ID(QUOTENAME(t.schema_name) + N'.' + QUOTENAME(t.object_name))
+                    JOIN sys.objects o ON d.referencing_id = o.object_id
+                    JOIN sys.sql_modules sm ON sm.object_id = o.object_id
+                    WHERE o.type IN ('P','TR','FN','IF','TF')
+                    """
+                )
+                cur.execute(sql, [value for pair in chunk for value in pair])
+                for r in _fetch_in_batches(cur):
+                    modules[(str(r[0]), str(r[1]))].append((int(r[2]), str(r[3]), str(r[4])))
+        except Exception as e:
+            print(f"[DEP] Lettura moduli referenzianti in blocco non riuscita ({e}), uso le query per oggetto")
+            return {}
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                pass
+        return modules
+
+    def _find_writers(self, conn, schema: str, name: str,
+                      definitions: Optional[Dict[int, str]] = None,
+                      modules: Optional[List[Tuple[int, str, str]]] = None) -> List[Tuple[str, str, str]]:
         """Ritorna lista di (writer_name, writer_type_desc, dml_type) per oggetti che scrivono sull'oggetto target.
         Cerca nei moduli (SP/trigger/funzioni) i token DML: INSERT INTO / UPDATE / DELETE FROM / MERGE INTO.
+        definitions: cache object_id -> definizione in minuscolo condivisa tra i target dello stesso DB,
+        così un modulo che referenzia più target viene letto e convertito una volta sola.
+        modules: moduli referenzianti già letti con _get_writer_modules, se disponibili.
         """
+        if definitions is None:
+            definitions = {}
         # Cerco oggetti che referenziano il target, e filtro sul testo della definizione per DML
-        # Nota: sys.sql_expression_dependencies trova i referencing_id. Filtriamo poi su definition sm.definition
+        # Nota: sys.sql_expression_dependencies trova i referencing_id. Le definizioni (sys.sql_modules)
+        # vengono lette a parte, solo per i moduli non ancora in cache
         sql = (
             """
-            SELECT DISTINCT o.name, o.type_desc, sm.definition
+            SELECT DISTINCT o.object_id, o.name, o.type_desc
             FROM sys.sql_expression_dependencies d
             JOIN sys.objects o ON d.referencing_id = o.object_id
             JOIN sys.sql_modules sm ON sm.object_id = o.object_id
@@ -225,8 +373,20 @@ class WritersAndViewSourcesExtractor:
         cur = conn.cursor()
         writers: List[Tuple[str, str, str]] = []
         try:
-            cur.execute(sql, (schema, name))
-            rows = cur.fetchall()
+            if modules is None:
+                cur.execute(sql, (schema, name))
+                modules = [(int(r[0]), str(r[1]), str(r[2])) for r in _fetch_in_batches(cur)]
+            missing = [object_id for object_id, _, _ in modules if object_id not in definitions]
+            for start in range(0, len(missing), BATCH_TARGETS):
+                ids = missing[start:start + BATCH_TARGETS]
+                cur.execute(
+                    f"SELECT object_id, definition FROM sys.sql_modules WHERE object_id IN ({', '.join('?' for _ in ids)})",
+                    ids,
+                )
+                for r in _fetch_in_batches(cur):
+                    definitions[int(r[0])] = str(r[1]).lower() if r[1] is not None else ""
+                for object_id in ids:
+                    definitions.setdefault(object_id, "")
             # Costruiamo pattern ragionevoli (senza usare LIKE qui, filtriamo in Python per coprire casi vari)
             target_variants = [
                 f"[{schema}].[{name}]",
@@ -235,26 +395,36 @@ class WritersAndViewSourcesExtractor:
                 f"{schema}.[{name}]",
                 f"{name}",  # fallback (può produrre falsi positivi)
             ]
-            for r in rows:
-                oname = str(r[0])
-                otype = str(r[1])
-                definition = str(r[2]) if r[2] is not None else ""
-                text_lower = definition.lower()
-
-                # Individua DML specifico rivolto al target
-                dml_found: List[str] = []
-                for variant in target_variants:
-                    v = variant.lower()
-                    if f"insert into {v}" in text_lower:
-                        dml_found.append("INSERT")
-                    if f"update {v}" in text_lower:
-                        dml_found.append("UPDATE")
-                    if f"delete from {v}" in text_lower:
-                        dml_found.append("DELETE")
-                    if f"merge into {v}" in text_lower or f"merge {v}" in text_lower:
-                        dml_found.append("MERGE")
-
-                for dml in sorted(set(dml_found)):
+            # Stringhe DML costruite una volta per target invece che per ogni modulo,
+            # raggruppate per tipo DML con la keyword che tutte contengono
+            dml_needles: Dict[str, Tuple[str, List[str]]] = {
+                "INSERT": ("insert", []),
+                "UPDATE": ("update", []),
+                "DELETE": ("delete", []),
+                "MERGE": ("merge", []),
+            }
+            for variant in target_variants:
+                v = variant.lower()
+                dml_needles["INSERT"][1].append(f"insert into {v}")
+                dml_needles["UPDATE"][1].append(f"update {v}")
+                dml_needles["DELETE"][1].append(f"delete from {v}")
+                dml_needles["MERGE"][1].extend((f"merge into {v}", f"merge {v}"))
+            name_lower = name.lower()
+            for object_id, oname, otype in modules:
+                text_lower = definitions[object_id]
+
+                # Prefiltro: ogni variante contiene il nome, se manca nel testo non c'è DML sul target
+                if name_lower not in text_lower:
+                    continue
+
+                # Individua DML specifico rivolto al target: le varianti di un tipo DML si
+                # cercano solo se il testo contiene la sua keyword, e fino alla prima trovata
+                dml_found = [
+                    dml for dml, (keyword, needles) in dml_needles.items()
+                    if keyword in text_lower and any(needle in text_lower for needle in needles)
+                ]
+
+                for dml in sorted(dml_found):
                     writers.append((oname, otype, dml))
         except Exception:
             return writers
@@ -282,7 +452,7 @@ class WritersAndViewSourcesExtractor:
         sources: List[Tuple[str, str, str]] = []
         try:
             cur.execute(sql, (schema, view))
-            for r in cur.fetchall():
+            for r in _fetch_in_batches(cur):
                 sources.append((str(r[0]), str(r[1]), str(r[2])))
         except Exception:
             return sources
@@ -294,6 +464,27 @@ class WritersAndViewSourcesExtractor:
         return sources
 
     # ------------------------ Esecuzione ------------------------
+    def _analyze_target(self, conn, schema: str, name: str,
+                        info: Optional[Tuple[str, str, List[Tuple[str, str, str]]]] = None,
+                        definitions: Optional[Dict[int, str]] = None,
+                        modules: Optional[List[Tuple[int, str, str]]] = None) -> Tuple[str, List[Tuple[str, str, str]], List[Tuple[str, str, str]]]:
+        """Tipo oggetto, writers e (per le viste) sorgenti di un oggetto target.
+        info: (type, type_desc, sorgenti) già letti con _get_targets_info, se disponibili.
+        definitions: cache delle definizioni dei moduli del DB (vedi _find_writers).
+        modules: moduli referenzianti già letti con _get_writer_modules, se disponibili.
+        """
+        if info is not None:
+            code, desc, sources = info
+        else:
+            code, desc = self._get_object_type(conn, schema, name)
+            sources = []
+        obj_type = desc or code or "Sconosciuto"
+        writers = self._find_writers(conn, schema, name, definitions, modules)
+        # Se è vista, troviamo anche le sorgenti
+        if info is None and (code.upper() == "V" or obj_type.upper().startswith("VIEW")):
+            sources = self._find_view_sources(conn, schema, name)
+        return obj_type, writers, sources
+
     def run(self) -> str:
         items = self._read_items()
         if not items:
@@ -305,51 +496,89 @@ class WritersAndViewSourcesExtractor:
         view_src_rows: List[List[str]] = []
         part: int = 1
         conns: Dict[Tuple[str, str], Any] = {}
+        # Righe Writers/ViewSources già costruite per oggetto: un oggetto ripetuto nell'input
+        # riusa le stesse righe (in sola lettura) invece di rifare query e costruzione
+        cache: Dict[Tuple[str, str, str, str], Tuple[List[List[str]], List[List[str]]]] = {}
+        # Oggetti raggruppati per DB: tipo e sorgenti vengono letti in blocco alla prima connessione al DB
+        targets_per_db: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for server, db, schema, name in items:
+            targets_per_db.setdefault((server, db), []).append((schema, name))
+        infos: Dict[Tuple[str, str], Dict[Tuple[str, str], Tuple[str, str, List[Tuple[str, str, str]]]]] = {}
+        writer_modules: Dict[Tuple[str, str], Dict[Tuple[str, str], List[Tuple[int, str, str]]]] = {}
+        # Definizioni dei moduli per DB, condivise tra tutti i target del DB
+        definitions_per_db: Dict[Tuple[str, str], Dict[int, str]] = {}
+        # I chunk vengono salvati su un thread dedicato: la scrittura del workbook si
+        # sovrappone alle query dei target successivi (pyodbc rilascia il GIL in attesa)
+        chunk_writer = ThreadPoolExecutor(max_workers=1)
+        pending: List[Tuple[str, Any]] = []
+
+        def _submit_chunk(out_path: str, w_rows: List[List[str]], v_rows: List[List[str]]) -> None:
+            pending.append((out_path, chunk_writer.submit(self._write_chunk, out_path, w_rows, v_rows)))
+
         try:
-            for idx, (server, db, schema, name) in enumerate(items, start=1):
-                print(f"[DEP] {idx}/{total}: {server}.{db}.{schema}.{name}")
-                key = (server, db)
-                if key not in conns:
+            try:
+                for idx, (server, db, schema, name) in enumerate(items, start=1):
+                    print(f"[DEP] {idx}/{total}: {server}.{db}.{schema}.{name}")
+                    key = (server, db)
+                    if key not in conns:
+                        try:
+                            conn_str = self._build_conn_str(server, db)
+                            # Solo letture: autocommit evita la gestione delle transazioni implicite
+                            conns[key] = pyodbc.connect(
+                                conn_str,
+                                timeout=QUERY_TIMEOUT,
+                                autocommit=True,
+                                attrs_before={_SQL_ATTR_PACKET_SIZE: ODBC_PACKET_SIZE},
+                            )
+                            _set_unicode_decoding(conns[key])
+                        except Exception as e:
+                            # registra errori di connessione in writers con tipo Connessione fallita
+                            writers_rows.append([server, db, schema, name, "Sconosciuto", "Connessione fallita", "", f"ERROR: {e}"])
+                            continue
+
+                    # Lo stesso oggetto può comparire più volte nell'input: le query girano una volta sola
+                    target_key = (server, db, schema, name)
+                    if target_key not in cache:
+                        if key not in infos:
+                            infos[key] = self._get_targets_info(conns[key], targets_per_db[key])
+                            writer_modules[key] = self._get_writer_modules(conns[key], targets_per_db[key])
+                        obj_type, writers, sources = self._analyze_target(
+                            conns[key], schema, name,
+                            info=infos[key].get((schema, name)),
+                            definitions=definitions_per_db.setdefault(key, {}),
+                            modules=writer_modules[key].get((schema, name)),
+                        )
+                        cache[target_key] = (
+                            [[server, db, schema, name, obj_type, wname, wtype, dml] for wname, wtype, dml in writers],
+                            [[server, db, schema, name, sschema, sname, stype] for sschema, sname, stype in sources],
+                        )
+                    target_writers, target_sources = cache[target_key]
+                    writers_rows.extend(target_writers)
+                    view_src_rows.extend(target_sources)
+                    # Scrivi chunk ogni N righe analizzate: le liste passano al thread di
+                    # scrittura e il ciclo prosegue su liste nuove
+                    if idx % self.rows_per_file == 0:
+                        _submit_chunk(_derive_part_path(self.output_excel, part), writers_rows, view_src_rows)
+                        writers_rows = []
+                        view_src_rows = []
+                        part += 1
+            finally:
+                for c in conns.values():
                     try:
-                        conn_str = self._build_conn_str(server, db)
-                        conns[key] = pyodbc.connect(conn_str, timeout=QUERY_TIMEOUT)
-                    except Exception as e:
-                        # registra errori di connessione in writers con tipo Connessione fallita
-                        writers_rows.append([server, db, schema, name, "Sconosciuto", "Connessione fallita", "", f"ERROR: {e}"])
-                        continue
-
-                # Tipo oggetto target
-                code, desc = self._get_object_type(conns[key], schema, name)
-                obj_type = desc or code or "Sconosciuto"
-
-                # Trova writers
-                for wname, wtype, dml in self._find_writers(conns[key], schema, name):
-                    writers_rows.append([server, db, schema, name, obj_type, wname, wtype, dml])
-
-                # Se è vista, troviamo anche le sorgenti
-                if code.upper() == "V" or obj_type.upper().startswith("VIEW"):
-                    for sschema, sname, stype in self._find_view_sources(conns[key], schema, name):
-                        view_src_rows.append([server, db, schema, name, sschema, sname, stype])
-                # Scrivi chunk ogni N righe analizzate
-                if idx % self.rows_per_file == 0:
-                    out_path = _derive_part_path(self.output_excel, part)
-                    self._write_chunk(out_path, writers_rows, view_src_rows)
-                    print(f"[DEP] Creato file: {out_path}")
-                    writers_rows.clear()
-                    view_src_rows.clear()
-                    part += 1
+                        c.close()
+                    except Exception:
+                        pass
+
+            # Scrivi l'ultimo chunk (se presente)
+            if writers_rows or view_src_rows:
+                _submit_chunk(_derive_part_path(self.output_excel, part), writers_rows, view_src_rows)
+
+            # Attende i salvataggi in ordine: eventuali errori di scrittura vengono rilanciati qui
+            for out_path, future in pending:
+                future.result()
+                print(f"[DEP] Creato file: {out_path}")
         finally:
-            for c in conns.values():
-                try:
-                    c.close()
-                except Exception:
-                    pass
-
-        # Scrivi l'ultimo chunk (se presente)
-        if writers_rows or view_src_rows:
-            out_path = _derive_part_path(self.output_excel, part)
-            self._write_chunk(out_path, writers_rows, view_src_rows)
-            print(f"[DEP] Creato file: {out_path}")
+            chunk_writer.shutdown(wait=True)
 
         return self.output_excel
 
@@ -359,24 +588,17 @@ class WritersAndViewSourcesExtractor:
         if out_dir and not os.path.exists(out_dir):
             os.makedirs(out_dir, exist_ok=True)
 
-        writers_df = pd.DataFrame(
-            writers_rows,
-            columns=["Server", "DB", "Schema", "Object", "ObjectType", "WriterName", "WriterType", "DMLType"],
-        )
-        view_src_df = pd.DataFrame(
-            view_src_rows,
-            columns=["Server", "DB", "Schema", "View", "SourceSchema", "SourceName", "SourceType"],
-        )
-
-        with pd.ExcelWriter(out_path, engine="openpyxl", mode="w") as w:
-            if not writers_df.empty:
-                writers_df.to_excel(w, index=False, sheet_name="Writers")
-            else:
-                pd.DataFrame(columns=["Server","DB","Schema","Object","ObjectType","WriterName","WriterType","DMLType"]).to_excel(w, index=False, sheet_name="Writers")
-            if not view_src_df.empty:
-                view_src_df.to_excel(w, index=False, sheet_name="ViewSources")
-            else:
-                pd.DataFrame(columns=["Server","DB","Schema","View","SourceSchema","SourceName","SourceType"]).to_excel(w, index=False, sheet_name="ViewSources")
+        # Scrittura in streaming (write_only) delle righe, senza passare da DataFrame
+        wb = Workbook(write_only=True)
+        for title, headers, rows in (
+            ("Writers", WRITERS_HEADERS, writers_rows),
+            ("ViewSources", VIEW_SOURCES_HEADERS, view_src_rows),
+        ):
+            ws = wb.create_sheet(title)
+            ws.append(headers)
+            for row in rows:
+                ws.append(row)
+        wb.save(out_path)
 
 
 def main() -> None:
@@ -5,6 +5,8 @@
 # -----------------------------------------------------------------------------
 
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
 try:
@@ -46,6 +48,8 @@ SQL_PASSWORD: Optional[str] = None  # usato se TRUSTED_CONNECTION=False
 QUERY_TIMEOUT: int = 60
 # Opzioni di cifratura/Trust (ODBC 18 abilita Encrypt by default). Regola se necessario.
 ODBC_ENCRYPT_OPTS: str = "Encrypt=no;TrustServerCertificate=yes;"
+# SELECT eseguite in parallelo, ognuna sulla connessione del proprio thread
+MAX_WORKERS: int = 4
 
 
 class SelectsExecutor:
@@ -159,17 +163,32 @@ class SelectsExecutor:
         print(f"[SELECT] Totale SELECT da eseguire: {total}")
 
         conn_str = self._build_conn_str()
-        results: List[List[str]] = []
-        conn = None
+        # Le SELECT sono indipendenti e il tempo è speso in attesa del server (pyodbc rilascia
+        # il GIL durante execute/fetch): girano in parallelo, una connessione per thread perché
+        # la stessa connessione pyodbc non va usata da due thread insieme
+        local = threading.local()
+        conns = []
+        conns_lock = threading.Lock()
+
+        def _esegui(item):
+            idx, s = item
+            conn = getattr(local, "conn", None)
+            if conn is None:
+                conn = local.conn = pyodbc.connect(conn_str, timeout=QUERY_TIMEOUT)
+                with conns_lock:
+                    conns.append(conn)
+            preview = (s.replace('\n', ' ')[:120] + ('…' if len(s) > 120 else ''))
+            print(f"[SELECT] Esecuzione {idx}/{total}: {preview}")
+            err = self._execute_select(conn, s)
+            return [s, "" if err is None else err]
+
         try:
-            conn = pyodbc.connect(conn_str, timeout=QUERY_TIMEOUT)
-            for idx, s in enumerate(selects, start=1):
-                preview = (s.replace('\n', ' ')[:120] + ('…' if len(s) > 120 else ''))
-                print(f"[SELECT] Esecuzione {idx}/{total}: {preview}")
-                err = self._execute_select(conn, s)
-                results.append([s, "" if err is None else err])
+            workers = max(1, min(MAX_WORKERS, total))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # map restituisce gli esiti nell'ordine delle SELECT in input
+                results: List[List[str]] = list(executor.map(_esegui, enumerate(selects, start=1)))
         finally:
-            if conn is not None:
+            for conn in conns:
                 try:
                     conn.close()
                 except Exception:
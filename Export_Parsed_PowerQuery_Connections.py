@@ -4,7 +4,7 @@
 # -----------------------------------------------------------------------------
 import argparse
 import os
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from openpyxl import load_workbook, Workbook
 from openpyxl.utils import get_column_letter
 from BusinessLogic.PowerQuerySourceConnectionParser import PowerQuerySourceConnectionParser
@@ -15,23 +15,30 @@ def read_sources_from_excel(input_path: str) -> List[Tuple[str, str, str]]:
     Returns a list of tuples (path, file, source_line) from the report produced by Export_PowerQuery_Sources.py
     Expected headers: Path | File | Source
     """
-    wb = load_workbook(input_path)
+    # read_only: le righe vengono lette in streaming senza costruire le celle di tutto il foglio
+    wb = load_workbook(input_path, read_only=True)
     ws = wb.active
+    rows_iter = ws.iter_rows(values_only=True)
 
-    headers = [cell.value for cell in next(ws.iter_rows(min_row=1, max_row=1))]
+    headers = list(next(rows_iter, ()))
     header_index = {h: i for i, h in enumerate(headers)}
     required = ["Path", "File", "Source"]
     for r in required:
         if r not in header_index:
+            wb.close()
             raise ValueError(f"Input Excel missing required column '{r}'. Found: {headers}")
+    # Posizioni delle colonne risolte una volta, non con un lookup per riga
+    i_path, i_file, i_source = (header_index[r] for r in required)
+    width = max(i_path, i_file, i_source) + 1
 
     rows: List[Tuple[str, str, str]] = []
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        path = row[header_index["Path"]]
-        file = row[header_index["File"]]
-        source = row[header_index["Source"]]
+    for row in rows_iter:
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        source = row[i_source]
         if source:
-            rows.append((path or "", file or "", source))
+            rows.append((row[i_path] or "", row[i_file] or "", source))
+    wb.close()
     return rows
 
 
@@ -66,50 +73,64 @@ def write_parsed_excel(entries: List[Tuple[str, str, str, str, str, str, str, st
         wb.save(output_path)
 
 
-def main():
-    ap = argparse.ArgumentParser(description="Parse PowerQuery Source lines into connection parts")
-    ap.add_argument("--in", dest="input", default=os.path.join("Report", "PowerQuery_Sources_Report.xlsx"),
-                    help="Path to the input Excel with Source lines (default: Report/PowerQuery_Sources_Report.xlsx)")
-    ap.add_argument("--out", dest="output", default=os.path.join("Report", "PowerQuery_Parsed_Connections.xlsx"),
-                    help="Output path for the parsed connections Excel")
-    args = ap.parse_args()
+def _format_table(i: dict) -> str:
+    parts = [i.get("database"), i.get("schema"), i.get("table")]
+    return ".".join([p for p in parts if p])
 
-    rows = read_sources_from_excel(args.input)
-    parser = PowerQuerySourceConnectionParser()
 
+def parse_sources(
+    rows: List[Tuple[str, str, str]],
+    parser: PowerQuerySourceConnectionParser,
+) -> List[Tuple[str, str, str, str, str, str, str, str]]:
+    """Parse each Source line into (path, file, server, database, schema, table, join, source).
+
+    The same Source line is typically shared by many files: it is parsed and its
+    Join string formatted once, then reused for every row that carries it.
+    """
+    by_source: Dict[str, Optional[Tuple[str, str, str, str, str]]] = {}
     parsed: List[Tuple[str, str, str, str, str, str, str, str]] = []
     for path, file, source in rows:
-        infos = parser.parse_all(source)
-        if not infos:
-            # Fall back to single parse for robustness
-            info = parser.parse(source)
-            infos = [info] if info else []
-
-        if not infos:
+        if source in by_source:
+            conn = by_source[source]
+        else:
+            infos = parser.parse_all(source)
+            if not infos:
+                # Fall back to single parse for robustness
+                info = parser.parse(source)
+                infos = [info] if info else []
+
+            if infos:
+                primary = infos[0]
+                join_str = "; ".join([_format_table(i) for i in infos[1:]])
+                conn = (
+                    primary.get("server"),
+                    primary.get("database"),
+                    primary.get("schema"),
+                    primary.get("table"),
+                    join_str,
+                )
+            else:
+                conn = None
+            by_source[source] = conn
+
+        if conn is None:
             # still nothing; output minimal row
             parsed.append((path, file, None, None, None, None, "", source))
-            continue
+        else:
+            parsed.append((path, file) + conn + (source,))
+    return parsed
 
-        primary = infos[0]
-        others = infos[1:]
 
-        def fmt(i: dict) -> str:
-            parts = [i.get("database"), i.get("schema"), i.get("table")]
-            return ".".join([p for p in parts if p])
-
-        join_str = "; ".join([fmt(i) for i in others])
-
-        parsed.append((
-            path,
-            file,
-            primary.get("server"),
-            primary.get("database"),
-            primary.get("schema"),
-            primary.get("table"),
-            join_str,
-            source,
-        ))
+def main():
+    ap = argparse.ArgumentParser(description="Parse PowerQuery Source lines into connection parts")
+    ap.add_argument("--in", dest="input", default=os.path.join("Report", "PowerQuery_Sources_Report.xlsx"),
+                    help="Path to the input Excel with Source lines (default: Report/PowerQuery_Sources_Report.xlsx)")
+    ap.add_argument("--out", dest="output", default=os.path.join("Report", "PowerQuery_Parsed_Connections.xlsx"),
+                    help="Output path for the parsed connections Excel")
+    args = ap.parse_args()
 
+    rows = read_sources_from_excel(args.input)
+    parsed = parse_sources(rows, PowerQuerySourceConnectionParser())
     write_parsed_excel(parsed, args.output)
     print(f"Parsed {len(parsed)} entries. Report written: {os.path.abspath(args.output)}")
 
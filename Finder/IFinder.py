@@ -1,23 +1,84 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import os
 
+# Thread per la visita delle sottocartelle di primo livello
+SCAN_WORKERS = 16
+
 class IFinder(ABC):
     EXTENSION: str #Contratto: ogni sottoclasse deve specificare un'estensione di file
 
     def __init__(self, root_path: str):
         self.root_path = root_path
 
+    @staticmethod
+    def _list_dir(path: str) -> tuple[list, list[str]]:
+        """File (DirEntry) e sottocartelle di path. Come os.walk non segue i link a cartelle
+        e salta quelle non leggibili; i DirEntry hanno già nome, percorso e tipo."""
+        files: list = []
+        subdirs: list[str] = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        files.append(entry)
+                    elif not entry.is_symlink():
+                        subdirs.append(entry.path)
+        except OSError:
+            pass
+        return files, subdirs
+
+    @staticmethod
+    def _iter_files(path: str):
+        """Visita top-down come os.walk ma con os.scandir.
+
+        Iterativa con una pila esplicita: niente catena di generatori annidati (ogni file
+        risaliva un 'yield from' per livello) né RecursionError su alberi molto profondi.
+        Le sottocartelle sono impilate al contrario, così l'ordine resta quello di os.walk."""
+        stack = [path]
+        while stack:
+            files, subdirs = IFinder._list_dir(stack.pop())
+            yield from files
+            stack.extend(reversed(subdirs))
+
+    @staticmethod
+    def _iter_files_parallel(path: str):
+        """Come _iter_files, ma le sottocartelle di primo livello sono visitate in parallelo.
+        Su share di rete il tempo è dominato dalla latenza di ogni listing: i thread la
+        sovrappongono (il GIL è rilasciato durante le syscall). L'ordine resta quello di os.walk."""
+        files, subdirs = IFinder._list_dir(path)
+        yield from files
+        if SCAN_WORKERS <= 1 or len(subdirs) < 2:
+            for subdir in subdirs:
+                yield from IFinder._iter_files(subdir)
+            return
+        with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(subdirs))) as executor:
+            for subtree in executor.map(lambda d: list(IFinder._iter_files(d)), subdirs):
+                yield from subtree
+
+    @staticmethod
+    def files_by_extension(root_path: str, extensions: tuple[str, ...]) -> dict[str, list[str]]:
+        """Una sola visita di root_path per più estensioni: ritorna {estensione: percorsi}.
+        str.endswith riceve direttamente la tupla, quindi il filtro è un'unica chiamata per file."""
+        found: dict[str, list[str]] = {ext: [] for ext in extensions}
+        for entry in IFinder._iter_files_parallel(root_path):
+            f = entry.name
+            if f.endswith(extensions) and not f.startswith("~$"):
+                for ext in extensions:
+                    if f.endswith(ext):
+                        found[ext].append(entry.path)
+        return found
+
     def file_finder(self) -> list[str]:
         """Ritorna una lista di percorsi completi per l'estensione definita dalla sottoclasse."""
         if not hasattr(self, "EXTENSION"):
             raise NotImplementedError("La sottoclasse deve definire EXTENSION.")
-        found_files: list[str] = []
         try:
-            for root, dirs, files in os.walk(self.root_path):
-                for f in files:
-                    if f.endswith(self.EXTENSION) and not f.startswith("~$"):
-                        full_path = os.path.join(root, f)
-                        found_files.append(full_path)
+            return self.files_by_extension(self.root_path, (self.EXTENSION,))[self.EXTENSION]
         except Exception as e:
             print(f"Errore nella ricerca dei file {self.EXTENSION}: {e}")
-        return found_files
+            return []
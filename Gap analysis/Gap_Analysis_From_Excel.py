@@ -20,6 +20,14 @@ try:
 except Exception:
     pd = None  # type: ignore
 
+try:
+    import python_calamine  # noqa: F401  lettore xlsx in Rust, opzionale
+except Exception:
+    python_calamine = None  # type: ignore
+
+# Motore per pd.read_excel: calamine se installato (molto più veloce), altrimenti il default (openpyxl)
+EXCEL_READ_ENGINE: Optional[str] = "calamine" if python_calamine is not None else None
+
 # ---------------- Config ----------------
 INPUT_EXCEL_PATH: Optional[str] = None  # es: r"C:\\path\\input.xlsx"
 OUTPUT_EXCEL_PATH: Optional[str] = None  # es: r"C:\\path\\gap_output.xlsx"
@@ -39,6 +47,14 @@ ODBC_DRIVERS: List[str] = [
 ODBC_ENCRYPT_OPTS: str = "Encrypt=no;TrustServerCertificate=yes;"
 CONNECTION_TEST_TIMEOUT: int = 3
 QUERY_TIMEOUT: int = 60
+# Oggetti per query nella risoluzione in blocco di tipo/object_id (2 parametri ciascuno, limite 2100)
+BATCH_OBJECTS: int = 1000
+
+# Colonne dell'Excel di output
+GAP_COLUMNS: List[str] = [
+    "Server", "DB", "Schema", "Table", "ObjectType", "DDL",
+    "Column", "DataType", "IsNullable", "PrimaryKey", "ForeignKey", "ExampleValue",
+]
 
 
 class GapAnalyzer:
@@ -56,7 +72,7 @@ class GapAnalyzer:
     # --------------- Excel ---------------
     def _read_items(self) -> List[Tuple[str, str, str, str, str, str]]:
         """Ritorna lista di tuple (server, db, schema, table, object_type, ddl)."""
-        df = pd.read_excel(self.input_excel)
+        df = pd.read_excel(self.input_excel, engine=EXCEL_READ_ENGINE)
         if df.empty:
             return []
         df.columns = [str(c).strip().lower() for c in df.columns]
@@ -64,19 +80,24 @@ class GapAnalyzer:
         for r in required:
             if r not in df.columns:
                 raise RuntimeError("Input deve avere colonne: Server, DB, Schema, Table, Object Type, DDL")
-        items: List[Tuple[str, str, str, str, str, str]] = []
-        for _, row in df.iterrows():
-            server = str(row["server"]).strip() if pd.notna(row["server"]) else self.server
-            db = str(row["db"]).strip() if pd.notna(row["db"]) else "master"
-            schema = str(row["schema"]).strip() if pd.notna(row["schema"]) else "dbo"
-            table = str(row["table"]).strip() if pd.notna(row["table"]) else ""
-            objtype = str(row["object type"]).strip() if pd.notna(row["object type"]) else ""
-            ddl = str(row["ddl"]).strip() if pd.notna(row["ddl"]) else ""
-            if not table:
-                continue
-            # Forza server EPCP3
-            server = self.server
-            items.append((server, db, schema, table, objtype, ddl))
+        # Operazioni per colonna invece di iterrows (che crea una Series per riga)
+        def _col(name: str, default: str) -> "pd.Series":
+            values = df[name]
+            return values.astype(str).str.strip().where(values.notna(), default)
+
+        tables = _col("table", "")
+        keep = tables != ""
+        # Forza server EPCP3
+        items: List[Tuple[str, str, str, str, str, str]] = [
+            (self.server, db, schema, table, objtype, ddl)
+            for db, schema, table, objtype, ddl in zip(
+                _col("db", "master")[keep],
+                _col("schema", "dbo")[keep],
+                tables[keep],
+                _col("object type", "")[keep],
+                _col("ddl", "")[keep],
+            )
+        ]
         return items
 
     # --------------- SQL ---------------
@@ -121,6 +142,40 @@ class GapAnalyzer:
                 continue
         raise RuntimeError(f"Nessun driver ODBC valido trovato. Ultimo errore: {last_error}")
 
+    def _resolve_objects(self, conn, targets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[Optional[int], str]]:
+        """object_id e codice tipo di più oggetti dello stesso DB.
+
+        Una query ogni BATCH_OBJECTS oggetti (join con una lista VALUES) invece di
+        _get_obj_type_code + _get_obj_id per ogni riga. Ritorna (schema, name) ->
+        (object_id o None, type_code); in caso di errore ritorna {} e run() ripiega
+        sulle query per oggetto.
+        """
+        targets = list(dict.fromkeys(targets))
+        resolved: Dict[Tuple[str, str], Tuple[Optional[int], str]] = {}
+        try:
+            cur = conn.cursor()
+            for start in range(0, len(targets), BATCH_OBJECTS):
+                chunk = targets[start:start + BATCH_OBJECTS]
+                values = ", ".join("(?, ?)" for _ in chunk)
+                sql = (
+                    f"""
+                    SELECT t.schema_name, t.object_name,
+                           COALESCE(OBJECT_ID(QUOTENAME(t.schema_name) + '.' + QUOTENAME(t.object_name)), o.object_id),
+                           o.type
+                    FROM (VALUES {values}) AS t(schema_name, object_name)
+                    LEFT JOIN sys.schemas AS s ON s.name = t.schema_name
+                    LEFT JOIN sys.all_objects AS o ON o.schema_id = s.schema_id AND o.name = t.object_name
+                    """
+                )
+                cur.execute(sql, [value for pair in chunk for value in pair])
+                for r in cur.fetchall():
+                    obj_id = int(r[2]) if r[2] is not None else None
+                    resolved[(str(r[0]), str(r[1]))] = (obj_id, str(r[3]) if r[3] is not None else "")
+        except Exception as e:
+            print(f"[GAP] Risoluzione oggetti in blocco non riuscita ({e}), uso le query per oggetto")
+            return {}
+        return resolved
+
     def _get_obj_id(self, conn, schema: str, name: str) -> Optional[int]:
         cur = conn.cursor()
         cur.execute("SELECT OBJECT_ID(QUOTENAME(?) + '.' + QUOTENAME(?))", (schema, name))
@@ -295,18 +350,30 @@ class GapAnalyzer:
         if not items:
             raise RuntimeError("Nessun elemento in input.")
 
-        results: List[List[Any]] = []
+        # Risultati per colonna (una lista per campo) invece di una lista per riga: i campi
+        # dell'oggetto si ripetono per ogni sua colonna e il DataFrame si costruisce senza trasporre
+        results: Dict[str, List[Any]] = {c: [] for c in GAP_COLUMNS}
         conns: Dict[str, Any] = {}
+        # Oggetti raggruppati per DB: tipo e object_id si risolvono in blocco alla prima connessione
+        targets_per_db: Dict[str, List[Tuple[str, str]]] = {}
+        for (_server, db, schema, name, _objtype, _ddl) in items:
+            targets_per_db.setdefault(db, []).append((schema, name))
+        resolved: Dict[str, Dict[Tuple[str, str], Tuple[Optional[int], str]]] = {}
         try:
             for (server, db, schema, name, objtype, ddl) in items:
                 # connessione per DB
                 if db not in conns:
                     conns[db] = pyodbc.connect(self._build_conn_str(db), timeout=QUERY_TIMEOUT)
+                    resolved[db] = self._resolve_objects(conns[db], targets_per_db[db])
                 conn = conns[db]
 
                 # risolvi tipo (serve per TVF) e object_id
-                type_code, _ = self._get_obj_type_code(conn, schema, name)
-                obj_id = self._get_obj_id(conn, schema, name)
+                info = resolved[db].get((schema, name))
+                if info is not None:
+                    obj_id, type_code = info
+                else:
+                    type_code, _ = self._get_obj_type_code(conn, schema, name)
+                    obj_id = self._get_obj_id(conn, schema, name)
 
                 if obj_id:
                     columns = self._get_columns_info(conn, obj_id)
@@ -319,16 +386,17 @@ class GapAnalyzer:
 
                 sample = self._sample_row(conn, schema, name, type_code)
 
-                for col in columns:
-                    colname = col["column"]
-                    dtype = self._format_datatype(col)
-                    isnull = "Y" if col.get("is_nullable", True) else "N"
-                    pk = "Y" if col["column_id"] in pk_cols else "N"
-                    fk = "Y" if col["column_id"] in fk_cols else "N"
-                    example = None
-                    if sample is not None:
-                        example = sample.get(colname)
-                    results.append([server, db, schema, name, objtype, ddl, colname, dtype, isnull, pk, fk, example])
+                n = len(columns)
+                for field, value in zip(GAP_COLUMNS[:6], (server, db, schema, name, objtype, ddl)):
+                    results[field].extend([value] * n)
+                results["Column"].extend(col["column"] for col in columns)
+                results["DataType"].extend(self._format_datatype(col) for col in columns)
+                results["IsNullable"].extend("Y" if col.get("is_nullable", True) else "N" for col in columns)
+                results["PrimaryKey"].extend("Y" if col["column_id"] in pk_cols else "N" for col in columns)
+                results["ForeignKey"].extend("Y" if col["column_id"] in fk_cols else "N" for col in columns)
+                results["ExampleValue"].extend(
+                    sample.get(col["column"]) if sample is not None else None for col in columns
+                )
         finally:
             for c in conns.values():
                 try:
@@ -340,10 +408,7 @@ class GapAnalyzer:
         out_dir = os.path.dirname(self.output_excel)
         if out_dir and not os.path.exists(out_dir):
             os.makedirs(out_dir, exist_ok=True)
-        df = pd.DataFrame(results, columns=[
-            "Server", "DB", "Schema", "Table", "ObjectType", "DDL",
-            "Column", "DataType", "IsNullable", "PrimaryKey", "ForeignKey", "ExampleValue"
-        ])
+        df = pd.DataFrame(results, columns=GAP_COLUMNS)
 
         try:
             from Report.Excel_Writer import write_dataframe_split_across_files
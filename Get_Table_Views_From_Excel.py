@@ -64,6 +64,25 @@ class TableViewsExtractor:
             raise ValueError("Percorso Excel di input non valorizzato.")
         self.input_excel = input_excel
         self.output_excel = output_excel or os.path.join(os.path.dirname(input_excel) or os.getcwd(), "VistePerTabella.xlsx")
+        # Un cursore per (connessione, query): lo stesso testo SQL rieseguito sullo stesso
+        # cursore non viene ripreparato dal driver ODBC a ogni tabella
+        self._cursors: Dict[Tuple[int, str], object] = {}
+
+    def _cursor(self, conn, query_key: str):
+        key = (id(conn), query_key)
+        cur = self._cursors.get(key)
+        if cur is None:
+            cur = conn.cursor()
+            self._cursors[key] = cur
+        return cur
+
+    def _close_cursors(self) -> None:
+        for cur in self._cursors.values():
+            try:
+                cur.close()
+            except Exception:
+                pass
+        self._cursors.clear()
 
     def _read_items(self) -> List[Tuple[str, str, str, str]]:
         """Ritorna lista di tuple (server, db, schema, table)."""
@@ -158,7 +177,7 @@ class TableViewsExtractor:
             ORDER BY v.name;
             """
         )
-        cur = conn.cursor()
+        cur = self._cursor(conn, "dep")
         rows: List[Tuple[str, str]] = []
         try:
             cur.execute(sql_dep, (schema, table))
@@ -166,6 +185,9 @@ class TableViewsExtractor:
                 rows.append((str(r[0]), str(r[1])))
         except Exception:
             rows = []
+        # Negli oggetti schema-bound c'è una dipendenza per ogni colonna referenziata:
+        # la stessa vista comparirebbe più volte nell'output
+        rows = list(dict.fromkeys(rows))
 
         if rows:
             return rows
@@ -201,7 +223,7 @@ class TableViewsExtractor:
             ORDER BY v.name;
             """
         )
-        cur = conn.cursor()
+        cur = self._cursor(conn, "fallback")
         try:
             cur.execute(sql_fb, (schema, table))
             fb_rows = cur.fetchall()
@@ -221,6 +243,9 @@ class TableViewsExtractor:
 
         # Pool connessioni per server/db
         conns: Dict[Tuple[str, str], object] = {}
+        # Viste già estratte per (server, db, schema, table): le righe ripetute nell'Excel
+        # riusano il risultato senza aprire connessioni né rieseguire le query
+        views_by_item: Dict[Tuple[str, str, str, str], List[Tuple[str, str]]] = {}
         results: List[List[str]] = []
         batch_results: List[List[str]] = []  # risultati solo per il blocco corrente
 
@@ -236,14 +261,17 @@ class TableViewsExtractor:
             for idx, (server, db, schema, table) in enumerate(items, start=1):
                 print(f"[VIEW] Elaborazione {idx}/{total}: {server}.{db}.{schema}.{table}")
 
-                key = (server, db)
-                conn = conns.get(key)
-                if conn is None:
-                    conn_str = self._build_conn_str(server, db)
-                    conn = pyodbc.connect(conn_str, timeout=QUERY_TIMEOUT)
-                    conns[key] = conn
-
-                views = self._fetch_views_for_table(conn, schema, table)
+                item = (server, db, schema, table)
+                views = views_by_item.get(item)
+                if views is None:
+                    key = (server, db)
+                    conn = conns.get(key)
+                    if conn is None:
+                        conn_str = self._build_conn_str(server, db)
+                        conn = pyodbc.connect(conn_str, timeout=QUERY_TIMEOUT)
+                        conns[key] = conn
+                    views = self._fetch_views_for_table(conn, schema, table)
+                    views_by_item[item] = views
                 if not views:
                     print(f"[VIEW] Nessuna vista trovata per {schema}.{table}")
                     continue
@@ -263,7 +291,8 @@ class TableViewsExtractor:
                     _write_results(partial_path, batch_results)
                     batch_results = []
         finally:
-            # Chiudi connessioni
+            # Chiudi cursori e connessioni
+            self._close_cursors()
             for key, c in conns.items():
                 try:
                     c.close()
@@ -1,10 +1,42 @@
+import math
 import os
 import re
+from functools import lru_cache
 from typing import Iterable, List, Optional, Sequence, Tuple
 
 import pandas as pd
 from openpyxl import Workbook, load_workbook
 
+try:
+    import xlsxwriter
+except Exception:
+    xlsxwriter = None  # type: ignore
+
+# Sanitize values to remove characters illegal for openpyxl:
+# ASCII control chars except tab(\x09), newline(\x0A), carriage return(\x0D)
+_ILLEGAL_CHARS = re.compile(r"[\x00-\x08\x0B-\x0C\x0E-\x1F]")
+# Same characters as a str.translate deletion table: removal runs in a single C loop
+_ILLEGAL_CHARS_TABLE = dict.fromkeys(c for c in range(0x20) if c not in (0x09, 0x0A, 0x0D))
+# Server/DB/schema/file names repeat on many rows: short strings are cleaned once
+# and then served from the cache. Long values (e.g. SQL definitions) are rarely
+# repeated and would only pin memory, so they bypass it.
+_CLEAN_CACHE_MAX_LEN = 256
+
+
+@lru_cache(maxsize=65536)
+def _clean_cached(val: str) -> str:
+    return val.translate(_ILLEGAL_CHARS_TABLE) if _ILLEGAL_CHARS.search(val) else val
+
+
+def _clean_text(val: str) -> str:
+    if len(val) <= _CLEAN_CACHE_MAX_LEN:
+        return _clean_cached(val)
+    # Fast path: most cells are clean, and search() allocates no new string
+    if _ILLEGAL_CHARS.search(val):
+        return val.translate(_ILLEGAL_CHARS_TABLE)
+    return val
+
+
 class ExcelWriter:
     
     def __init__(self, folder_path, file_name):
@@ -26,17 +58,13 @@ class ExcelWriter:
         output_path = self._resolved_output_path
         df = pd.DataFrame(data, columns=columns)
 
-        # Sanitize DataFrame to remove characters illegal for openpyxl
-        # Remove ASCII control chars except tab(\x09), newline(\x0A), carriage return(\x0D)
-        illegal_chars = re.compile(r"[\x00-\x08\x0B-\x0C\x0E-\x1F]")
+        clean_text = _clean_text
 
         def _clean(val):
-            if isinstance(val, str):
-                return illegal_chars.sub("", val)
-            return val
+            return clean_text(val) if isinstance(val, str) else val
 
-        # Clean each cell value (applymap is supported for DataFrame element-wise ops)
-        df = df.applymap(_clean)
+        # Clean each cell value (DataFrame.map on pandas >= 2.1, applymap before)
+        df = df.map(_clean) if hasattr(df, "map") else df.applymap(_clean)
 
         # Overwrite file on first write of this instance; append thereafter
         if not self._initialized:
@@ -53,7 +81,7 @@ class ExcelWriter:
             writer_kwargs['if_sheet_exists'] = 'replace'
 
         # Also ensure sheet_name is clean and within Excel limits
-        clean_sheet_name = illegal_chars.sub("", sheet_name)[:31] or "Sheet1"
+        clean_sheet_name = _clean_text(sheet_name)[:31] or "Sheet1"
 
         try:
             with pd.ExcelWriter(output_path, **writer_kwargs) as writer:
@@ -78,6 +106,7 @@ class ExcelWriter:
 # Utility helpers for writing large outputs split across multiple Excel files.
 # -----------------------------------------------------------------------------
 EXCEL_MAX_ROWS: int = 1_048_576  # Excel per-sheet limit, including header row
+EXCEL_MAX_CELL_CHARS: int = 32_767  # Excel per-cell text limit
 _DATA_ROWS_PER_SHEET: int = EXCEL_MAX_ROWS - 1  # accounting for header row
 
 
@@ -106,27 +135,20 @@ def write_dataframe_split_across_files(
     if df is None:
         return []
 
-    total_rows = len(df)
-    written: List[str] = []
-    if total_rows <= _DATA_ROWS_PER_SHEET:
-        out_path = _derive_part_path(base_output_path, 1)
-        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-        with pd.ExcelWriter(out_path, engine="openpyxl", mode="w") as writer:
-            df.to_excel(writer, index=False, sheet_name=sheet_name)
-        written.append(out_path)
-        return written
+    # Rows are streamed to write_rows_split_across_files instead of going through
+    # to_excel, which builds the whole sheet in memory; NaN/NaT become blank cells.
+    def _cell(v):
+        if v is pd.NA or v is pd.NaT or (isinstance(v, float) and v != v):
+            return None
+        return v
 
-    part = 1
-    for start in range(0, total_rows, _DATA_ROWS_PER_SHEET):
-        end = min(start + _DATA_ROWS_PER_SHEET, total_rows)
-        chunk = df.iloc[start:end]
-        out_path = _derive_part_path(base_output_path, part)
-        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-        with pd.ExcelWriter(out_path, engine="openpyxl", mode="w") as writer:
-            chunk.to_excel(writer, index=False, sheet_name=sheet_name)
-        written.append(out_path)
-        part += 1
-    return written
+    def _rows():
+        for row in df.itertuples(index=False, name=None):
+            yield [_cell(v) for v in row]
+
+    return write_rows_split_across_files(
+        [str(c) for c in df.columns], _rows(), base_output_path, sheet_name=sheet_name
+    )
 
 
 def write_rows_split_across_files(
@@ -136,7 +158,9 @@ def write_rows_split_across_files(
     sheet_name: str = "Sheet1",
     column_widths: Optional[Sequence[int]] = None,
 ) -> List[str]:
-    """Write rows (list of sequences) to one or more Excel files with openpyxl.
+    """Write rows (list of sequences) to one or more Excel files.
+
+    Uses xlsxwriter in constant_memory mode when installed, openpyxl write_only otherwise.
 
     - headers: sequence of header strings
     - rows: iterable of row sequences matching headers length
@@ -147,48 +171,93 @@ def write_rows_split_across_files(
     Returns the list of written file paths.
     """
     headers = list(headers)
-    # Materialize rows if it's a generator to compute length safely
-    rows_list: List[Sequence] = list(rows)
-    total_rows = len(rows_list)
-
-    def _write_chunk(chunk_rows: List[Sequence], out_path: str) -> None:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = sheet_name[:31] or "Sheet1"
-
-        # Write header (bold)
-        ws.append(list(headers))
-        for cell in ws[1]:
-            cell.font = cell.font.copy(bold=True)
-
-        # Write data rows
-        for r in chunk_rows:
-            ws.append(list(r))
 
-        # Column widths if provided
-        if column_widths:
-            from openpyxl.utils import get_column_letter
-
-            for i, w in enumerate(column_widths, start=1):
-                ws.column_dimensions[get_column_letter(i)].width = w
-
-        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-        wb.save(out_path)
+    # In constant_memory mode xlsxwriter flushes each row to disk as soon as it is
+    # written (inline strings, no shared strings table), so memory stays flat even
+    # on very large outputs. Without xlsxwriter, openpyxl write_only is used.
+    if xlsxwriter is not None:
+        def _open_part(out_path: str):
+            wb = xlsxwriter.Workbook(out_path, {
+                "constant_memory": True,
+                "use_zip64": True,
+                # Write strings as text, as openpyxl does
+                "strings_to_formulas": False,
+                "strings_to_urls": False,
+                "default_date_format": "yyyy-mm-dd hh:mm:ss",
+            })
+            ws = wb.add_worksheet(sheet_name[:31] or "Sheet1")
+            if column_widths:
+                for i, w in enumerate(column_widths):
+                    ws.set_column(i, i, w)
+            ws.write_row(0, 0, headers, wb.add_format({"bold": True}))
+            next_row = iter(range(1, EXCEL_MAX_ROWS))
+
+            def _append(values):
+                # NaN/inf become blank cells as with openpyxl (write_number rejects them)
+                values = [None if type(v) is float and not math.isfinite(v) else v for v in values]
+                row = next(next_row)
+                # -2: a string over the cell limit was truncated and write_row stopped at
+                # that cell. Rewrite the row cell by cell so the following columns are kept
+                # (openpyxl truncates to the same limit) and report the truncated cells.
+                if ws.write_row(row, 0, values) == -2:
+                    for col, v in enumerate(values):
+                        if ws.write(row, col, v) == -2:
+                            name = headers[col] if col < len(headers) else col + 1
+                            print(
+                                f"[WARN] {out_path}: row {row + 1}, column {name} "
+                                f"truncated to {EXCEL_MAX_CELL_CHARS} characters"
+                            )
+
+            return wb, _append
+
+        def _save_part(wb, out_path: str) -> None:
+            os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+            wb.close()
+    else:
+        # Rows go straight into a write_only workbook: no full list in memory and
+        # no cell kept around after it is written.
+        def _open_part(out_path: str):
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.styles import Font
+
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(title=sheet_name[:31] or "Sheet1")
+
+            # Column widths if provided (must be set before any row in write_only mode)
+            if column_widths:
+                from openpyxl.utils import get_column_letter
+
+                for i, w in enumerate(column_widths, start=1):
+                    ws.column_dimensions[get_column_letter(i)].width = w
+
+            # Write header (bold)
+            header_cells = []
+            for h in headers:
+                cell = WriteOnlyCell(ws, value=h)
+                cell.font = Font(bold=True)
+                header_cells.append(cell)
+            ws.append(header_cells)
+            return wb, ws.append
+
+        def _save_part(wb, out_path: str) -> None:
+            os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+            wb.save(out_path)
 
     written: List[str] = []
-    if total_rows <= _DATA_ROWS_PER_SHEET:
-        out_path = _derive_part_path(base_output_path, 1)
-        _write_chunk(rows_list, out_path)
-        written.append(out_path)
-        return written
-
     part = 1
-    start = 0
-    while start < total_rows:
-        end = min(start + _DATA_ROWS_PER_SHEET, total_rows)
-        out_path = _derive_part_path(base_output_path, part)
-        _write_chunk(rows_list[start:end], out_path)
-        written.append(out_path)
-        start = end
-        part += 1
-    return written
\ No newline at end of file
+    out_path = _derive_part_path(base_output_path, part)
+    wb, append = _open_part(out_path)
+    rows_in_part = 0
+    for r in rows:
+        if rows_in_part == _DATA_ROWS_PER_SHEET:
+            _save_part(wb, out_path)
+            written.append(out_path)
+            part += 1
+            out_path = _derive_part_path(base_output_path, part)
+            wb, append = _open_part(out_path)
+            rows_in_part = 0
+        append(list(r))
+        rows_in_part += 1
+    _save_part(wb, out_path)
+    written.append(out_path)
+    return written
@@ -61,6 +61,18 @@ class SPDDLAppender:
             base_dir = os.path.dirname(excel_path) or os.getcwd()
             self.output_txt = os.path.join(base_dir, "Objects_Append.sql")
 
+    # CREATE [OR ALTER] <tipo> [schema.]nome: pattern compilati una volta e provati in ordine,
+    # ciascuno con il gruppo che contiene il nome oggetto
+    _DDL_CREATE = r"\bcreate\s+(?:or\s+alter\s+)?(?:view|procedure|function|table|trigger|synonym)\s+"
+    DDL_NAME_PATTERNS = [
+        # Con brackets: [schema].[name] oppure [name]
+        (re.compile(_DDL_CREATE + r"\[([^\]]+)\]\s*\.\s*\[([^\]]+)\]", re.IGNORECASE | re.DOTALL), 2),
+        (re.compile(_DDL_CREATE + r"\[([^\]]+)\]", re.IGNORECASE | re.DOTALL), 1),
+        # Senza brackets: schema.name oppure name
+        (re.compile(_DDL_CREATE + r"([a-zA-Z0-9_]+)\s*\.\s*([a-zA-Z0-9_]+)\b", re.IGNORECASE), 2),
+        (re.compile(_DDL_CREATE + r"([a-zA-Z0-9_]+)\b", re.IGNORECASE), 1),
+    ]
+
     @staticmethod
     def _norm_header(h: Optional[str]) -> str:
         return (str(h).strip().lower() if h is not None else "")
@@ -75,36 +87,10 @@ class SPDDLAppender:
         if not ddl:
             return None
         text = str(ddl)
-        # Con brackets: [schema].[name] oppure [name]
-        m = re.search(
-            r"\bcreate\s+(?:or\s+alter\s+)?(?:view|procedure|function|table|trigger|synonym)\s+\[([^\]]+)\]\s*\.\s*\[([^\]]+)\]",
-            text,
-            flags=re.IGNORECASE | re.DOTALL,
-        )
-        if m:
-            return m.group(2)
-        m = re.search(
-            r"\bcreate\s+(?:or\s+alter\s+)?(?:view|procedure|function|table|trigger|synonym)\s+\[([^\]]+)\]",
-            text,
-            flags=re.IGNORECASE | re.DOTALL,
-        )
-        if m:
-            return m.group(1)
-        # Senza brackets: schema.name oppure name
-        m = re.search(
-            r"\bcreate\s+(?:or\s+alter\s+)?(?:view|procedure|function|table|trigger|synonym)\s+([a-zA-Z0-9_]+)\s*\.\s*([a-zA-Z0-9_]+)\b",
-            text,
-            flags=re.IGNORECASE,
-        )
-        if m:
-            return m.group(2)
-        m = re.search(
-            r"\bcreate\s+(?:or\s+alter\s+)?(?:view|procedure|function|table|trigger|synonym)\s+([a-zA-Z0-9_]+)\b",
-            text,
-            flags=re.IGNORECASE,
-        )
-        if m:
-            return m.group(1)
+        for pattern, group in SPDDLAppender.DDL_NAME_PATTERNS:
+            m = pattern.search(text)
+            if m:
+                return m.group(group)
         return None
 
     def _read_rows(self) -> List[Dict[str, str]]:
@@ -5,6 +5,7 @@
 # -----------------------------------------------------------------------------
 
 import os
+import shutil
 from typing import List, Optional
 
 # Third-party dependency used elsewhere in the workspace
@@ -132,16 +133,16 @@ class SqlFilesAppender:
         finally:
             wb.close()
 
-    def _read_file_text(self, path: str) -> str:
-        try:
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read()
-        except Exception:
+    def _copy_file_text(self, path: str, out) -> None:
+        """Copia il testo del file in out a blocchi, senza caricarlo tutto in memoria."""
+        for encoding in ("utf-8", "latin-1"):
             try:
-                with open(path, "r", encoding="latin-1", errors="ignore") as f:
-                    return f.read()
+                src = open(path, "r", encoding=encoding, errors="ignore")
             except Exception:
-                return ""
+                continue
+            with src:
+                shutil.copyfileobj(src, out)
+            return
 
     def run(self) -> str:
         paths = self._read_paths_from_excel()
@@ -165,7 +166,7 @@ class SqlFilesAppender:
                 # Separatore richiesto: --<n> <percorso>
                 out.write(f"--{idx} {fp}\n")
                 if os.path.exists(fp):
-                    out.write(self._read_file_text(fp))
+                    self._copy_file_text(fp, out)
                 else:
                     out.write(f"-- ATTENZIONE: file non trovato: {fp}\n")
                 # Garantisce una newline tra file
@@ -176,8 +177,7 @@ class SqlFilesAppender:
             sql_copy = os.path.splitext(self.output_txt)[0] + ".sql"
             try:
                 # Copia bytes per evitare ricompressioni di newline
-                with open(self.output_txt, "rb") as src, open(sql_copy, "wb") as dst:
-                    dst.write(src.read())
+                shutil.copyfile(self.output_txt, sql_copy)
             except Exception:
                 # Silenzioso: il .txt rimane comunque disponibile
                 pass
@@ -9,6 +9,7 @@
 # -----------------------------------------------------------------------------
 
 import os
+import shutil
 from typing import Optional, List, Dict
 import re
 
@@ -55,10 +56,35 @@ class ViewsDDLAppender:
             self.output_txt = os.path.join(base_dir, "Views_Append.txt")
         self.create_sql_copy = create_sql_copy
 
+    # CREATE [OR ALTER] VIEW [schema.]nome: pattern compilati una volta e provati in ordine,
+    # ciascuno con i gruppi di schema (None se assente) e nome
+    _DDL_CREATE_VIEW = r"\bcreate\s+(?:or\s+alter\s+)?view\s+"
+    VIEW_NAME_PATTERNS = [
+        # [schema].[name]
+        (re.compile(_DDL_CREATE_VIEW + r"\[([^\]]+)\]\s*\.\s*\[([^\]]+)\]", re.IGNORECASE | re.DOTALL), 1, 2),
+        # [name]
+        (re.compile(_DDL_CREATE_VIEW + r"\[([^\]]+)\]", re.IGNORECASE | re.DOTALL), None, 1),
+        # schema.name
+        (re.compile(_DDL_CREATE_VIEW + r"([a-zA-Z0-9_]+)\s*\.\s*([a-zA-Z0-9_]+)\b", re.IGNORECASE), 1, 2),
+        # name
+        (re.compile(_DDL_CREATE_VIEW + r"([a-zA-Z0-9_]+)\b", re.IGNORECASE), None, 1),
+    ]
+
     @staticmethod
     def _norm_header(h: Optional[str]) -> str:
         return (str(h).strip().lower() if h is not None else "")
 
+    @staticmethod
+    def _extract_view_from_ddl(ddl: str) -> Dict[str, Optional[str]]:
+        if not ddl:
+            return {"schema": None, "name": None}
+        text = str(ddl)
+        for pattern, schema_group, name_group in ViewsDDLAppender.VIEW_NAME_PATTERNS:
+            m = pattern.search(text)
+            if m:
+                return {"schema": m.group(schema_group) if schema_group else None, "name": m.group(name_group)}
+        return {"schema": None, "name": None}
+
     def _read_rows(self) -> List[Dict[str, str]]:
         wb = load_workbook(self.excel_path, read_only=True, data_only=True)
         try:
@@ -87,33 +113,6 @@ class ViewsDDLAppender:
 
             data_rows = rows[1:]  # salta intestazione
             out: List[Dict[str, str]] = []
-            def extract_view_from_ddl(ddl: str) -> Dict[str, Optional[str]]:
-                if not ddl:
-                    return {"schema": None, "name": None}
-                text = str(ddl)
-                # normalize whitespace
-                # Try bracketed schema and name: CREATE [OR ALTER] VIEW [schema].[name]
-                m = re.search(r"\bcreate\s+(?:or\s+alter\s+)?view\s+\[([^\]]+)\]\s*\.\s*\[([^\]]+)\]",
-                              text, flags=re.IGNORECASE | re.DOTALL)
-                if m:
-                    return {"schema": m.group(1), "name": m.group(2)}
-                # Try bracketed name only: CREATE VIEW [name]
-                m = re.search(r"\bcreate\s+(?:or\s+alter\s+)?view\s+\[([^\]]+)\]",
-                              text, flags=re.IGNORECASE | re.DOTALL)
-                if m:
-                    return {"schema": None, "name": m.group(1)}
-                # Try unbracketed schema.name: CREATE VIEW schema.name
-                m = re.search(r"\bcreate\s+(?:or\s+alter\s+)?view\s+([a-zA-Z0-9_]+)\s*\.\s*([a-zA-Z0-9_]+)\b",
-                              text, flags=re.IGNORECASE)
-                if m:
-                    return {"schema": m.group(1), "name": m.group(2)}
-                # Try unbracketed name only
-                m = re.search(r"\bcreate\s+(?:or\s+alter\s+)?view\s+([a-zA-Z0-9_]+)\b",
-                              text, flags=re.IGNORECASE)
-                if m:
-                    return {"schema": None, "name": m.group(1)}
-                return {"schema": None, "name": None}
-
             for r in data_rows:
                 if not r:
                     continue
@@ -130,7 +129,7 @@ class ViewsDDLAppender:
                 ddl = get("ddl")
                 # Fallback: se 'table' (nome vista) manca, prova a estrarlo dalla DDL
                 if (not table) and ddl:
-                    parsed = extract_view_from_ddl(ddl)
+                    parsed = self._extract_view_from_ddl(ddl)
                     if parsed["name"]:
                         table = parsed["name"]
                     if (not schema) and parsed["schema"]:
@@ -173,8 +172,7 @@ class ViewsDDLAppender:
         if self.create_sql_copy:
             sql_copy = os.path.splitext(self.output_txt)[0] + ".sql"
             try:
-                with open(self.output_txt, "rb") as src, open(sql_copy, "wb") as dst:
-                    dst.write(src.read())
+                shutil.copyfile(self.output_txt, sql_copy)
             except Exception:
                 pass
 
@@ -15,6 +15,11 @@ try:
 except ImportError:
     openpyxl = None
 
+try:
+    import re2  # google-re2: linear-time (DFA) matching, optional
+except ImportError:
+    re2 = None
+
 # User-configurable default input path
 INPUT_SQL = r"c:/Users/giuseppe.tanda/Desktop/doValue/OneDrive_1_12-30-2025/Append SQL script.sql"
 
@@ -64,12 +69,17 @@ def _extract_cte_names(text: str) -> set:
             names.add(_strip_delimiters(n.group('name')))
     return {n.lower() for n in names}
 
+# EXEC scan runs on comment-free text; re2, if installed, strips in linear time
+_COMMENT_ENGINE = re2 if re2 is not None else re
+_BLOCK_COMMENT = _COMMENT_ENGINE.compile(r"/\*[\s\S]*?\*/")
+_LINE_COMMENT = _COMMENT_ENGINE.compile(r"(?m)--.*$")
+
 def _strip_sql_comments(text: str) -> str:
     """Remove T-SQL style comments: line comments (--) and block comments (/* ... */)"""
     # Remove block comments
-    text = re.sub(r"/\*[\s\S]*?\*/", " ", text)
+    text = _BLOCK_COMMENT.sub(" ", text)
     # Remove line comments
-    text = re.sub(r"(?m)--.*$", "", text)
+    text = _LINE_COMMENT.sub("", text)
     return text
 
 def _extract_sp_ddl(text: str, match_start: int, match_end: int) -> str:
@@ -138,7 +148,8 @@ def extract_sp_matches(text: str, original_text: str = None) -> List[Dict[str, s
     if original_text is None:
         original_text = text
     
-    collected: List[Dict[str, str]] = []
+    # (position, clause, stored procedure, DDL) tuples: no intermediate dict per reference
+    collected: List[Tuple[int, str, str, object]] = []
     cte_names = _extract_cte_names(text)
     
     for clause, pattern in CLAUSE_PATTERNS:
@@ -149,7 +160,7 @@ def extract_sp_matches(text: str, original_text: str = None) -> List[Dict[str, s
             # Special handling for sp_executesql (no sp name to extract)
             if clause == "sp_executesql":
                 pos = m.start()
-                collected.append({'Clause': c, 'StoredProcedure': 'sp_executesql', 'DDL': None, '_pos': pos})
+                collected.append((pos, c, 'sp_executesql', None))
                 continue
             
             sp = m.group('sp').strip()
@@ -197,13 +208,13 @@ def extract_sp_matches(text: str, original_text: str = None) -> List[Dict[str, s
             except Exception:
                 pos = m.start()
             
-            collected.append({'Clause': c, 'StoredProcedure': sp, 'DDL': ddl, '_pos': pos})
+            collected.append((pos, c, sp, ddl))
     
     # Sort by position to preserve encounter order
-    collected.sort(key=lambda x: x['_pos'])
+    collected.sort(key=lambda x: x[0])
     
     # Drop position before returning
-    return [{'Clause': x['Clause'], 'StoredProcedure': x['StoredProcedure'], 'DDL': x['DDL']} for x in collected]
+    return [{'Clause': c, 'StoredProcedure': sp, 'DDL': ddl} for _pos, c, sp, ddl in collected]
 
 
 def parse_blocks(content: str, input_path: str, verbose: bool = True) -> List[Dict[str, str]]:
@@ -8,6 +8,7 @@ import os
 import re
 import csv
 import datetime
+from functools import lru_cache
 from typing import List, Dict, Tuple
 
 try:
@@ -15,6 +16,11 @@ try:
 except ImportError:  # Fallback if not installed
     openpyxl = None
 
+try:
+    import re2  # google-re2: linear-time (DFA) matching, optional
+except ImportError:
+    re2 = None
+
 # User-configurable default input path. If you don't pass the positional
 # argument, the script will use this path.
 # Update this value to your .sql file path.
@@ -41,6 +47,9 @@ EMPTY_SCHEMA_4 = re.compile(rf'^(?P<server>{IDENTIFIER})\s*\.\s*(?P<db>{IDENTIFI
 CTE_FIRST_PATTERN = re.compile(rf"\bWITH\s+(?P<name>{IDENTIFIER})\s*(?:\([^)]*\))?\s+AS\b", re.IGNORECASE|re.DOTALL)
 CTE_NEXT_PATTERN = re.compile(rf",\s*(?P<name>{IDENTIFIER})\s*(?:\([^)]*\))?\s+AS\b", re.IGNORECASE|re.DOTALL)
 
+# The same identifiers recur thousands of times in large scripts: the pure
+# normalization helpers below are memoized on the raw token.
+@lru_cache(maxsize=32768)
 def _strip_delimiters(s: str) -> str:
     s = s.strip()
     if s.startswith('[') and s.endswith(']'):
@@ -51,12 +60,24 @@ def _strip_delimiters(s: str) -> str:
         s = s[1:-1]
     return s
 
+@lru_cache(maxsize=32768)
 def _last_segment(qualified: str) -> str:
     parts = [p.strip() for p in qualified.split('.')]
     if not parts:
         return _strip_delimiters(qualified)
     return _strip_delimiters(parts[-1])
 
+@lru_cache(maxsize=32768)
+def _normalize_empty_schema(qualified: str) -> str:
+    # Normalize missing schema: db..table or server.db..table
+    em4 = EMPTY_SCHEMA_4.match(qualified)
+    if em4:
+        return f"{em4.group('server')}.{em4.group('db')}.dbo.{em4.group('table')}"
+    em3 = EMPTY_SCHEMA_3.match(qualified)
+    if em3:
+        return f"{em3.group('db')}.dbo.{em3.group('table')}"
+    return qualified
+
 def _is_temp_table(qualified: str) -> bool:
     last = _last_segment(qualified)
     # Treat temporary tables (#, ##) and table variables (@) as non-persistent
@@ -82,14 +103,8 @@ ALIAS_PATTERN = re.compile(
 def _extract_alias_map(text: str) -> Dict[str, str]:
     alias_map: Dict[str, str] = {}
     for m in ALIAS_PATTERN.finditer(text):
-        base = m.group('table').strip()
         # Normalize missing schema
-        em3 = EMPTY_SCHEMA_3.match(base)
-        em4 = EMPTY_SCHEMA_4.match(base)
-        if em4:
-            base = f"{em4.group('server')}.{em4.group('db')}.dbo.{em4.group('table')}"
-        elif em3:
-            base = f"{em3.group('db')}.dbo.{em3.group('table')}"
+        base = _normalize_empty_schema(m.group('table').strip())
         alias = _strip_delimiters(m.group('alias')).lower()
         # Ignore temp/variable aliases (rare) and CTE aliases
         if alias.startswith('#') or alias.startswith('@'):
@@ -97,15 +112,20 @@ def _extract_alias_map(text: str) -> Dict[str, str]:
         alias_map[alias] = base
     return alias_map
 
+# FROM/JOIN matching runs on comment-free text; re2, if installed, strips in linear time
+_COMMENT_ENGINE = re2 if re2 is not None else re
+_BLOCK_COMMENT = _COMMENT_ENGINE.compile(r"/\*[\s\S]*?\*/")
+_LINE_COMMENT = _COMMENT_ENGINE.compile(r"(?m)--.*$")
+
 def _strip_sql_comments(text: str) -> str:
     """Remove T-SQL style comments: line comments (--) and block comments (/* ... */).
     Keeps content otherwise unchanged. This is a best-effort stripper and does not
     handle comment markers inside quoted strings.
     """
     # Remove block comments
-    text = re.sub(r"/\*[\s\S]*?\*/", " ", text)
+    text = _BLOCK_COMMENT.sub(" ", text)
     # Remove line comments (from -- to end of line)
-    text = re.sub(r"(?m)--.*$", "", text)
+    text = _LINE_COMMENT.sub("", text)
     return text
 
 CLAUSE_PATTERNS: List[Tuple[str, re.Pattern]] = [
@@ -134,7 +154,8 @@ CURSOR_FETCH_BEFORE = re.compile(r"\bFETCH\s+(?:NEXT|PRIOR|FIRST|LAST)?\s*$", re
 def extract_matches(text: str) -> List[Dict[str, str]]:
     # Collect all matches with the position of the TABLE token,
     # then sort by that position to reflect exact encounter order.
-    collected: List[Dict[str, str]] = []
+    # (position, clause, table) tuples: no intermediate dict per reference
+    collected: List[Tuple[int, str, str]] = []
     cte_names = _extract_cte_names(text)
     alias_map = _extract_alias_map(text)
     for clause, pattern in CLAUSE_PATTERNS:
@@ -173,12 +194,7 @@ def extract_matches(text: str) -> List[Dict[str, str]]:
                 # (prefer correctness over completeness)
                 continue
             # Normalize missing schema: db..table or server.db..table
-            em3 = EMPTY_SCHEMA_3.match(t)
-            em4 = EMPTY_SCHEMA_4.match(t)
-            if em4:
-                t = f"{em4.group('server')}.{em4.group('db')}.dbo.{em4.group('table')}"
-            elif em3:
-                t = f"{em3.group('db')}.dbo.{em3.group('table')}"
+            t = _normalize_empty_schema(t)
             # Skip temp tables (#, ##) and CTEs
             if _is_temp_table(t):
                 continue
@@ -192,10 +208,11 @@ def extract_matches(text: str) -> List[Dict[str, str]]:
                 pos = m.start('table')
             except Exception:
                 pos = m.start()
-            collected.append({'Clause': c, 'Table': t, '_pos': pos})
-    collected.sort(key=lambda x: x['_pos'])
+            collected.append((pos, c, t))
+    # Sort on position only: ties keep insertion order
+    collected.sort(key=lambda x: x[0])
     # Drop position before returning
-    return [{'Clause': x['Clause'], 'Table': x['Table']} for x in collected]
+    return [{'Clause': c, 'Table': t} for _pos, c, t in collected]
 
 
 def parse_blocks(content: str, input_path: str, verbose: bool = True) -> List[Dict[str, str]]:
@@ -25,6 +25,14 @@ try:
 except Exception:
     pd = None  # type: ignore
 
+try:
+    import python_calamine  # noqa: F401  lettore xlsx in Rust, opzionale
+except Exception:
+    python_calamine = None  # type: ignore
+
+# Motore per pd.read_excel: calamine se installato (molto più veloce), altrimenti il default (openpyxl)
+EXCEL_READ_ENGINE: Optional[str] = "calamine" if python_calamine is not None else None
+
 # ---------------- Config ----------------
 INPUT_EXCEL_PATH: Optional[str] = None  # es: r"C:\\path\\nomi_tabelle.xlsx"
 OUTPUT_EXCEL_PATH: Optional[str] = None  # es: r"C:\\path\\risultati.xlsx"
@@ -68,24 +76,20 @@ class ServerObjectFinder:
 
     def _read_targets(self) -> List[Tuple[Optional[str], str]]:
         """Ritorna lista di (schema_optional, table_name)."""
-        df = pd.read_excel(self.input_excel)
+        df = pd.read_excel(self.input_excel, engine=EXCEL_READ_ENGINE)
         if df.empty:
             return []
         df.columns = [str(c).strip().lower() for c in df.columns]
         if "table" not in df.columns:
             raise RuntimeError("L'Excel deve contenere la sola colonna 'table'.")
-        targets: List[Tuple[Optional[str], str]] = []
-        for _, row in df.iterrows():
-            raw_table = str(row["table"]).strip() if pd.notna(row["table"]) else ""
-            if not raw_table:
-                continue
-            schema: Optional[str] = None
-            name = raw_table
-            if "." in raw_table:
-                parts = raw_table.split(".", 1)
-                schema = parts[0].strip()
-                name = parts[1].strip()
-            targets.append((schema, name))
+        # Operazioni per colonna invece di iterrows (che crea una Series per riga)
+        raw = df["table"][df["table"].notna()].astype(str).str.strip()
+        raw = raw[raw != ""]
+        parts = raw.str.split(".", n=1)
+        has_schema = raw.str.contains(".", regex=False)
+        schemas = parts.str[0].str.strip().where(has_schema, None)
+        names = parts.str[-1].str.strip()
+        targets: List[Tuple[Optional[str], str]] = list(zip(schemas, names))
         return targets
 
     def _build_conn_str(self, database: Optional[str]) -> str:
@@ -156,31 +160,20 @@ class ServerObjectFinder:
         conn = pyodbc.connect(self._build_conn_str(db), timeout=QUERY_TIMEOUT)
         try:
             cur = conn.cursor()
-            parts: List[str] = [
-                """
-                SELECT s.name AS schema_name, t.name AS object_name, 'USER_TABLE' AS object_type
-                FROM sys.tables AS t
-                JOIN sys.schemas AS s ON s.schema_id = t.schema_id
-                """
-            ]
+            # Una sola scansione di sys.objects con i codici tipo come parametri:
+            # stesso testo di query per ogni DB, piano riusato
+            type_codes: List[str] = ['U']
             if INCLUDE_VIEWS:
-                parts.append(
-                    """
-                    SELECT s.name AS schema_name, v.name AS object_name, 'VIEW' AS object_type
-                    FROM sys.views AS v
-                    JOIN sys.schemas AS s ON s.schema_id = v.schema_id
-                    """
-                )
+                type_codes.append('V')
             if INCLUDE_SYNONYMS:
-                parts.append(
-                    """
-                    SELECT s.name AS schema_name, sy.name AS object_name, 'SYNONYM' AS object_type
-                    FROM sys.synonyms AS sy
-                    JOIN sys.schemas AS s ON s.schema_id = sy.schema_id
-                    """
-                )
-            sql = "\nUNION ALL\n".join(parts)
-            cur.execute(sql)
+                type_codes.append('SN')
+            sql = f"""
+                SELECT s.name AS schema_name, o.name AS object_name, o.type_desc AS object_type
+                FROM sys.objects AS o
+                JOIN sys.schemas AS s ON s.schema_id = o.schema_id
+                WHERE o.type IN ({", ".join("?" for _ in type_codes)})
+                """
+            cur.execute(sql, type_codes)
             return {(str(r[0]), str(r[1]), str(r[2])) for r in cur.fetchall()}
         finally:
             try:
@@ -205,16 +198,28 @@ class ServerObjectFinder:
         results: List[List[str]] = []
         found_flags: List[bool] = [False] * len(targets)
 
+        # Target normalizzati una volta sola, non a ogni DB
+        norm_targets = [
+            (schema_opt.lower() if schema_opt is not None else None, tname.lower())
+            for schema_opt, tname in targets
+        ]
+
         # Cerca solo sui DB accessibili
         for db in accessible_dbs:
             existing = self._fetch_objects_in_db(db)
+            # Indici per nome e per (schema, nome) in minuscolo: nessun confronto per candidato
             by_table: Dict[str, List[Tuple[str, str, str]]] = {}
+            by_schema_table: Dict[Tuple[str, str], List[Tuple[str, str, str]]] = {}
             for sch, nm, typ in existing:
-                by_table.setdefault(nm.lower(), []).append((sch, nm, typ))
+                nm_lower = nm.lower()
+                by_table.setdefault(nm_lower, []).append((sch, nm, typ))
+                by_schema_table.setdefault((sch.lower(), nm_lower), []).append((sch, nm, typ))
 
-            for idx, (schema_opt, tname) in enumerate(targets):
-                candidates = by_table.get(tname.lower(), [])
-                matches = [(s, n, t) for (s, n, t) in candidates if (schema_opt is None or s.lower() == schema_opt.lower())]
+            for idx, (schema_lower, tname_lower) in enumerate(norm_targets):
+                if schema_lower is None:
+                    matches = by_table.get(tname_lower, [])
+                else:
+                    matches = by_schema_table.get((schema_lower, tname_lower), [])
                 for (s, n, t) in matches:
                     results.append([self.server, db, s, n, t, ""])  # nessun errore
                     found_flags[idx] = True
@@ -4,6 +4,8 @@
 # -----------------------------------------------------------------------------
 
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Tuple, Dict, Any
 
 try:
@@ -17,9 +19,9 @@ except Exception:
     load_workbook = None  # type: ignore
 
 try:
-    import pandas as pd
+    from python_calamine import CalamineWorkbook  # lettore xlsx in Rust, opzionale
 except Exception:
-    pd = None  # type: ignore
+    CalamineWorkbook = None  # type: ignore
 
 # -----------------------------------------------------------------------------
 # Config: imposta i percorsi di input e output (Excel)
@@ -45,8 +47,63 @@ SQL_USERNAME: Optional[str] = None
 SQL_PASSWORD: Optional[str] = None
 CONNECTION_TEST_TIMEOUT: int = 3
 QUERY_TIMEOUT: int = 60
+# Oggetti per query nella lettura in blocco di tipo/definizione (2 parametri ciascuno, limite 2100)
+BATCH_OBJECTS: int = 1000
+# Righe lette per volta (fetchmany) dalla query di tipi e definizioni
+FETCH_BATCH_SIZE: int = 500
+# Database interrogati in parallelo, ognuno con la propria connessione
+MAX_DB_WORKERS: int = 8
 # Regola se il server richiede Encrypt
 ODBC_ENCRYPT_OPTS: str = "Encrypt=no;TrustServerCertificate=yes;"
+# Codici/descrizioni di sys.objects per cui si esporta la definizione invece del DDL ricostruito
+_VIEW_TYPES = frozenset(sys.intern(t) for t in ("V", "VIEW"))
+
+
+def _object_type(value: Any) -> str:
+    # type/type_desc normalizzati una sola volta alla lettura da sys.objects (char(2) ha spazi in coda)
+    return sys.intern(str(value).strip().upper()) if value is not None else ""
+
+
+def _is_view(code: str, desc: str, label: str) -> bool:
+    return code in _VIEW_TYPES or desc in _VIEW_TYPES or label.lower().startswith("vista")
+
+
+def _fetch_in_batches(cur):
+    """Itera le righe del cursore FETCH_BATCH_SIZE alla volta: le definizioni delle viste
+    non vengono materializzate tutte insieme come con fetchall."""
+    while True:
+        rows = cur.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+def _calamine_value(v: Any) -> Any:
+    # calamine restituisce "" per le celle vuote e float per ogni numero: si riporta tutto ai valori di openpyxl
+    if v == "":
+        return None
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _read_first_sheet_rows(path: str) -> List[Tuple[Any, ...]]:
+    """Righe del primo foglio come tuple di valori (None per le celle vuote).
+
+    Con python-calamine il file viene letto in Rust senza costruire celle openpyxl;
+    senza calamine, o se la lettura fallisce, si usa openpyxl in read_only.
+    """
+    if CalamineWorkbook is not None:
+        try:
+            sheet = CalamineWorkbook.from_path(path).get_sheet_by_index(0)
+            return [tuple(_calamine_value(v) for v in r) for r in sheet.to_python(skip_empty_area=False)]
+        except Exception as e:
+            print(f"[DDL] Lettura con calamine non riuscita ({e}), uso openpyxl")
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return list(wb.worksheets[0].iter_rows(min_row=1, values_only=True))
+    finally:
+        wb.close()
 
 
 class TableDefinitionExtractor:
@@ -57,8 +114,6 @@ class TableDefinitionExtractor:
     def __init__(self, input_excel: str, output_excel: str):
         if load_workbook is None:
             raise RuntimeError("openpyxl non installato. Installa 'pip install openpyxl'.")
-        if pd is None:
-            raise RuntimeError("pandas non installato. Installa 'pip install pandas openpyxl'.")
         if pyodbc is None:
             raise RuntimeError("pyodbc non installato. Installa 'pip install pyodbc'.")
         if not input_excel:
@@ -68,39 +123,34 @@ class TableDefinitionExtractor:
 
     # ---------------- Excel parsing ----------------
     def _read_items(self) -> List[Tuple[str, str, str, str]]:
-        wb = load_workbook(self.input_excel, read_only=True, data_only=True)
-        try:
-            ws = wb.worksheets[0]
-            rows = list(ws.iter_rows(min_row=1, values_only=True))
-            if not rows:
-                return []
-
-            headers = [str(x).strip().lower() if x is not None else "" for x in rows[0]]
-            # Serve almeno: server, db|database, schema, table
-            required = {"server", "schema", "table"}
-            has_db = ("db" in headers) or ("database" in headers)
-            if not (required.issubset(set(headers)) and has_db):
-                raise RuntimeError("Il foglio deve contenere le colonne: Server, DB (o Database), Schema, Table.")
-
-            idx_server = headers.index("server")
-            idx_db = headers.index("db") if "db" in headers else headers.index("database")
-            idx_schema = headers.index("schema")
-            idx_table = headers.index("table")
-
-            items: List[Tuple[str, str, str, str]] = []
-            for r in rows[1:]:
-                if r is None:
-                    continue
-                server = str(r[idx_server]).strip() if r[idx_server] else DEFAULT_SERVER
-                db = str(r[idx_db]).strip() if r[idx_db] else DEFAULT_DB
-                schema = str(r[idx_schema]).strip() if r[idx_schema] else "dbo"
-                table = str(r[idx_table]).strip() if r[idx_table] else ""
-                if not table:
-                    continue
-                items.append((server, db, schema, table))
-            return items
-        finally:
-            wb.close()
+        rows = _read_first_sheet_rows(self.input_excel)
+        if not rows:
+            return []
+
+        headers = [str(x).strip().lower() if x is not None else "" for x in rows[0]]
+        # Serve almeno: server, db|database, schema, table
+        required = {"server", "schema", "table"}
+        has_db = ("db" in headers) or ("database" in headers)
+        if not (required.issubset(set(headers)) and has_db):
+            raise RuntimeError("Il foglio deve contenere le colonne: Server, DB (o Database), Schema, Table.")
+
+        idx_server = headers.index("server")
+        idx_db = headers.index("db") if "db" in headers else headers.index("database")
+        idx_schema = headers.index("schema")
+        idx_table = headers.index("table")
+
+        items: List[Tuple[str, str, str, str]] = []
+        for r in rows[1:]:
+            if r is None:
+                continue
+            server = str(r[idx_server]).strip() if r[idx_server] else DEFAULT_SERVER
+            db = str(r[idx_db]).strip() if r[idx_db] else DEFAULT_DB
+            schema = str(r[idx_schema]).strip() if r[idx_schema] else "dbo"
+            table = str(r[idx_table]).strip() if r[idx_table] else ""
+            if not table:
+                continue
+            items.append((server, db, schema, table))
+        return items
 
     # ---------------- Connection handling ----------------
     def _candidate_drivers(self) -> List[str]:
@@ -305,13 +355,55 @@ END
             r = cur.fetchone()
             if not r:
                 return ("", "NOT_FOUND", "Non trovato")
-            code = str(r[0]) if r[0] is not None else ""
-            desc = str(r[1]) if r[1] is not None else ""
+            code = _object_type(r[0])
+            desc = _object_type(r[1])
             label = desc or code or "Sconosciuto"
             return (code, desc, label)
         except Exception:
             return ("", "ERROR", "Sconosciuto")
 
+    def _get_objects_info(self, conn, targets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[str, str, str, Optional[str]]]:
+        """Tipo e definizione di più oggetti dello stesso DB.
+
+        Una query ogni BATCH_OBJECTS oggetti invece di _get_object_type_info +
+        _fetch_view_definition per ogni riga. Ritorna (schema, name) -> (code, type_desc,
+        label, definition); in caso di errore ritorna {} e run() ripiega sulle query per oggetto.
+        """
+        targets = list(dict.fromkeys(targets))
+        info: Dict[Tuple[str, str], Tuple[str, str, str, Optional[str]]] = {}
+        cur = conn.cursor()
+        try:
+            for start in range(0, len(targets), BATCH_OBJECTS):
+                chunk = targets[start:start + BATCH_OBJECTS]
+                values = ", ".join("(?, ?)" for _ in chunk)
+                sql = (
+                    f"""
+                    SELECT t.schema_name, t.object_name, o.type, o.type_desc,
+                           CASE WHEN o.type = 'V' THEN OBJECT_DEFINITION(o.object_id) END AS definition
+                    FROM (VALUES {values}) AS t(schema_name, object_name)
+                    LEFT JOIN sys.objects o
+                      ON o.object_id = OBJECT_ID(QUOTENAME(t.schema_name) + N'.' + QUOTENAME(t.object_name))
+                    """
+                )
+                cur.execute(sql, [value for pair in chunk for value in pair])
+                for r in _fetch_in_batches(cur):
+                    key = (str(r[0]), str(r[1]))
+                    if r[2] is None and r[3] is None:
+                        info[key] = ("", "NOT_FOUND", "Non trovato", None)
+                        continue
+                    code = _object_type(r[2])
+                    desc = _object_type(r[3])
+                    info[key] = (code, desc, desc or code or "Sconosciuto", str(r[4]) if r[4] else None)
+        except Exception as e:
+            print(f"[DDL] Lettura tipi/definizioni in blocco non riuscita ({e}), uso le query per oggetto")
+            return {}
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                pass
+        return info
+
     def _fetch_view_definition(self, conn, schema: str, view: str) -> str:
         """Ritorna la definizione testuale della vista così come salvata nel DB.
         Usa sys.sql_modules/OBJECT_DEFINITION. Se la definizione non è disponibile
@@ -340,6 +432,44 @@ END
             return f"ERROR: lettura definizione vista fallita: {e}"
 
     # ---------------- Main ----------------
+    def _process_db(self, server: str, db: str, targets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[str, str]]:
+        """Tipo e DDL degli oggetti di un DB: (schema, table) -> (obj_type, ddl).
+
+        Apre una connessione dedicata, così più DB possono essere elaborati in parallelo.
+        """
+        print(f"[DDL] Elaborazione {server}.{db}: {len(targets)} oggetti")
+        out: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        try:
+            conn_str = self._build_conn_str(server, db)
+            conn = pyodbc.connect(conn_str, timeout=QUERY_TIMEOUT)
+        except Exception as e:
+            # Connessione non riuscita per questo server/db: si registra errore per i suoi oggetti
+            for target in targets:
+                out[target] = ("ERROR", f"Connessione fallita: {e}")
+            return out
+        try:
+            infos = self._get_objects_info(conn, targets)
+            for schema, table in targets:
+                if (schema, table) in out:
+                    continue
+                info = infos.get((schema, table))
+                if info is not None:
+                    code, desc, obj_type, definition = info
+                else:
+                    code, desc, obj_type = self._get_object_type_info(conn, schema, table)
+                    definition = None
+                if _is_view(code, desc, obj_type):
+                    ddl = definition or self._fetch_view_definition(conn, schema, table)
+                else:
+                    ddl = self._fetch_table_ddl(conn, schema, table)
+                out[(schema, table)] = (obj_type, ddl)
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return out
+
     def run(self) -> str:
         items = self._read_items()
         if not items:
@@ -347,49 +477,59 @@ END
 
         total = len(items)
         print(f"[DDL] Totale tabelle da elaborare: {total}")
-        results: List[List[str]] = []
-        conns: Dict[Tuple[str, str], Any] = {}
-        try:
-            for idx, (server, db, schema, table) in enumerate(items, start=1):
-                print(f"[DDL] Elaborazione {idx}/{total}: {server}.{db}.{schema}.{table}")
-                key = (server, db)
-                if key not in conns:
-                    try:
-                        conn_str = self._build_conn_str(server, db)
-                        conns[key] = pyodbc.connect(conn_str, timeout=QUERY_TIMEOUT)
-                    except Exception as e:
-                        # Connessione non riuscita per questo server/db: si registra errore e si continua
-                        results.append([server, db, schema, table, "ERROR", f"Connessione fallita: {e}"])
-                        continue
-                code, desc, obj_type = self._get_object_type_info(conns[key], schema, table)
-                if code.upper() == "V" or desc.upper().startswith("VIEW") or obj_type.lower().startswith("vista"):
-                    ddl = self._fetch_view_definition(conns[key], schema, table)
-                else:
-                    ddl = self._fetch_table_ddl(conns[key], schema, table)
-                results.append([server, db, schema, table, obj_type, ddl])
-        finally:
-            for c in conns.values():
+        # Oggetti raggruppati per server/db: tipo e definizione si leggono in blocco per DB
+        per_db: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for server, db, schema, table in items:
+            per_db.setdefault((server, db), []).append((schema, table))
+
+        # Un _process_db per worker; un DB in errore non blocca gli altri
+        workers = max(1, min(MAX_DB_WORKERS, len(per_db)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                key: executor.submit(self._process_db, key[0], key[1], targets)
+                for key, targets in per_db.items()
+            }
+            found: Dict[Tuple[str, str], Any] = {}
+            for key, future in futures.items():
                 try:
-                    c.close()
-                except Exception:
-                    pass
+                    found[key] = future.result()
+                except Exception as e:
+                    found[key] = e
+
+        # Output nell'ordine dell'Excel di input: le righe vengono generate mentre il file
+        # viene scritto, senza lista completa né DataFrame con tutte le DDL in memoria
+        headers = ["Server", "DB", "Schema", "Table", "ObjectType", "DDL"]
+
+        def _rows():
+            for server, db, schema, table in items:
+                res = found[(server, db)]
+                if isinstance(res, Exception):
+                    yield [server, db, schema, table, "ERROR", f"Elaborazione fallita: {res}"]
+                else:
+                    obj_type, ddl = res[(schema, table)]
+                    yield [server, db, schema, table, obj_type, ddl]
 
         # Write output
         out_dir = os.path.dirname(self.output_excel)
         if out_dir and not os.path.exists(out_dir):
             os.makedirs(out_dir, exist_ok=True)
-        df = pd.DataFrame(results, columns=["Server", "DB", "Schema", "Table", "ObjectType", "DDL"])
 
         try:
-            from Report.Excel_Writer import write_dataframe_split_across_files
+            from Report.Excel_Writer import write_rows_split_across_files
         except Exception:
-            write_dataframe_split_across_files = None  # type: ignore
+            write_rows_split_across_files = None  # type: ignore
 
-        if write_dataframe_split_across_files is not None:
-            write_dataframe_split_across_files(df, self.output_excel, sheet_name="DDL")
+        if write_rows_split_across_files is not None:
+            write_rows_split_across_files(headers, _rows(), self.output_excel, sheet_name="DDL")
         else:
-            with pd.ExcelWriter(self.output_excel, engine="openpyxl", mode="w") as w:
-                df.to_excel(w, index=False, sheet_name="DDL")
+            from openpyxl import Workbook
+
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("DDL")
+            ws.append(headers)
+            for row in _rows():
+                ws.append(row)
+            wb.save(self.output_excel)
         return self.output_excel
 
 
@@ -3,7 +3,9 @@
 # database e se non esistono da un messaggio sul fatto che non sono state trovate
 # -----------------------------------------------------------------------------
 import os
-from typing import Dict, List, Optional, Set, Tuple
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 try:
     import pyodbc
@@ -15,6 +17,14 @@ try:
 except Exception:
     pd = None  # type: ignore
 
+try:
+    import python_calamine  # noqa: F401  lettore xlsx in Rust, opzionale
+except Exception:
+    python_calamine = None  # type: ignore
+
+# Motore per pd.read_excel: calamine se installato (molto più veloce), altrimenti il default (openpyxl)
+EXCEL_READ_ENGINE: Optional[str] = "calamine" if python_calamine is not None else None
+
 # -----------------------------------------------------------------------------
 # Configurazione: inserisci qui i percorsi degli Excel e i parametri di connessione
 # -----------------------------------------------------------------------------
@@ -48,6 +58,8 @@ INCLUDE_SYNONYMS: bool = True
 INCLUDE_PROCS: bool = True
 INCLUDE_FUNCTIONS: bool = True  # include FN, IF, TF
 INCLUDE_TRIGGERS: bool = True
+# DB analizzati in parallelo, ognuno con la propria connessione
+MAX_DB_WORKERS: int = 8
 
 
 class TableExistenceChecker:
@@ -73,6 +85,14 @@ class TableExistenceChecker:
         self.input_excel = input_excel
         self.output_excel = output_excel or os.path.join(os.getcwd(), "TabelleEsistenti.xlsx")
         self.server = server or DEFAULT_SERVER
+        # Esito del test di connessione per DB (None = server): stringa valida o errore,
+        # così ogni DB viene provato una volta sola anche se richiesto per molti oggetti
+        self._conn_strs: Dict[Optional[str], str] = {}
+        self._conn_errors: Dict[Optional[str], RuntimeError] = {}
+        # Connessione e cursore per DB, condivisi dalla lettura del catalogo e dei DDL
+        # dello stesso DB invece di aprire una connessione per ogni oggetto
+        self._db_conns: Dict[str, Any] = {}
+        self._db_cursors: Dict[str, Any] = {}
 
     # ------------------------------ Utilità Excel ------------------------------
     def _read_targets(self) -> List[Tuple[Optional[str], Optional[str], str]]:
@@ -82,7 +102,7 @@ class TableExistenceChecker:
         - table è obbligatoria
         """
         print(f"[CHECK] Lettura input da: {self.input_excel}")
-        df = pd.read_excel(self.input_excel)
+        df = pd.read_excel(self.input_excel, engine=EXCEL_READ_ENGINE)
         if df.empty:
             return []
         df.columns = [str(c).strip().lower() for c in df.columns]
@@ -92,33 +112,56 @@ class TableExistenceChecker:
         schema_col = "schema" if "schema" in df.columns else None
         table_col = "table" if "table" in df.columns else None
 
-        targets: List[Tuple[Optional[str], Optional[str], str]] = []
-        for _, row in df.iterrows():
-            db = str(row[db_col]).strip() if db_col and pd.notna(row[db_col]) else None
-            schema = str(row[schema_col]).strip() if schema_col and pd.notna(row[schema_col]) else None
-            if table_col and pd.notna(row.get(table_col)):
-                raw_table = str(row[table_col]).strip()
-            else:
-                # fallback: cerca prima colonna significativa
-                non_na = [str(v).strip() for v in row.values if pd.notna(v)]
-                raw_table = non_na[0] if non_na else ""
-            if not raw_table:
-                continue
-
-            # Permetti formato "schema.table" nella colonna table
-            if not schema and "." in raw_table:
-                parts = raw_table.split(".", 1)
-                schema = parts[0].strip()
-                table = parts[1].strip()
-            else:
-                table = raw_table
-
-            targets.append((db or None, schema or None, table))
+        def _clean(col: Optional[str]):
+            """Valori della colonna come stringhe senza spazi, None dove mancanti."""
+            if not col:
+                return pd.Series(None, index=df.index, dtype=object)
+            values = df[col]
+            return values.astype(str).str.strip().astype(object).where(values.notna(), None)
+
+        # Operazioni per colonna invece di iterrows (che crea una Series per riga)
+        dbs = _clean(db_col)
+        schemas = _clean(schema_col)
+        tables = _clean(table_col)
+        # fallback: cerca prima colonna significativa della riga
+        first_values = df.astype(object).bfill(axis=1).iloc[:, 0]
+        fallback = first_values.astype(str).str.strip().astype(object).where(first_values.notna(), None)
+        tables = tables.where(tables.notna(), fallback)
+
+        valid = tables.notna() & (tables != "")
+        dbs, schemas, tables = dbs[valid], schemas[valid], tables[valid]
+
+        # Permetti formato "schema.table" nella colonna table
+        split = (schemas.isna() | (schemas == "")) & tables.str.contains(".", regex=False)
+        parts = tables[split].str.split(".", n=1)
+        schemas = schemas.where(~split, parts.str[0].str.strip())
+        tables = tables.where(~split, parts.str[1].str.strip())
+
+        # where() può riportare i mancanti come NaN: solo le stringhe non vuote sono valori
+        targets: List[Tuple[Optional[str], Optional[str], str]] = [
+            (db if isinstance(db, str) and db else None,
+             schema if isinstance(schema, str) and schema else None,
+             table)
+            for db, schema, table in zip(dbs, schemas, tables)
+        ]
         print(f"[CHECK] Target letti: {len(targets)}")
         return targets
 
     # ------------------------------ Utilità SQL -------------------------------
     def _build_conn_str(self, database: Optional[str]) -> str:
+        if database in self._conn_strs:
+            return self._conn_strs[database]
+        if database in self._conn_errors:
+            raise self._conn_errors[database]
+        try:
+            conn_str = self._probe_conn_str(database)
+        except RuntimeError as e:
+            self._conn_errors[database] = e
+            raise
+        self._conn_strs[database] = conn_str
+        return conn_str
+
+    def _probe_conn_str(self, database: Optional[str]) -> str:
         last_error: Optional[Exception] = None
         for drv in ODBC_DRIVERS:
             try:
@@ -164,76 +207,67 @@ class TableExistenceChecker:
             except Exception:
                 pass
 
+    def _db_cursor(self, db: str):
+        """Cursore condiviso per le query su `db`; la connessione viene aperta al primo uso."""
+        cur = self._db_cursors.get(db)
+        if cur is not None:
+            # Scarta eventuali result set rimasti dalla query precedente prima di riusarlo
+            try:
+                while cur.nextset():
+                    pass
+            except Exception:
+                pass
+            return cur
+        conn = pyodbc.connect(self._build_conn_str(db), timeout=QUERY_TIMEOUT)
+        self._db_conns[db] = conn
+        cur = self._db_cursors[db] = conn.cursor()
+        return cur
+
+    def _close_db(self, db: str) -> None:
+        for obj in (self._db_cursors.pop(db, None), self._db_conns.pop(db, None)):
+            if obj is not None:
+                try:
+                    obj.close()
+                except Exception:
+                    pass
+
     def _fetch_tables_in_db(self, db: str) -> Set[Tuple[str, str, str]]:
         """Ritorna set di (schema, object_name, object_type_label) esistenti nel DB.
         Include, in base ai flag: tabelle, viste, sinonimi, stored procedure, funzioni, trigger.
         `object_type_label` è allineato a `sys.objects.type_desc` o literal 'SYNONYM'.
         """
-        parts = [
-            # Tabelle
-            (
-                """
-                SELECT s.name AS schema_name, t.name AS object_name, 'USER_TABLE' AS object_type
-                FROM sys.tables AS t
-                JOIN sys.schemas AS s ON s.schema_id = t.schema_id
-                """
-            )
-        ]
+        # Una sola scansione di sys.objects filtrata per codice tipo: i codici sono
+        # parametri, quindi il testo della query resta identico per ogni DB e il
+        # piano viene riusato. type_desc coincide con le etichette usate finora
+        # (USER_TABLE, VIEW, SYNONYM, SQL_STORED_PROCEDURE, ...).
+        type_codes: List[str] = ['U']
         if INCLUDE_VIEWS:
-            parts.append(
-                """
-                SELECT s.name AS schema_name, v.name AS object_name, 'VIEW' AS object_type
-                FROM sys.views AS v
-                JOIN sys.schemas AS s ON s.schema_id = v.schema_id
-                """
-            )
+            type_codes.append('V')
         if INCLUDE_SYNONYMS:
-            parts.append(
-                """
-                SELECT s.name AS schema_name, sy.name AS object_name, 'SYNONYM' AS object_type
-                FROM sys.synonyms AS sy
-                JOIN sys.schemas AS s ON s.schema_id = sy.schema_id
-                """
-            )
-
-        type_codes: List[str] = []
+            type_codes.append('SN')
         if INCLUDE_PROCS:
             type_codes.append('P')
         if INCLUDE_FUNCTIONS:
             type_codes.extend(['FN', 'IF', 'TF'])
         if INCLUDE_TRIGGERS:
             type_codes.append('TR')
-        if type_codes:
-            in_list = ", ".join([f"'{c}'" for c in type_codes])
-            parts.append(
-                f"""
-                SELECT s.name AS schema_name, o.name AS object_name, o.type_desc AS object_type
-                FROM sys.objects AS o
-                JOIN sys.schemas AS s ON s.schema_id = o.schema_id
-                WHERE o.type IN ({in_list})
-                """
-            )
+        sql = f"""
+            SELECT s.name AS schema_name, o.name AS object_name, o.type_desc AS object_type
+            FROM sys.objects AS o
+            JOIN sys.schemas AS s ON s.schema_id = o.schema_id
+            WHERE o.type IN ({", ".join("?" for _ in type_codes)})
+            """
 
-        sql = "\nUNION ALL\n".join(parts)
         print(f"[CHECK] Carico elenco oggetti (flags: views={INCLUDE_VIEWS}, synonyms={INCLUDE_SYNONYMS}, procs={INCLUDE_PROCS}, functions={INCLUDE_FUNCTIONS}, triggers={INCLUDE_TRIGGERS}) per DB: {db}")
-        conn = pyodbc.connect(self._build_conn_str(db), timeout=QUERY_TIMEOUT)
-        try:
-            cur = conn.cursor()
-            cur.execute(sql)
-            fetched = {(str(r[0]), str(r[1]), str(r[2])) for r in cur.fetchall()}
-            print(f"[CHECK] Oggetti in {db}: {len(fetched)}")
-            return fetched
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+        cur = self._db_cursor(db)
+        cur.execute(sql, type_codes)
+        fetched = {(str(r[0]), str(r[1]), str(r[2])) for r in cur.fetchall()}
+        print(f"[CHECK] Oggetti in {db}: {len(fetched)}")
+        return fetched
 
     def _fetch_table_ddl(self, db: str, schema: str, table: str) -> str:
         """Genera una definizione CREATE TABLE per una tabella usando metadata di sistema."""
-        conn = pyodbc.connect(self._build_conn_str(db), timeout=QUERY_TIMEOUT)
-        try:
-            tsql_stringagg = r"""
+        tsql_stringagg = r"""
 DECLARE @schema_table nvarchar(512) = QUOTENAME(?) + N'.' + QUOTENAME(?);
 DECLARE @obj_id int = OBJECT_ID(@schema_table);
 IF @obj_id IS NULL
@@ -290,7 +324,7 @@ BEGIN
            ISNULL(CHAR(13) + CHAR(10) + @pk, N'') AS ddl;
 END
 """
-            tsql_xmlpath = r"""
+        tsql_xmlpath = r"""
 DECLARE @schema_table nvarchar(512) = QUOTENAME(?) + N'.' + QUOTENAME(?);
 DECLARE @obj_id int = OBJECT_ID(@schema_table);
 IF @obj_id IS NULL
@@ -349,101 +383,75 @@ BEGIN
            ISNULL(CHAR(13) + CHAR(10) + @pk, N'') AS ddl;
 END
 """
-            cur = conn.cursor()
-            try:
-                cur.execute(tsql_stringagg, (schema, table))
-            except Exception:
-                cur.execute(tsql_xmlpath, (schema, table))
-            row = cur.fetchone()
-            return str(row[0]) if row and row[0] is not None else ""
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+        cur = self._db_cursor(db)
+        try:
+            cur.execute(tsql_stringagg, (schema, table))
+        except Exception:
+            cur.execute(tsql_xmlpath, (schema, table))
+        row = cur.fetchone()
+        return str(row[0]) if row and row[0] is not None else ""
 
     def _fetch_view_definition(self, db: str, schema: str, view: str) -> str:
         """Ritorna la definizione testuale della vista dal DB."""
-        conn = pyodbc.connect(self._build_conn_str(db), timeout=QUERY_TIMEOUT)
+        sql = (
+            """
+            SELECT sm.definition
+            FROM sys.sql_modules AS sm
+            WHERE sm.object_id = OBJECT_ID(QUOTENAME(?) + N'.' + QUOTENAME(?));
+            """
+        )
+        cur = self._db_cursor(db)
         try:
-            sql = (
-                """
-                SELECT sm.definition
-                FROM sys.sql_modules AS sm
-                WHERE sm.object_id = OBJECT_ID(QUOTENAME(?) + N'.' + QUOTENAME(?));
-                """
-            )
-            cur = conn.cursor()
-            try:
-                cur.execute(sql, (schema, view))
-                r = cur.fetchone()
-                if r and r[0]:
-                    return str(r[0])
-                cur.execute("SELECT OBJECT_DEFINITION(OBJECT_ID(QUOTENAME(?) + N'.' + QUOTENAME(?)))", (schema, view))
-                r2 = cur.fetchone()
-                if r2 and r2[0]:
-                    return str(r2[0])
-                return "ERROR: definizione non disponibile (possibile oggetto crittografato)"
-            except Exception as e:
-                return f"ERROR: lettura definizione vista fallita: {e}"
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+            cur.execute(sql, (schema, view))
+            r = cur.fetchone()
+            if r and r[0]:
+                return str(r[0])
+            cur.execute("SELECT OBJECT_DEFINITION(OBJECT_ID(QUOTENAME(?) + N'.' + QUOTENAME(?)))", (schema, view))
+            r2 = cur.fetchone()
+            if r2 and r2[0]:
+                return str(r2[0])
+            return "ERROR: definizione non disponibile (possibile oggetto crittografato)"
+        except Exception as e:
+            return f"ERROR: lettura definizione vista fallita: {e}"
 
     def _fetch_module_definition(self, db: str, schema: str, name: str) -> str:
         """Ritorna definizione testuale per oggetti con modulo SQL (proc, func, trigger, view)."""
-        conn = pyodbc.connect(self._build_conn_str(db), timeout=QUERY_TIMEOUT)
+        sql = (
+            """
+            SELECT sm.definition
+            FROM sys.sql_modules AS sm
+            WHERE sm.object_id = OBJECT_ID(QUOTENAME(?) + N'.' + QUOTENAME(?));
+            """
+        )
+        cur = self._db_cursor(db)
         try:
-            sql = (
-                """
-                SELECT sm.definition
-                FROM sys.sql_modules AS sm
-                WHERE sm.object_id = OBJECT_ID(QUOTENAME(?) + N'.' + QUOTENAME(?));
-                """
-            )
-            cur = conn.cursor()
-            try:
-                cur.execute(sql, (schema, name))
-                r = cur.fetchone()
-                if r and r[0]:
-                    return str(r[0])
-                cur.execute("SELECT OBJECT_DEFINITION(OBJECT_ID(QUOTENAME(?) + N'.' + QUOTENAME(?)))", (schema, name))
-                r2 = cur.fetchone()
-                if r2 and r2[0]:
-                    return str(r2[0])
-                return "ERROR: definizione non disponibile (possibile oggetto crittografato)"
-            except Exception as e:
-                return f"ERROR: lettura definizione oggetto fallita: {e}"
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+            cur.execute(sql, (schema, name))
+            r = cur.fetchone()
+            if r and r[0]:
+                return str(r[0])
+            cur.execute("SELECT OBJECT_DEFINITION(OBJECT_ID(QUOTENAME(?) + N'.' + QUOTENAME(?)))", (schema, name))
+            r2 = cur.fetchone()
+            if r2 and r2[0]:
+                return str(r2[0])
+            return "ERROR: definizione non disponibile (possibile oggetto crittografato)"
+        except Exception as e:
+            return f"ERROR: lettura definizione oggetto fallita: {e}"
 
     def _fetch_synonym_ddl(self, db: str, schema: str, synonym: str) -> str:
         """Costruisce CREATE SYNONYM basandosi su sys.synonyms.base_object_name."""
-        conn = pyodbc.connect(self._build_conn_str(db), timeout=QUERY_TIMEOUT)
+        cur = self._db_cursor(db)
         try:
-            cur = conn.cursor()
-            try:
-                cur.execute(
-                    "SELECT base_object_name FROM sys.synonyms WHERE schema_id = SCHEMA_ID(?) AND name = ?",
-                    (schema, synonym),
-                )
-                r = cur.fetchone()
-                base = str(r[0]) if r and r[0] is not None else None
-                if not base:
-                    return f"ERROR: sinonimo non trovato: [{schema}].[{synonym}]"
-                return f"CREATE SYNONYM [{schema}].[{synonym}] FOR {base};"
-            except Exception as e:
-                return f"ERROR: lettura sinonimo fallita: {e}"
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+            cur.execute(
+                "SELECT base_object_name FROM sys.synonyms WHERE schema_id = SCHEMA_ID(?) AND name = ?",
+                (schema, synonym),
+            )
+            r = cur.fetchone()
+            base = str(r[0]) if r and r[0] is not None else None
+            if not base:
+                return f"ERROR: sinonimo non trovato: [{schema}].[{synonym}]"
+            return f"CREATE SYNONYM [{schema}].[{synonym}] FOR {base};"
+        except Exception as e:
+            return f"ERROR: lettura sinonimo fallita: {e}"
 
     def _get_ddl(self, db: str, schema: str, name: str, obj_type: str) -> str:
         t = (obj_type or "").upper()
@@ -456,6 +464,60 @@ END
         # default: table
         return self._fetch_table_ddl(db, schema, name)
 
+    def _check_db(
+        self,
+        db: str,
+        targets_per_db: Dict[Optional[str], List[int]],
+        norm_targets: List[Tuple[Optional[str], Optional[str], str]],
+    ) -> Tuple[List[List[str]], List[int], Optional[str]]:
+        """Scansione di un DB: (righe trovate, indici dei target trovati, errore o None).
+        Usa solo la connessione del proprio DB, quindi può girare in un thread del pool."""
+        print(f"[CHECK] Scansione tabelle in DB: {db}")
+        try:
+            existing = self._fetch_tables_in_db(db)
+        except Exception as e:
+            msg = f"Errore lettura tabelle: {e}"
+            print(f"[CHECK] {msg}")
+            self._close_db(db)
+            # Riga di errore per il DB corrente
+            return [[self.server, db, "", "", msg]], [], msg
+        try:
+            # Costruisci indici per nome e per (schema, nome) in minuscolo
+            by_table: Dict[str, List[Tuple[str, str, str]]] = {}
+            by_schema_table: Dict[Tuple[str, str], List[Tuple[str, str, str]]] = {}
+            for sch, tbl, typ in existing:
+                key = sys.intern(tbl.lower())
+                by_table.setdefault(key, []).append((sch, tbl, typ))
+                by_schema_table.setdefault((sys.intern(sch.lower()), key), []).append((sch, tbl, typ))
+            db_lower = db.lower()
+            ddl_cache: Dict[Tuple[str, str, str], str] = {}
+
+            # Valuta target che chiedono proprio questo DB (o tutti i DB), nell'ordine di input
+            rows: List[List[str]] = []
+            found_idxs: List[int] = []
+            for idx in sorted(targets_per_db.get(db_lower, []) + targets_per_db.get(None, [])):
+                _tdb, tschema, ttable = norm_targets[idx]
+                matches: List[Tuple[str, str, str]] = []
+                if tschema:
+                    # match preciso schema.table
+                    matches = by_schema_table.get((tschema, ttable), [])
+                else:
+                    # qualsiasi schema con quel table name
+                    matches = by_table.get(ttable, [])
+
+                for (sch, tbl, typ) in matches:
+                    # Lo stesso oggetto può corrispondere a più righe di input (es. 'dbo.t1' e 't1')
+                    ddl_key = (sch, tbl, typ)
+                    ddl = ddl_cache.get(ddl_key)
+                    if ddl is None:
+                        ddl = ddl_cache[ddl_key] = self._get_ddl(db, sch, tbl, typ)
+                    rows.append([self.server, db, sch, tbl, typ, ddl, ""])  # nessun errore
+                    found_idxs.append(idx)
+            print(f"[CHECK] Corrispondenze trovate in {db}: {len(rows)}")
+            return rows, found_idxs, None
+        finally:
+            self._close_db(db)
+
     # ------------------------------ Run principale ----------------------------
     def run(self) -> str:
         targets = self._read_targets()
@@ -477,11 +539,17 @@ END
 
         # Normalizza input per confronto case-insensitive
         # Manteniamo comunque le tuple originali per eventuale debug
+        # Nomi minuscoli calcolati una volta e internati: gli stessi schema/tabelle si ripetono
+        # molte volte e le lookup nei dizionari confrontano per identità
         norm_targets: List[Tuple[Optional[str], Optional[str], str]] = []
-        for (db, schema, table) in targets:
+        # Indici dei target per DB richiesto (None = tutti i DB), per non riscorrere tutta la lista per ogni DB
+        targets_per_db: Dict[Optional[str], List[int]] = {}
+        for idx, (db, schema, table) in enumerate(targets):
+            tdb = sys.intern(db.lower()) if db else None
             norm_targets.append(
-                (db.lower() if db else None, schema.lower() if schema else None, table.lower())
+                (tdb, sys.intern(schema.lower()) if schema else None, sys.intern(table.lower()))
             )
+            targets_per_db.setdefault(tdb, []).append(idx)
 
         results: List[List[str]] = []
         total_matches = 0
@@ -490,45 +558,19 @@ END
         # Mappa di errori per DB (se un DB non è stato analizzato)
         db_errors: Dict[str, str] = {}
 
-        # Per efficienza, per ogni DB carichiamo tutte le tabelle e poi confrontiamo in memoria
-        for db in databases:
-            print(f"[CHECK] Scansione tabelle in DB: {db}")
-            try:
-                existing = self._fetch_tables_in_db(db)
-            except Exception as e:
-                msg = f"Errore lettura tabelle: {e}"
-                print(f"[CHECK] {msg}")
-                # Riga di errore per il DB corrente
-                results.append([self.server, db, "", "", msg])
-                db_errors[db.lower()] = msg
-                continue
-            # Costruisci indici
-            by_table: Dict[str, List[Tuple[str, str, str]]] = {}
-            for sch, tbl, typ in existing:
-                key = tbl.lower()
-                by_table.setdefault(key, []).append((sch, tbl, typ))
-
-            # Valuta target che chiedono proprio questo DB (o tutti i DB)
-            matches_in_db = 0
-            for idx, (tdb, tschema, ttable) in enumerate(norm_targets):
-                if tdb is not None and tdb != db.lower():
+        # Per efficienza, per ogni DB carichiamo tutte le tabelle e poi confrontiamo in memoria.
+        # Un DB per worker (vedi _check_db); gli esiti si riuniscono nell'ordine dei DB
+        workers = max(1, min(MAX_DB_WORKERS, len(databases)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            esiti = executor.map(lambda d: self._check_db(d, targets_per_db, norm_targets), databases)
+            for db, (db_rows, found_idxs, error) in zip(databases, esiti):
+                results.extend(db_rows)
+                if error is not None:
+                    db_errors[db.lower()] = error
                     continue
-                matches: List[Tuple[str, str, str]] = []
-                if tschema:
-                    # match preciso schema.table
-                    candidates = by_table.get(ttable, [])
-                    matches = [(s, t, ty) for (s, t, ty) in candidates if s.lower() == tschema]
-                else:
-                    # qualsiasi schema con quel table name
-                    matches = by_table.get(ttable, [])
-
-                for (sch, tbl, typ) in matches:
-                    ddl = self._get_ddl(db, sch, tbl, typ)
-                    results.append([self.server, db, sch, tbl, typ, ddl, ""])  # nessun errore
-                    matches_in_db += 1
-                    total_matches += 1
+                total_matches += len(db_rows)
+                for idx in found_idxs:
                     found_flags[idx] = True
-            print(f"[CHECK] Corrispondenze trovate in {db}: {matches_in_db}")
 
         # Aggiungi righe per i target non trovati
         if targets:
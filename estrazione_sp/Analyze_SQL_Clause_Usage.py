@@ -9,7 +9,9 @@
 
 import os
 import re
-from typing import List, Optional, Tuple, Set
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple, Set
 
 try:
     from openpyxl import load_workbook, Workbook
@@ -17,6 +19,11 @@ except Exception:
     load_workbook = None  # type: ignore
     Workbook = None  # type: ignore
 
+try:
+    import re2  # google-re2: scansione lineare (DFA), opzionale
+except Exception:
+    re2 = None  # type: ignore
+
 # -----------------------------------------------------------------------------
 # CONFIGURAZIONE: inserisci qui i percorsi dei file
 # -----------------------------------------------------------------------------
@@ -30,6 +37,30 @@ OUTPUT_EXCEL_PATH: Optional[str] = None  # es: r"C:\path\to\oggetti_sql_con_clau
 # Nome del foglio nel file Excel di input (None = primo foglio)
 INPUT_SHEET_NAME: Optional[str] = None
 
+# Numero di script distinti di cui conservare le tabelle referenziate
+SCRIPT_CACHE_SIZE: int = 4096
+
+# Processi per l'analisi degli script e numero minimo di script distinti per usarli
+MAX_PROCESSES: int = os.cpu_count() or 1
+PARALLEL_MIN_SCRIPTS: int = 200
+
+
+def _build_clause_regex(prefixes, qualified_table, start=0):
+    """Compila le clause in un'alternativa con gruppi nominati c<i> (clause) e t<i> (tabella),
+    con i = start + posizione della clause in prefixes.
+
+    Ogni ramo è \\b<prefisso><nome tabella>\\b: la keyword deve iniziare una parola e il nome
+    qualificato deve finire su un confine di parola. L'alternativa è dentro un lookahead, quindi
+    viene provata a ogni posizione dello script e le corrispondenze possono sovrapporsi:
+    'LEFT JOIN x' vale per LEFT JOIN (alla posizione di LEFT) e per JOIN (alla posizione di
+    JOIN). In una stessa posizione viene riportato solo il primo ramo che corrisponde,
+    nell'ordine di prefixes.
+    """
+    alternatives = "|".join(
+        rf"(?P<c{i}>\b{prefix}(?P<t{i}>{qualified_table})\b)" for i, (prefix, _) in enumerate(prefixes, start)
+    )
+    return re.compile(f"(?=(?:{alternatives}))", re.IGNORECASE | re.DOTALL)
+
 
 class SQLClauseAnalyzer:
     """Analizza script SQL per identificare come le tabelle vengono utilizzate."""
@@ -41,6 +72,73 @@ class SQLClauseAnalyzer:
     # Supporta anche db..table (schema vuoto)
     QUALIFIED_TABLE = rf'{IDENTIFIER}(?:\s*\.\s*(?:{IDENTIFIER}|(?=\s*\.)))*'
 
+    # SQL clause riconosciute: (prefisso regex prima del nome tabella, nome clause).
+    # L'ordine è quello con cui le clause vengono riportate in output.
+    CLAUSE_PREFIXES = [
+        # INSERT INTO
+        (r'INSERT\s+INTO\s+', 'INSERT INTO'),
+
+        # DELETE FROM
+        (r'DELETE\s+(?:FROM\s+)?', 'DELETE FROM'),
+
+        # UPDATE
+        (r'UPDATE\s+', 'UPDATE'),
+
+        # MERGE INTO
+        (r'MERGE\s+(?:INTO\s+)?', 'MERGE INTO'),
+
+        # TRUNCATE TABLE
+        (r'TRUNCATE\s+TABLE\s+', 'TRUNCATE TABLE'),
+
+        # SELECT INTO
+        (r'SELECT\s+.+?\s+INTO\s+', 'SELECT INTO'),
+
+        # ALTER TABLE
+        (r'ALTER\s+TABLE\s+', 'ALTER TABLE'),
+
+        # CREATE TABLE
+        (r'CREATE\s+TABLE\s+', 'CREATE TABLE'),
+
+        # DROP TABLE
+        (r'DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?', 'DROP TABLE'),
+
+        # Vari tipi di JOIN
+        (r'FULL\s+OUTER\s+JOIN\s+', 'FULL OUTER JOIN'),
+        (r'LEFT\s+OUTER\s+JOIN\s+', 'LEFT OUTER JOIN'),
+        (r'RIGHT\s+OUTER\s+JOIN\s+', 'RIGHT OUTER JOIN'),
+        (r'LEFT\s+JOIN\s+', 'LEFT JOIN'),
+        (r'RIGHT\s+JOIN\s+', 'RIGHT JOIN'),
+        (r'INNER\s+JOIN\s+', 'INNER JOIN'),
+        (r'CROSS\s+JOIN\s+', 'CROSS JOIN'),
+        (r'JOIN\s+', 'JOIN'),
+
+        # CROSS APPLY / OUTER APPLY
+        (r'CROSS\s+APPLY\s+', 'CROSS APPLY'),
+        (r'OUTER\s+APPLY\s+', 'OUTER APPLY'),
+
+        # FROM (deve essere dopo i JOIN per evitare falsi positivi)
+        (r'FROM\s+', 'FROM'),
+    ]
+
+    # Clause di scrittura (prime WRITE_CLAUSES di CLAUSE_PREFIXES) e di lettura, ciascun gruppo
+    # compilato in un'unica alternativa: una passata per gruppo invece di una per clause.
+    # Ogni gruppo è preceduto da un controllo per sottostringa sulle keyword che tutte le sue
+    # clause richiedono: senza nessuna di esse la regex non può trovare nulla e viene saltata
+    # (es. 'into' manca negli script di sola lettura, evitando il costoso SELECT ... INTO).
+    WRITE_CLAUSES = 9
+    CLAUSE_PASSES = [
+        (('into', 'delete', 'update', 'merge', 'table'),
+         _build_clause_regex(CLAUSE_PREFIXES[:WRITE_CLAUSES], QUALIFIED_TABLE)),
+        (('join', 'apply', 'from'),
+         _build_clause_regex(CLAUSE_PREFIXES[WRITE_CLAUSES:], QUALIFIED_TABLE, WRITE_CLAUSES)),
+    ]
+
+    # I pattern dei commenti sono regolari: con re2 installato la rimozione è una scansione
+    # lineare anche su script molto lunghi. CLAUSE_PASSES restano su re perché usano un lookahead.
+    _COMMENT_ENGINE = re2 if re2 is not None else re
+    _BLOCK_COMMENT = _COMMENT_ENGINE.compile(r'(?s)/\*.*?\*/')
+    _LINE_COMMENT = _COMMENT_ENGINE.compile(r'--[^\n]*')
+
     def __init__(self, input_excel: str, output_excel: str, sheet_name: Optional[str] = None):
         if not load_workbook or not Workbook:
             raise RuntimeError("openpyxl non installato. Installa con 'pip install openpyxl'.")
@@ -64,6 +162,7 @@ class SQLClauseAnalyzer:
         return name
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _normalize_identifier(name: str) -> str:
         """Normalizza un identifier per il confronto (lowercase, senza delimitatori)."""
         return SQLClauseAnalyzer._strip_delimiters(name).lower()
@@ -72,29 +171,24 @@ class SQLClauseAnalyzer:
     def _strip_sql_comments(sql: str) -> str:
         """Rimuove commenti SQL (-- e /* */)."""
         # Rimuovi commenti multilinea /* */
-        sql = re.sub(r'/\*.*?\*/', ' ', sql, flags=re.DOTALL)
+        sql = SQLClauseAnalyzer._BLOCK_COMMENT.sub(' ', sql)
         # Rimuovi commenti singola linea --
-        sql = re.sub(r'--[^\n]*', ' ', sql)
+        sql = SQLClauseAnalyzer._LINE_COMMENT.sub(' ', sql)
         return sql
 
-    def _extract_table_name_parts(self, qualified_name: str) -> Tuple[str, ...]:
+    @staticmethod
+    def _extract_table_name_parts(qualified_name: str) -> Tuple[str, ...]:
         """
         Estrae le parti di un nome qualificato e le normalizza.
         Ritorna tupla con le parti normalizzate (da 1 a 4 elementi).
         """
-        parts = [self._normalize_identifier(p.strip()) 
+        parts = [SQLClauseAnalyzer._normalize_identifier(p.strip()) 
                  for p in qualified_name.split('.') if p.strip() and p.strip() != '']
         return tuple(parts)
 
-    def _matches_table(self, qualified_name: str, target_schema: str, target_table: str) -> bool:
-        """
-        Verifica se un nome qualificato corrisponde alla tabella target.
-        Confronta schema.table o solo table.
-        """
-        parts = self._extract_table_name_parts(qualified_name)
-        target_schema_norm = self._normalize_identifier(target_schema)
-        target_table_norm = self._normalize_identifier(target_table)
-        
+    @staticmethod
+    def _matches_parts(parts: Tuple[str, ...], target_schema_norm: str, target_table_norm: str) -> bool:
+        """Confronta le parti normalizzate di un nome con schema e tabella target normalizzati."""
         if not parts:
             return False
         
@@ -108,10 +202,46 @@ class SQLClauseAnalyzer:
         
         # Caso 3: db.schema.table o server.db.schema.table
         # Prendiamo gli ultimi 2 elementi (schema, table)
-        if len(parts) >= 3:
-            return parts[-2] == target_schema_norm and parts[-1] == target_table_norm
-        
-        return False
+        return parts[-2] == target_schema_norm and parts[-1] == target_table_norm
+
+    def _matches_table(self, qualified_name: str, target_schema: str, target_table: str) -> bool:
+        """
+        Verifica se un nome qualificato corrisponde alla tabella target.
+        Confronta schema.table o solo table.
+        """
+        return self._matches_parts(
+            self._extract_table_name_parts(qualified_name),
+            self._normalize_identifier(target_schema),
+            self._normalize_identifier(target_table),
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=SCRIPT_CACHE_SIZE)
+    def _scan_clause_refs(script: str) -> Dict[Tuple[Optional[str], str], FrozenSet[int]]:
+        """
+        Indice delle tabelle referenziate dallo script: chiave (schema, table) normalizzati,
+        con schema None per i nomi non qualificati, valore gli indici delle clause trovate.
+        Non dipende dalla tabella cercata: lo stesso script compare in una riga per ogni
+        tabella che referenzia, quindi l'indice viene costruito una volta per script.
+        """
+        # Rimuovi commenti
+        clean_script = SQLClauseAnalyzer._strip_sql_comments(script)
+
+        script_lower = clean_script.lower()
+
+        index: Dict[Tuple[Optional[str], str], Set[int]] = {}
+        for keywords, regex in SQLClauseAnalyzer.CLAUSE_PASSES:
+            if not any(k in script_lower for k in keywords):
+                continue
+            for match in regex.finditer(clean_script):
+                idx = int(match.lastgroup[1:])
+                parts = SQLClauseAnalyzer._extract_table_name_parts(match.group(f"t{idx}"))
+                if not parts:
+                    continue
+                # Stesse regole di _matches_parts: solo table, oppure gli ultimi 2 elementi (schema, table)
+                key = (None, parts[0]) if len(parts) == 1 else (parts[-2], parts[-1])
+                index.setdefault(key, set()).add(idx)
+        return {key: frozenset(idxs) for key, idxs in index.items()}
 
     def _find_sql_clauses(self, script: str, schema: str, table: str) -> List[str]:
         """
@@ -122,75 +252,34 @@ class SQLClauseAnalyzer:
         if not script:
             return []
         
-        # Rimuovi commenti
-        clean_script = self._strip_sql_comments(script)
-        
-        clauses_found = []
-        
-        # Pattern per diverse SQL clause
-        # Ordine importante: pattern più specifici prima
-        patterns = [
-            # INSERT INTO
-            (r'\bINSERT\s+INTO\s+(' + self.QUALIFIED_TABLE + r')\b', 'INSERT INTO'),
-            
-            # DELETE FROM
-            (r'\bDELETE\s+(?:FROM\s+)?(' + self.QUALIFIED_TABLE + r')\b', 'DELETE FROM'),
-            
-            # UPDATE
-            (r'\bUPDATE\s+(' + self.QUALIFIED_TABLE + r')\b', 'UPDATE'),
-            
-            # MERGE INTO
-            (r'\bMERGE\s+(?:INTO\s+)?(' + self.QUALIFIED_TABLE + r')\b', 'MERGE INTO'),
-            
-            # TRUNCATE TABLE
-            (r'\bTRUNCATE\s+TABLE\s+(' + self.QUALIFIED_TABLE + r')\b', 'TRUNCATE TABLE'),
-            
-            # SELECT INTO
-            (r'\bSELECT\s+.+?\s+INTO\s+(' + self.QUALIFIED_TABLE + r')\b', 'SELECT INTO'),
-            
-            # ALTER TABLE
-            (r'\bALTER\s+TABLE\s+(' + self.QUALIFIED_TABLE + r')\b', 'ALTER TABLE'),
-            
-            # CREATE TABLE
-            (r'\bCREATE\s+TABLE\s+(' + self.QUALIFIED_TABLE + r')\b', 'CREATE TABLE'),
-            
-            # DROP TABLE
-            (r'\bDROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(' + self.QUALIFIED_TABLE + r')\b', 'DROP TABLE'),
-            
-            # Vari tipi di JOIN
-            (r'\bFULL\s+OUTER\s+JOIN\s+(' + self.QUALIFIED_TABLE + r')\b', 'FULL OUTER JOIN'),
-            (r'\bLEFT\s+OUTER\s+JOIN\s+(' + self.QUALIFIED_TABLE + r')\b', 'LEFT OUTER JOIN'),
-            (r'\bRIGHT\s+OUTER\s+JOIN\s+(' + self.QUALIFIED_TABLE + r')\b', 'RIGHT OUTER JOIN'),
-            (r'\bLEFT\s+JOIN\s+(' + self.QUALIFIED_TABLE + r')\b', 'LEFT JOIN'),
-            (r'\bRIGHT\s+JOIN\s+(' + self.QUALIFIED_TABLE + r')\b', 'RIGHT JOIN'),
-            (r'\bINNER\s+JOIN\s+(' + self.QUALIFIED_TABLE + r')\b', 'INNER JOIN'),
-            (r'\bCROSS\s+JOIN\s+(' + self.QUALIFIED_TABLE + r')\b', 'CROSS JOIN'),
-            (r'\bJOIN\s+(' + self.QUALIFIED_TABLE + r')\b', 'JOIN'),
-            
-            # CROSS APPLY / OUTER APPLY
-            (r'\bCROSS\s+APPLY\s+(' + self.QUALIFIED_TABLE + r')\b', 'CROSS APPLY'),
-            (r'\bOUTER\s+APPLY\s+(' + self.QUALIFIED_TABLE + r')\b', 'OUTER APPLY'),
-            
-            # FROM (deve essere dopo i JOIN per evitare falsi positivi)
-            (r'\bFROM\s+(' + self.QUALIFIED_TABLE + r')\b', 'FROM'),
-        ]
-        
-        for pattern, clause_name in patterns:
-            matches = re.finditer(pattern, clean_script, re.IGNORECASE | re.DOTALL)
-            for match in matches:
-                table_ref = match.group(1)
-                if self._matches_table(table_ref, schema, table):
-                    clauses_found.append(clause_name)
-        
-        # Rimuovi duplicati mantenendo l'ordine
-        seen = set()
-        unique_clauses = []
-        for clause in clauses_found:
-            if clause not in seen:
-                seen.add(clause)
-                unique_clauses.append(clause)
-        
-        return unique_clauses
+        return self._clauses_from_index(self._scan_clause_refs(script), schema, table)
+
+    def _clauses_from_index(self, index: Dict[Tuple[Optional[str], str], FrozenSet[int]],
+                            schema: str, table: str) -> List[str]:
+        """Clause con cui la tabella compare nell'indice di uno script (vedi _scan_clause_refs)."""
+        # Normalizzazione in cache per (schema, table): le righe condividono spesso la tabella
+        schema_norm = self._normalize_identifier(schema)
+        table_norm = self._normalize_identifier(table)
+        found = index.get((None, table_norm), frozenset()) | index.get((schema_norm, table_norm), frozenset())
+
+        # Clause nell'ordine di CLAUSE_PREFIXES, senza duplicati
+        return [name for idx, (_, name) in enumerate(self.CLAUSE_PREFIXES) if idx in found]
+
+    def _scan_scripts(self, scripts: List[str]) -> Dict[str, Dict[Tuple[Optional[str], str], FrozenSet[int]]]:
+        """
+        Indici di tutti gli script distinti. L'analisi regex è CPU-bound e ogni script è
+        indipendente: sopra PARALLEL_MIN_SCRIPTS viene distribuita su più processi;
+        in caso di errore del pool si ripiega sull'elaborazione sequenziale.
+        """
+        if MAX_PROCESSES > 1 and len(scripts) >= PARALLEL_MIN_SCRIPTS:
+            try:
+                chunksize = max(1, len(scripts) // (MAX_PROCESSES * 4))
+                with ProcessPoolExecutor(max_workers=MAX_PROCESSES) as executor:
+                    indexes = executor.map(_scan_script, scripts, chunksize=chunksize)
+                    return dict(zip(scripts, indexes))
+            except Exception as e:
+                print(f"Elaborazione parallela non disponibile ({e}), proseguo in sequenziale")
+        return {script: self._scan_clause_refs(script) for script in scripts}
 
     def _read_input_excel(self) -> List[Tuple[str, str, str, str, str, str, str]]:
         """
@@ -294,12 +383,12 @@ class SQLClauseAnalyzer:
             wb = Workbook()
             ws = wb.active
             ws.title = "Analisi SQL Clause"
-            for col_idx, header in enumerate(headers, start=1):
-                cell = ws.cell(row=1, column=col_idx, value=header)
+            ws.append(headers)
+            for cell in ws[1]:
                 cell.font = cell.font.copy(bold=True)
-            for row_idx, row_data in enumerate(data, start=2):
-                for col_idx, value in enumerate(row_data, start=1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
+            # Una append per riga invece di una ws.cell(...) per ogni valore
+            for row_data in data:
+                ws.append(row_data)
             from openpyxl.utils import get_column_letter
             for i, w in enumerate(widths, start=1):
                 ws.column_dimensions[get_column_letter(i)].width = w
@@ -312,13 +401,18 @@ class SQLClauseAnalyzer:
         input_data = self._read_input_excel()
         print(f"Trovate {len(input_data)} righe da analizzare")
         
+        # Ogni script distinto viene analizzato una sola volta, eventualmente in parallelo
+        scripts = list(dict.fromkeys(row[6] for row in input_data if row[6]))
+        print(f"Analisi di {len(scripts)} script distinti...")
+        indexes = self._scan_scripts(scripts)
+        
         output_data = []
         
         for idx, (server, database, schema, table, obj_name, obj_type, script) in enumerate(input_data, start=1):
             print(f"[{idx}/{len(input_data)}] Analisi: {obj_name} per tabella {schema}.{table}")
             
             # Trova le SQL clause
-            clauses = self._find_sql_clauses(script, schema, table)
+            clauses = self._clauses_from_index(indexes[script], schema, table) if script else []
             
             if clauses:
                 # Crea una riga per ogni clause trovata (o una singola riga con tutte le clause)
@@ -337,6 +431,11 @@ class SQLClauseAnalyzer:
         print(f"\nElaborazione completata! Totale righe elaborate: {len(output_data)}")
 
 
+def _scan_script(script: str) -> Dict[Tuple[Optional[str], str], FrozenSet[int]]:
+    """Funzione di modulo (serializzabile) eseguita nei processi worker."""
+    return SQLClauseAnalyzer._scan_clause_refs(script)
+
+
 def main():
     """Funzione principale."""
     if not INPUT_EXCEL_PATH:
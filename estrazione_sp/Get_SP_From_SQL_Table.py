@@ -9,6 +9,8 @@
 
 import os
 import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Tuple, Set
 
 try:
@@ -22,6 +24,11 @@ except Exception:
     load_workbook = None  # type: ignore
     Workbook = None  # type: ignore
 
+try:
+    import zstandard  # compressione delle definizioni in cache, opzionale
+except Exception:
+    zstandard = None  # type: ignore
+
 # -----------------------------------------------------------------------------
 # CONFIGURAZIONE: inserisci qui i percorsi dei file
 # -----------------------------------------------------------------------------
@@ -41,6 +48,15 @@ DEFAULT_SERVER: str = "EPCP3"
 # Numero di connessioni per file Excel
 CONNECTIONS_PER_FILE: int = 50
 
+# Database interrogati in parallelo (un thread e una connessione per server/database)
+MAX_DB_WORKERS: int = 8
+
+# Tabelle per query nella ricerca degli oggetti associati (2 parametri per tabella,
+# SQL Server accetta al massimo 2100 parametri per comando)
+BATCH_TABLES: int = 1000
+# Oggetti per query nella lettura delle definizioni (1 parametro per oggetto)
+BATCH_OBJECTS: int = 2000
+
 # -----------------------------------------------------------------------------
 # CONFIGURAZIONE CONNESSIONE SQL SERVER
 # -----------------------------------------------------------------------------
@@ -60,6 +76,42 @@ SQL_PASSWORD: Optional[str] = None
 CONNECTION_TEST_TIMEOUT: int = 3
 QUERY_TIMEOUT: int = 60
 ODBC_ENCRYPT_OPTS: str = "Encrypt=no;TrustServerCertificate=yes;"
+# Dimensione del pacchetto di rete (byte, max 32767): meno pacchetti per le definizioni lunghe
+ODBC_PACKET_SIZE: int = 32767
+# Righe lette per volta (fetchmany) dalle query che restituiscono le definizioni
+FETCH_BATCH_SIZE: int = 500
+
+# Attributo ODBC SQL_ATTR_PACKET_SIZE (non esposto come costante da pyodbc)
+_SQL_ATTR_PACKET_SIZE = 112
+
+
+def _set_unicode_decoding(conn) -> None:
+    """Le definizioni nvarchar(max) vengono decodificate direttamente da UTF-16LE,
+    senza passare da una transcodifica intermedia per ogni cella."""
+    conn.setdecoding(pyodbc.SQL_WCHAR, encoding="utf-16le")
+    conn.setdecoding(pyodbc.SQL_CHAR, encoding="utf-8")
+    conn.setencoding(encoding="utf-16le")
+
+
+def _pack_definition(text: Optional[str]) -> bytes:
+    """Definizione compressa per la cache (zstandard se installato, altrimenti zlib):
+    il testo SQL è molto ripetitivo e occupa una frazione della memoria."""
+    if not text:
+        return b""
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        # Un compressore per chiamata: le istanze non sono condivisibili tra thread
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 1)
+
+
+def _unpack_definition(blob: bytes) -> str:
+    """Inverso di _pack_definition, usato solo quando la riga viene emessa."""
+    if not blob:
+        return ""
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    return zlib.decompress(blob).decode("utf-8")
 
 
 class SQLObjectExtractor:
@@ -87,6 +139,9 @@ class SQLObjectExtractor:
         self.sheet_name = sheet_name
         self.driver = self._get_available_driver()
         self.connections_cache: Dict[str, any] = {}
+        # Definizioni per (server, database) -> {object_id: definizione compressa}: un oggetto
+        # che referenzia più tabelle viene trasferito e tenuto in memoria una volta sola
+        self.definitions_cache: Dict[Tuple[str, str], Dict[int, bytes]] = {}
 
     def _get_available_driver(self) -> str:
         """Trova il primo driver ODBC disponibile."""
@@ -120,8 +175,15 @@ class SQLObjectExtractor:
         conn_str = ";".join(conn_str_parts)
         
         try:
-            conn = pyodbc.connect(conn_str, timeout=CONNECTION_TEST_TIMEOUT)
+            # Solo letture: autocommit evita la gestione delle transazioni implicite
+            conn = pyodbc.connect(
+                conn_str,
+                timeout=CONNECTION_TEST_TIMEOUT,
+                autocommit=True,
+                attrs_before={_SQL_ATTR_PACKET_SIZE: ODBC_PACKET_SIZE},
+            )
             conn.timeout = QUERY_TIMEOUT
+            _set_unicode_decoding(conn)
             self.connections_cache[cache_key] = conn
             return conn
         except Exception as e:
@@ -158,49 +220,117 @@ class SQLObjectExtractor:
         Trova tutti gli oggetti (SP, trigger, function) che referenziano la tabella specificata.
         Ritorna lista di tuple: (nome_oggetto, tipo_oggetto, definizione_oggetto)
         """
-        conn = self._get_connection(server, database)
-        cursor = conn.cursor()
-        
-        # Query per trovare oggetti che referenziano la tabella
-        # Usa sys.sql_expression_dependencies per trovare le dipendenze
-        query = """
-        SELECT DISTINCT
-            o.name AS object_name,
-            o.type AS object_type,
-            OBJECT_DEFINITION(o.object_id) AS object_definition
-        FROM sys.sql_expression_dependencies d
-        INNER JOIN sys.objects o ON d.referencing_id = o.object_id
-        INNER JOIN sys.objects ref ON d.referenced_id = ref.object_id
-        INNER JOIN sys.schemas s ON ref.schema_id = s.schema_id
-        WHERE s.name = ?
-          AND ref.name = ?
-          AND o.type IN ('P', 'TR', 'FN', 'IF', 'TF')
-          AND OBJECT_DEFINITION(o.object_id) IS NOT NULL
-        ORDER BY o.type, o.name
+        found = self._find_associated_objects_batch(server, database, [(schema, table)])
+        return [
+            (obj_name, obj_type, _unpack_definition(blob))
+            for obj_name, obj_type, blob in found.get((schema.lower(), table.lower()), [])
+        ]
+
+    def _find_associated_objects_batch(self, server: str, database: str,
+                                       tables: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Tuple[str, str, bytes]]]:
         """
-        
-        results = []
+        Come _find_associated_objects ma per più tabelle dello stesso DB con una query ogni
+        BATCH_TABLES tabelle invece di una per tabella. Ritorna dict con chiave
+        (schema, tabella) in minuscolo (confronto case-insensitive come la collation di default).
+
+        La query delle dipendenze restituisce solo i metadati degli oggetti; le definizioni
+        vengono lette a parte, una volta per oggetto (vedi _load_definitions), e restano
+        compresse anche nel risultato: si decomprimono con _unpack_definition all'emissione.
+        """
+        conn = self._get_connection(server, database)
+        # I nomi vanno alla query nel caso originale (su collation case-sensitive il join
+        # fallirebbe con i minuscoli); la forma minuscola serve solo a non ripeterli
+        by_key: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        for schema, table in tables:
+            by_key.setdefault((schema.lower(), table.lower()), (schema, table))
+        targets = list(by_key.values())
+        found: List[Tuple[Tuple[str, str], int, str, str]] = []
+
+        for start in range(0, len(targets), BATCH_TABLES):
+            chunk = targets[start:start + BATCH_TABLES]
+            values = ", ".join("(?, ?)" for _ in chunk)
+            # Query per trovare oggetti che referenziano le tabelle
+            # Usa sys.sql_expression_dependencies per trovare le dipendenze
+            query = f"""
+            SELECT DISTINCT
+                s.name AS schema_name,
+                ref.name AS table_name,
+                o.object_id AS object_id,
+                o.name AS object_name,
+                o.type AS object_type
+            FROM sys.sql_expression_dependencies d
+            INNER JOIN sys.objects o ON d.referencing_id = o.object_id
+            INNER JOIN sys.objects ref ON d.referenced_id = ref.object_id
+            INNER JOIN sys.schemas s ON ref.schema_id = s.schema_id
+            INNER JOIN (VALUES {values}) AS t(schema_name, table_name)
+                ON s.name = t.schema_name AND ref.name = t.table_name
+            WHERE o.type IN ('P', 'TR', 'FN', 'IF', 'TF')
+              AND OBJECT_DEFINITION(o.object_id) IS NOT NULL
+            ORDER BY s.name, ref.name, o.type, o.name
+            """
+            params = [value for pair in chunk for value in pair]
+
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        obj_type_code = row.object_type.strip()
+                        obj_type_desc = self.OBJECT_TYPES.get(obj_type_code, f"Unknown ({obj_type_code})")
+                        key = (str(row.schema_name).lower(), str(row.table_name).lower())
+                        found.append((key, int(row.object_id), row.object_name, obj_type_desc))
+            except Exception as e:
+                print(f"Errore query per {server}.{database} ({len(chunk)} tabelle): {e}")
+            finally:
+                cursor.close()
+
+        definitions = self.definitions_cache.setdefault((server, database), {})
+        missing = [oid for oid in dict.fromkeys(oid for _, oid, _, _ in found) if oid not in definitions]
+        self._load_definitions(conn, server, database, missing, definitions)
+
+        results: Dict[Tuple[str, str], List[Tuple[str, str, bytes]]] = {}
+        for key, object_id, object_name, obj_type_desc in found:
+            blob = definitions.get(object_id)
+            if blob:
+                results.setdefault(key, []).append((object_name, obj_type_desc, blob))
+        return results
+
+    def _load_definitions(self, conn, server: str, database: str,
+                          object_ids: List[int], definitions: Dict[int, bytes]) -> None:
+        """Legge le definizioni degli oggetti indicati (BATCH_OBJECTS per query) e le
+        aggiunge compresse alla cache del DB."""
+        for start in range(0, len(object_ids), BATCH_OBJECTS):
+            chunk = object_ids[start:start + BATCH_OBJECTS]
+            values = ", ".join("(?)" for _ in chunk)
+            query = f"""
+            SELECT ids.object_id, OBJECT_DEFINITION(ids.object_id) AS object_definition
+            FROM (VALUES {values}) AS ids(object_id)
+            """
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, chunk)
+                # Lettura a blocchi: le definizioni possono essere molto lunghe
+                while True:
+                    rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        definitions[int(row[0])] = _pack_definition(row[1])
+            except Exception as e:
+                print(f"Errore lettura definizioni per {server}.{database} ({len(chunk)} oggetti): {e}")
+            finally:
+                cursor.close()
+
+    def _find_associated_objects_for_db(self, server: str, database: str, tables: List[Tuple[str, str]]):
+        """Oggetti associati di un DB per il thread pool: in caso di errore ritorna l'eccezione
+        invece di sollevarla, così viene riportata su ogni tabella del DB come in precedenza."""
         try:
-            cursor.execute(query, (schema, table))
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                obj_name = row.object_name
-                obj_type_code = row.object_type.strip()
-                obj_definition = row.object_definition
-                
-                obj_type_desc = self.OBJECT_TYPES.get(obj_type_code, f"Unknown ({obj_type_code})")
-                
-                if obj_definition:
-                    results.append((obj_name, obj_type_desc, obj_definition))
-        
+            return self._find_associated_objects_batch(server, database, tables)
         except Exception as e:
-            print(f"Errore query per {server}.{database}.{schema}.{table}: {e}")
-        
-        finally:
-            cursor.close()
-        
-        return results
+            return e
 
     def _create_output_excel(self, data: List[Tuple[str, str, str, str]], file_num: int):
         """Crea un file Excel di output con i dati specificati, splittando se necessario."""
@@ -246,17 +376,43 @@ class SQLObjectExtractor:
         
         all_results = []
         file_counter = 1
+        # Definizioni decompresse per il file in costruzione: un oggetto associato a più
+        # tabelle viene decompresso una volta e le sue righe condividono la stessa stringa
+        unpacked: Dict[bytes, str] = {}
+
+        # Tabelle raggruppate per DB: gli oggetti associati vengono letti con una query
+        # per DB invece che con una query per tabella
+        tables_per_db: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for server, database, schema, table in tables:
+            tables_per_db.setdefault((server, database), []).append((schema, table))
+
+        # Un DB per worker: la connessione in cache è per DB, quindi mai condivisa tra thread
+        found_per_db = {}
+        if tables_per_db:
+            workers = max(1, min(MAX_DB_WORKERS, len(tables_per_db)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    key: executor.submit(self._find_associated_objects_for_db, key[0], key[1], targets)
+                    for key, targets in tables_per_db.items()
+                }
+                found_per_db = {key: future.result() for key, future in futures.items()}
         
         for idx, (server, database, schema, table) in enumerate(tables, start=1):
             origin_connection = f"{server}.{database}.{schema}.{table}"
             print(f"[{idx}/{len(tables)}] Analisi: {origin_connection}")
             
             try:
-                associated_objects = self._find_associated_objects(server, database, schema, table)
+                found = found_per_db[(server, database)]
+                if isinstance(found, Exception):
+                    raise found
+                associated_objects = found.get((schema.lower(), table.lower()), [])
                 
                 if associated_objects:
-                    for obj_name, obj_type, obj_script in associated_objects:
-                        all_results.append((origin_connection, obj_name, obj_type, obj_script))
+                    for obj_name, obj_type, blob in associated_objects:
+                        script = unpacked.get(blob)
+                        if script is None:
+                            script = unpacked[blob] = _unpack_definition(blob)
+                        all_results.append((origin_connection, obj_name, obj_type, script))
                     print(f"  Trovati {len(associated_objects)} oggetti associati")
                 else:
                     print(f"  Nessun oggetto associato trovato")
@@ -269,6 +425,7 @@ class SQLObjectExtractor:
             if idx % CONNECTIONS_PER_FILE == 0 and all_results:
                 self._create_output_excel(all_results, file_counter)
                 all_results = []
+                unpacked.clear()
                 file_counter += 1
         
         # Crea file finale con eventuali risultati rimanenti
@@ -2,23 +2,95 @@
 # Scopo: questo script estrae gli oggetti di database sql associati a una tabella
 # NON CREDO DI AVERLO MAI USATO!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 # -----------------------------------------------------------------------------
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import os
+import re
+import sys
+import threading
 from Config.config import EXCEL_INPUT_PATH, EXCEL_OUTPUT_PATH
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+
+try:
+    import pyodbc
+except Exception:
+    pyodbc = None  # type: ignore
+
+try:
+    import xlsxwriter
+except Exception:
+    xlsxwriter = None  # type: ignore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+try:
+    import python_calamine  # noqa: F401  lettore xlsx in Rust, opzionale
+except Exception:
+    python_calamine = None  # type: ignore
+
+# Motore per pd.read_excel: calamine se installato (molto più veloce), altrimenti il default (openpyxl)
+EXCEL_READ_ENGINE = 'calamine' if python_calamine is not None else None
 
 # Usa il driver ODBC 18 se disponibile, altrimenti fallback su 17
 try:
     DRIVER = 'ODBC+Driver+18+for+SQL+Server'
     # Test rapido per vedere se il driver 18 è disponibile
-    import pyodbc
     if not any('ODBC Driver 18 for SQL Server' in d for d in pyodbc.drivers()):
         DRIVER = 'ODBC+Driver+17+for+SQL+Server'
 except Exception:
     DRIVER = 'ODBC+Driver+17+for+SQL+Server'
 
+# Engine riutilizzati per (server, db): evita di ricrearli a ogni riga.
+# Cache condivisa dai worker: _engines_lock protegge i dizionari, il lock per chiave
+# evita che due thread creino l'engine dello stesso DB contemporaneamente
+_engines = {}
+_engines_lock = threading.Lock()
+_engine_key_locks = {}
+
+# Archi delle dipendenze condivisi: nomi e class_desc si ripetono su molte tabelle e DB,
+# archi uguali puntano alla stessa tupla (con stringhe internate) invece che a copie
+_archi_condivisi = {}
+
 excel_path = EXCEL_INPUT_PATH
 output_path = EXCEL_OUTPUT_PATH
-df = pd.read_excel(excel_path)
+
+# Moduli SQL di un DB: letti una volta sola, la ricerca delle tabelle avviene in Python
+# Tipi di modulo da analizzare: viste e oggetti di sistema sono esclusi lato server
+# per non trasferire definizioni nvarchar(max) che non servono.
+# Il filtro usa il codice o.type (colonna di sys.objects) e non type_desc, che è calcolato
+# riga per riga: SQL_STORED_PROCEDURE, SQL_TRIGGER, SQL_TABLE_VALUED_FUNCTION, SQL_SCALAR_FUNCTION
+MODULI_TYPES = ('P', 'TR', 'TF', 'FN')
+MODULI_QUERY = f"""
+SELECT o.name, o.type_desc, sm.definition
+FROM sys.sql_modules sm
+JOIN sys.objects o ON sm.object_id = o.object_id
+WHERE o.is_ms_shipped = 0
+  AND o.type IN ({', '.join(f"'{t}'" for t in MODULI_TYPES)})
+"""
+CLAUSE_OPS = ("FROM", "JOIN")
+INPUT_COLUMNS = ('File_Name', 'Type', 'Server', 'Database', 'Schema', 'Table')
+TABLE_KEY_COLUMNS = ['Server', 'Database', 'Schema', 'Table']
+# Tabelle elaborate in parallelo (ognuna con la propria connessione dal pool dell'engine)
+MAX_WORKERS = 8
+# Tabelle per query delle dipendenze inverse: 2 parametri ciascuna, sotto il limite di 2100
+INVERSE_BATCH_SIZE = 1000
+# Righe dati per foglio Excel (1.048.576 meno l'intestazione): oltre, il foglio va in Parquet
+EXCEL_MAX_DATA_ROWS = 1_048_575
+# Caratteri per cella Excel: xlsxwriter e openpyxl troncano oltre questo limite
+EXCEL_MAX_CELL_CHARS = 32_767
+# Colonne fisse dei fogli di output: i dict di ogni foglio hanno sempre queste chiavi,
+# le tuple dei fogli delle dipendenze questi valori in questo ordine
+RESULTS_FIELDS = ('FileName', 'Server', 'Database', 'Table', 'Type', 'ObjectName', 'ObjectType', 'SQLDefinition')
+DIPENDENZE_FIELDS = ('FileName', 'Database', 'Table', 'ObjectName', 'ObjectType', 'Dipendenza', 'DipendenzaType')
+DIPENDENZE_INVERSE_FIELDS = ('FileName', 'Database', 'Table', 'ReferencingObject', 'ReferencingType', 'ReferencedEntity', 'ReferencedType')
+ELENCO_TABELLE_FIELDS = ('Nome Tabella', 'Schema', 'Tipo', 'Descrizione')
+STRUTTURA_COLONNE_FIELDS = ('Nome Tabella', 'Nome Colonna', 'Tipo Dato', 'Lunghezza', 'PK', 'FK', 'IsNullable', 'DefaultValue', 'Descrizione')
 
 def get_conn_params(row):
     return {
@@ -27,186 +99,463 @@ def get_conn_params(row):
         "schema": row.get('Schema'),
         "table": row.get('Table'),
         "file_name": row.get('File_Name'),
-        "type": row.get('Type')
+        "type": row.get('Type'),
+        "schema_valid": bool(row.get('schema_valid')),
+        "file_names": row.get('file_names') or [row.get('File_Name')]
     }
 
-def estrai_e_append(engine, query, result_list, row_transform, error_msg):
+# Colonne lette da get_conn_params, nell'ordine di spacchettamento di iter_conn_params
+CONN_PARAMS_COLUMNS = ('Server', 'Database', 'Schema', 'Table', 'File_Name', 'Type', 'schema_valid', 'file_names')
+
+def iter_conn_params(df):
+    """Come get_conn_params su ogni riga del DataFrame, ma estraendo le colonne una volta
+    sola come liste (tolist lavora in C) e scorrendole in parallelo: niente Series ne'
+    dict per riga. Le colonne mancanti valgono None come con row.get()."""
+    nessun_valore = [None] * len(df)
+    colonne = [df[c].tolist() if c in df.columns else nessun_valore for c in CONN_PARAMS_COLUMNS]
+    for server, db_name, schema, table, file_name, tipo, schema_valid, file_names in zip(*colonne):
+        yield {
+            "server": server,
+            "db_name": db_name,
+            "schema": schema,
+            "table": table,
+            "file_name": file_name,
+            "type": tipo,
+            "schema_valid": bool(schema_valid),
+            "file_names": file_names or [file_name]
+        }
+
+def filtra_righe_sql(df):
+    """Tiene solo le righe di tipo SQL con Server, Database e Table valorizzati.
+
+    Il filtro e il flag schema_valid sono calcolati in un solo passaggio vettoriale
+    invece che con controlli riga per riga nel ciclo principale.
+    """
+    df = df.reindex(columns=list(df.columns) + [c for c in INPUT_COLUMNS if c not in df.columns])
+
+    def valorizzata(col):
+        return df[col].notna() & (df[col].astype(str) != '')
+
+    mask = (
+        (df['Type'].astype(str).str.lower() == 'sql')
+        & valorizzata('Server') & valorizzata('Database') & valorizzata('Table')
+    )
+    df = df[mask].reset_index(drop=True)
+    df['schema_valid'] = valorizzata('Schema')
+    return df
+
+def get_engine(server, db_name):
+    key = (server, db_name)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+    with _engines_lock:
+        key_lock = _engine_key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            return engine
+        conn_str = f"mssql+pyodbc://@{server}/{db_name}?driver={DRIVER}&trusted_connection=yes"
+        engine = create_engine(conn_str, fast_executemany=True)
+
+        @event.listens_for(engine, 'connect')
+        def _on_connect(dbapi_conn, _):
+            # Decodifica nvarchar direttamente da UTF-16LE: niente transcodifica per cella
+            # sulle definizioni (sm.definition) che possono essere lunghe decine di KB
+            dbapi_conn.setdecoding(pyodbc.SQL_WCHAR, encoding='utf-16le')
+            dbapi_conn.setdecoding(pyodbc.SQL_CHAR, encoding='utf-8')
+            dbapi_conn.setencoding(encoding='utf-16le')
+            dbapi_conn.maxwrite = 1024 * 1024
+
+        _engines[key] = engine
+    return engine
+
+def raggruppa_duplicati(df):
+    """Una riga per (Server, Database, Schema, Table); i File_Name che la condividono
+    finiscono nella colonna file_names, cosi' le query girano una volta sola per tabella."""
+    gruppi = df.groupby(TABLE_KEY_COLUMNS, dropna=False, sort=False).ngroup()
+    file_names = df['File_Name'].groupby(gruppi).agg(list)
+    unique = df.loc[~gruppi.duplicated()].copy()
+    unique['file_names'] = gruppi[unique.index].map(file_names)
+    return unique.reset_index(drop=True)
+
+def estrai_e_append(conn, query, result_list, row_transform, error_msg):
+    """Esegue la query; row_transform ritorna la lista di righe da aggiungere per ogni record."""
     try:
         print(f"Eseguo query: {query}")
-        with engine.connect() as conn:
-            for r in conn.execute(text(query)):
-                result_list.append(row_transform(r))
+        for r in conn.execute(text(query)):
+            result_list.extend(row_transform(r))
     except Exception as e:
         print(f"{error_msg}: {e}\nQuery: {query}")
 
-results = []
-dipendenze = []
-dipendenze_inverse = []
-elenco_tabelle = []
-struttura_colonne = []
-
-for idx, row in df.iterrows():
-    params = get_conn_params(row)
-    # --- CONNESSIONE E VALIDAZIONE PARAMETRI ---
-    if (
-        not params["type"]
-        or str(params["type"]).lower() != "sql"
-        or not (params["server"] and params["db_name"] and params["table"])
-    ):
-        continue
-    conn_str = f"mssql+pyodbc://@{params['server']}/{params['db_name']}?driver={DRIVER}&trusted_connection=yes"
-    engine = create_engine(conn_str)
-    schema_valid = params["schema"] not in ['', None]
-    table_valid = params["table"] not in ['', None]
+def get_variants(schema, table):
+    """Forme con cui la tabella puo' comparire dopo FROM/JOIN in una definizione."""
+    if schema:
+        return [f"[{schema}].[{table}]", f"{schema}.{table}", table]
+    return [table]
 
-    # --- RISULTATI ---
-    if table_valid:
-        if schema_valid:
-            query = f"""
-            SELECT o.name, o.type_desc, sm.definition
-            FROM sys.sql_modules sm
-            JOIN sys.objects o ON sm.object_id = o.object_id
-            WHERE CHARINDEX('FROM [{params['schema']}].[{params['table']}]', sm.definition) > 0
-               OR CHARINDEX('JOIN [{params['schema']}].[{params['table']}]', sm.definition) > 0
-               OR CHARINDEX('FROM {params['schema']}.{params['table']}', sm.definition) > 0
-               OR CHARINDEX('JOIN {params['schema']}.{params['table']}', sm.definition) > 0
-               OR CHARINDEX('FROM {params['table']}', sm.definition) > 0
-               OR CHARINDEX('JOIN {params['table']}', sm.definition) > 0
-            """
-            table_label = f"{params['schema']}.{params['table']}"
-        else:
-            query = f"""
-            SELECT o.name, o.type_desc, sm.definition
-            FROM sys.sql_modules sm
-            JOIN sys.objects o ON sm.object_id = o.object_id
-            WHERE CHARINDEX('FROM {params['table']}', sm.definition) > 0
-               OR CHARINDEX('JOIN {params['table']}', sm.definition) > 0
-            """
-            table_label = params['table']
-        estrai_e_append(
-            engine,
-            query,
-            results,
-            lambda r: {
-                "FileName": params['file_name'],
-                "Server": params['server'],
-                "Database": params['db_name'],
-                "Table": table_label,
-                "Type": params['type'],
-                "ObjectName": r[0],
-                "ObjectType": r[1],
-                "SQLDefinition": r[2]
-            },
-            f"Errore su {params['file_name']} ({params['db_name']}) tabella {table_label}"
-        )
-
-    # --- DIPENDENZE ---
-    dep_query = f"""
-    SELECT referenced_entity_name, referenced_class_desc
-    FROM sys.sql_expression_dependencies
-    WHERE referencing_id = OBJECT_ID('{params['table']}')
+@lru_cache(maxsize=4096)
+def get_needles(schema, table):
+    """Tutte le combinazioni 'FROM/JOIN <variante>' (lowercase) per la tabella, calcolate una volta
+    per (schema, tabella) anche se la stessa tabella compare in piu' DB."""
+    return tuple(f"{op} {v}".lower() for v in get_variants(schema, table) for op in CLAUSE_OPS)
+
+def carica_moduli(engine):
+    """Ritorna [(nome, tipo, definizione, definizione_lower)] per tutti i moduli del DB."""
+    with engine.connect() as conn:
+        return [
+            (r[0], r[1], r[2], (r[2] or "").lower())
+            for r in conn.execute(text(MODULI_QUERY))
+        ]
+
+def compila_ricerca(targets):
+    """Regex unica per tutte le stringhe di ricerca delle tabelle di un DB.
+
+    Il lookahead rende le corrispondenze sovrapponibili e l'alternativa piu' lunga
+    vince a parita' di posizione; per ogni stringa si precalcolano anche le tabelle
+    delle stringhe che ne sono prefisso, cosi' 'from t10' trova anche T1 come CHARINDEX.
     """
-    estrai_e_append(
-        engine,
-        dep_query,
-        dipendenze,
-        lambda dep: {
-            "FileName": params['file_name'],
-            "Database": params['db_name'],
-            "Table": params['table'],
-            "ObjectName": params['table'],
-            "ObjectType": None,
-            "Dipendenza": dep[0],
-            "DipendenzaType": dep[1]
-        },
-        f"Errore dipendenze per {params['table']} in {params['db_name']}"
-    )
+    per_needle = {}
+    for schema, table in targets:
+        for needle in get_needles(schema, table):
+            tabelle = per_needle.get(needle)
+            if tabelle is None:
+                tabelle = per_needle[needle] = set()
+            tabelle.add((schema, table))
+    targets_per_needle = {}
+    for needle in per_needle:
+        # Un solo set per stringa, aggiornato sul posto: nessun set vuoto di default
+        # allocato per ogni prefisso che non corrisponde a una tabella
+        trovati = set()
+        for i in range(len(needle), 0, -1):
+            tabelle = per_needle.get(needle[:i])
+            if tabelle is not None:
+                trovati |= tabelle
+        targets_per_needle[needle] = frozenset(trovati)
+    alternative = "|".join(re.escape(n) for n in sorted(per_needle, key=len, reverse=True))
+    return re.compile(f"(?=({alternative}))"), targets_per_needle
+
+def estrai_risultati_batch(engine, righe, result_list):
+    """Cerca gli oggetti che referenziano le tabelle di uno stesso DB.
 
-    # --- DIPENDENZE INVERSE ---
-    if schema_valid:
-        tabella_full = f"{params['schema']}.{params['table']}"
-    else:
-        tabella_full = params['table']
-    inv_query = f"""
-    SELECT OBJECT_NAME(referencing_id) AS referencing_entity_name, referencing_class_desc, referenced_entity_name, referenced_class_desc
-    FROM sys.sql_expression_dependencies
-    WHERE referenced_entity_name = '{params['table']}' OR referenced_entity_name = '{tabella_full}'
+    Le definizioni dei moduli vengono lette una sola volta per DB; il confronto
+    (case-insensitive come CHARINDEX) avviene in Python e i moduli trovati sono
+    ridistribuiti sulle righe di input che li hanno richiesti.
     """
-    estrai_e_append(
-        engine,
-        inv_query,
-        dipendenze_inverse,
-        lambda inv: {
-            "FileName": params['file_name'],
-            "Database": params['db_name'],
-            "Table": tabella_full,
-            "ReferencingObject": inv[0],
-            "ReferencingType": inv[1],
-            "ReferencedEntity": inv[2],
-            "ReferencedType": inv[3]
-        },
-        f"Errore dipendenze inverse per tabella {tabella_full} in {params['db_name']}"
-    )
+    per_target = {}
+    for params in righe:
+        schema = str(params['schema']) if params['schema_valid'] else ''
+        per_target.setdefault((schema, str(params['table'])), []).append(params)
+    server = righe[0]['server']
+    db_name = righe[0]['db_name']
+    try:
+        print(f"Lettura moduli SQL da {server}/{db_name} per {len(per_target)} tabelle")
+        moduli = carica_moduli(engine)
+    except Exception as e:
+        print(f"Errore lettura moduli su {server}/{db_name}: {e}\nQuery: {MODULI_QUERY}")
+        return
+    pattern, targets_per_needle = compila_ricerca(per_target)
+    ordine = {key: i for i, key in enumerate(per_target)}
+    # Etichetta "schema.tabella" formattata una volta per tabella, non per ogni modulo trovato
+    etichette = {key: f"{key[0]}.{key[1]}" if key[0] else key[1] for key in per_target}
+    for name, type_desc, definition, definition_lower in moduli:
+        # Una sola scansione della definizione per tutte le tabelle del DB
+        trovati = set()
+        for match in pattern.finditer(definition_lower):
+            trovati |= targets_per_needle[match.group(1)]
+        for key in sorted(trovati, key=ordine.get):
+            table_label = etichette[key]
+            for params in per_target[key]:
+                for file_name in params['file_names']:
+                    result_list.append({
+                        "FileName": file_name,
+                        "Server": params['server'],
+                        "Database": params['db_name'],
+                        "Table": table_label,
+                        "Type": params['type'],
+                        "ObjectName": name,
+                        "ObjectType": type_desc,
+                        "SQLDefinition": definition
+                    })
 
-    # --- ELENCO TABELLE ---
-    tab_query = f"""
-    SELECT t.name AS NomeTabella, s.name AS SchemaName, t.type_desc AS TableType, ep.value AS TableDescription
-    FROM sys.tables t
-    JOIN sys.schemas s ON t.schema_id = s.schema_id
-    LEFT JOIN sys.extended_properties ep ON ep.major_id = t.object_id AND ep.name = 'MS_Description'
-    WHERE t.name = '{params['table']}' AND s.name = '{params['schema']}'
+def estrai_dipendenze_inverse_batch(engine, righe, result_list):
+    """Oggetti che referenziano le tabelle di uno stesso DB.
+
+    Invece di una query per tabella, le tabelle del DB vengono passate in una lista
+    VALUES e il join con sys.sql_expression_dependencies gira una volta per blocco;
+    le righe restituite sono ridistribuite sulle tabelle di input, nel loro ordine.
     """
-    estrai_e_append(
-        engine,
-        tab_query,
-        elenco_tabelle,
-        lambda tab: {
-            "Nome Tabella": tab[0],
-            "Schema": tab[1],
-            "Tipo": tab[2],
-            "Descrizione": tab[3]
-        },
-        f"Errore elenco tabelle per {params['table']}"
-    )
+    server = righe[0]['server']
+    db_name = righe[0]['db_name']
+    tabelle_full = [
+        f"{params['schema']}.{params['table']}" if params['schema_valid'] else params['table']
+        for params in righe
+    ]
+    per_riga = {}
+    try:
+        with engine.connect() as conn:
+            for start in range(0, len(righe), INVERSE_BATCH_SIZE):
+                indici = range(start, min(start + INVERSE_BATCH_SIZE, len(righe)))
+                values = ", ".join(f"({i}, :t{i}, :f{i})" for i in indici)
+                query = f"""
+                SELECT t.k, OBJECT_NAME(d.referencing_id) AS referencing_entity_name, d.referencing_class_desc,
+                       d.referenced_entity_name, d.referenced_class_desc
+                FROM (VALUES {values}) AS t(k, nome, nome_full)
+                JOIN sys.sql_expression_dependencies d
+                  ON d.referenced_entity_name = t.nome OR d.referenced_entity_name = t.nome_full
+                """
+                bind = {}
+                for i in indici:
+                    bind[f"t{i}"] = str(righe[i]['table'])
+                    bind[f"f{i}"] = str(tabelle_full[i])
+                print(f"Dipendenze inverse su {server}/{db_name} per {len(indici)} tabelle")
+                for r in conn.execute(text(query), bind):
+                    per_riga.setdefault(r[0], []).append(r[1:])
+    except Exception as e:
+        print(f"Errore dipendenze inverse su {server}/{db_name}: {e}")
+    # Un arco per dipendenza: le righe per FileName sono generate in scrittura (RigheEspanse).
+    # Le righe ripetute (una per colonna negli oggetti schema-bound, o trovate sia per nome
+    # che per nome completo) diventano un solo arco
+    for i, params in enumerate(righe):
+        for inv in dict.fromkeys(per_riga.get(i, ())):
+            result_list.append((params, arco_condiviso(tabelle_full[i], *inv)))
+
+def arco_condiviso(*parti):
+    """Tupla dell'arco con le stringhe internate; archi uguali restituiscono lo stesso oggetto."""
+    arco = tuple(sys.intern(p) if type(p) is str else p for p in parti)
+    return _archi_condivisi.setdefault(arco, arco)
 
-    # --- STRUTTURA COLONNE ---
-    col_query = f"""
-    SELECT c.table_name AS NomeTabella, c.column_name AS NomeColonna, c.data_type AS TipoDato, c.character_maximum_length AS Lunghezza,
-           CASE WHEN kcu.column_name IS NOT NULL THEN 'PK' ELSE '' END AS PK,
-           CASE WHEN fkcu.column_name IS NOT NULL THEN 'FK' ELSE '' END AS FK,
-           c.is_nullable AS IsNullable,
-           c.column_default AS DefaultValue
-    FROM INFORMATION_SCHEMA.COLUMNS c
-    LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
-    FROM INFORMATION_SCHEMA.COLUMNS c
-    LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
-        ON c.table_name = kcu.table_name AND c.column_name = kcu.column_name AND kcu.constraint_name LIKE 'PK%'
-    LEFT JOIN INFORMATION_SCHEMA.CONSTRAINT_COLUMN_USAGE fkcu
-        ON c.table_name = fkcu.table_name AND c.column_name = fkcu.column_name AND fkcu.constraint_name LIKE 'FK%'
-    WHERE c.table_name = '{params['table']}' AND c.table_schema = '{params['schema']}'
+def riga_dipendenza(params, dep):
+    """Colonne di DIPENDENZE_FIELDS dopo FileName, uguali per tutti i file della tabella."""
+    return (params['db_name'], params['table'], params['table'], None, dep[0], dep[1])
+
+def riga_dipendenza_inversa(params, arco):
+    """Colonne di DIPENDENZE_INVERSE_FIELDS dopo FileName, uguali per tutti i file della tabella."""
+    return (params['db_name'],) + arco
+
+class RigheEspanse:
+    """Righe di un foglio di dipendenze generate al volo: una tupla per (arco, file_name).
+
+    Ogni arco (params, dipendenza) e' tenuto una volta sola anche se la tabella compare
+    in piu' file; le righe vengono prodotte mentre il foglio viene scritto, senza
+    materializzare l'intera lista. Sono tuple nell'ordine delle colonne del foglio:
+    la parte comune ai file (crea_riga) si costruisce una volta per arco e a ogni file
+    si aggiunge solo il FileName, senza un dict per riga.
+    len() serve a scrivi_fogli per il limite di Excel.
     """
-    estrai_e_append(
-        engine,
-        col_query,
-        struttura_colonne,
-        lambda col: {
-            "Nome Tabella": col[0],
-            "Nome Colonna": col[1],
-            "Tipo Dato": col[2],
-            "Lunghezza": col[3],
-            "PK": col[4],
-            "FK": col[5],
-            "IsNullable": col[6],
-            "DefaultValue": col[7],
-            "Descrizione": None
-        },
-        f"Errore struttura colonne per {params['table']}"
-    )
 
-with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-    pd.DataFrame(elenco_tabelle).to_excel(writer, index=False, sheet_name='ElencoTabelle')
-    pd.DataFrame(struttura_colonne).to_excel(writer, index=False, sheet_name='StrutturaColonne')
-    pd.DataFrame(results).to_excel(writer, index=False, sheet_name='Risultati')
-    pd.DataFrame(dipendenze).to_excel(writer, index=False, sheet_name='Dipendenze')
-    pd.DataFrame(dipendenze_inverse).to_excel(writer, index=False, sheet_name='DipendenzeTabella')
+    def __init__(self, archi, crea_riga):
+        self.archi = archi
+        self.crea_riga = crea_riga
+
+    def __len__(self):
+        return sum(len(params['file_names']) for params, _ in self.archi)
+
+    def __iter__(self):
+        for params, arco in self.archi:
+            coda = self.crea_riga(params, arco)
+            for file_name in params['file_names']:
+                yield (file_name,) + coda
+
+def valori_riga(riga, colonne):
+    """Valori di una riga nell'ordine delle colonne: le tuple (fogli delle dipendenze)
+    lo sono gia', i dict degli altri fogli vengono letti per chiave."""
+    return riga if type(riga) is tuple else [riga[c] for c in colonne]
+
+def scrivi_parquet(path, righe, colonne):
+    """Scrive le righe in un file Parquet compresso zstd, una colonna alla volta."""
+    tabella = pa.table({
+        c: [riga[i] if type(riga) is tuple else riga[c] for riga in righe]
+        for i, c in enumerate(colonne)
+    })
+    pq.write_table(tabella, path, compression="zstd")
+
+def scrivi_fogli(path, fogli):
+    """Scrive i fogli [(righe, colonne, nome_foglio)] nel file Excel.
+
+    Con xlsxwriter in constant_memory le righe (dict o tuple) vanno direttamente nel foglio, una
+    alla volta, senza costruire un DataFrame per foglio (le SQLDefinition possono essere
+    enormi); se xlsxwriter non e' installato si passa da pandas con openpyxl.
+    Un foglio oltre il limite di righe di Excel, se pyarrow e' installato, viene scritto
+    in <output>_<foglio>.parquet accanto al file Excel invece che nel workbook.
+    """
+    if pa is not None:
+        excel = []
+        for righe, colonne, sheet_name in fogli:
+            if len(righe) > EXCEL_MAX_DATA_ROWS:
+                parquet_path = f"{os.path.splitext(path)[0]}_{sheet_name}.parquet"
+                scrivi_parquet(parquet_path, righe, colonne)
+                print(f"Foglio {sheet_name}: {len(righe)} righe oltre il limite di Excel, scritto in {parquet_path}")
+            else:
+                excel.append((righe, colonne, sheet_name))
+        fogli = excel
+        if not fogli:
+            return
+    if xlsxwriter is None:
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            for righe, colonne, sheet_name in fogli:
+                righe_valori = [valori_riga(riga, colonne) for riga in righe]
+                pd.DataFrame.from_records(righe_valori, columns=colonne).to_excel(writer, index=False, sheet_name=sheet_name)
+        return
+    wb = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_urls": False, "strings_to_formulas": False})
+    try:
+        for righe, colonne, sheet_name in fogli:
+            ws = wb.add_worksheet(sheet_name)
+            ws.write_row(0, 0, colonne, wb.add_format({"bold": True}))
+            for i, riga in enumerate(righe, start=1):
+                valori = valori_riga(riga, colonne)
+                esito = ws.write_row(i, 0, valori)
+                # -1: riga oltre il limite di Excel (to_excel sollevava errore, non si tronca in silenzio)
+                if esito == -1:
+                    raise ValueError(f"Foglio {sheet_name}: {len(righe)} righe superano il limite di Excel")
+                # -2: una stringa (di solito una SQLDefinition) supera EXCEL_MAX_CELL_CHARS, e' stata
+                # troncata e write_row si e' fermato su quella cella. La riga viene riscritta cella
+                # per cella, cosi' le colonne successive non vanno perse, e la troncatura viene segnalata
+                if esito == -2:
+                    for j, valore in enumerate(valori):
+                        if ws.write(i, j, valore) == -2:
+                            print(f"Foglio {sheet_name}: riga {i + 1}, colonna {colonne[j]} "
+                                  f"troncata a {EXCEL_MAX_CELL_CHARS} caratteri (limite di Excel)")
+    finally:
+        wb.close()
+
+def estrai_dettagli_tabella(engine, params):
+    """Dipendenze, elenco tabelle e struttura colonne di una tabella.
+
+    Ritorna le tre liste invece di scrivere su liste condivise, cosi' puo' girare
+    in un thread del pool e i risultati vengono riuniti nell'ordine di input.
+    Le dipendenze sono archi (params, dipendenza), espansi per FileName da RigheEspanse.
+    """
+    dipendenze = []
+    elenco_tabelle = []
+    struttura_colonne = []
+    schema_valid = params["schema_valid"]
+
+    # Una sola connessione per riga, condivisa dalle query di dipendenze/tabelle/colonne
+    try:
+        with engine.connect() as conn:
+            # --- DIPENDENZE ---
+            dep_query = f"""
+            SELECT referenced_entity_name, referenced_class_desc
+            FROM sys.sql_expression_dependencies
+            WHERE referencing_id = OBJECT_ID('{params['table']}')
+            """
+            estrai_e_append(
+                conn,
+                dep_query,
+                dipendenze,
+                lambda dep: [(params, arco_condiviso(dep[0], dep[1]))],
+                f"Errore dipendenze per {params['table']} in {params['db_name']}"
+            )
+
+            # --- ELENCO TABELLE ---
+            tab_query = f"""
+            SELECT t.name AS NomeTabella, s.name AS SchemaName, t.type_desc AS TableType, ep.value AS TableDescription
+            FROM sys.tables t
+            JOIN sys.schemas s ON t.schema_id = s.schema_id
+            LEFT JOIN sys.extended_properties ep ON ep.major_id = t.object_id AND ep.name = 'MS_Description'
+            WHERE t.name = '{params['table']}' AND s.name = '{params['schema']}'
+            """
+            estrai_e_append(
+                conn,
+                tab_query,
+                elenco_tabelle,
+                lambda tab: [{
+                    "Nome Tabella": tab[0],
+                    "Schema": tab[1],
+                    "Tipo": tab[2],
+                    "Descrizione": tab[3]
+                }],
+                f"Errore elenco tabelle per {params['table']}"
+            )
+
+            # --- STRUTTURA COLONNE ---
+            col_query = f"""
+            SELECT c.table_name AS NomeTabella, c.column_name AS NomeColonna, c.data_type AS TipoDato, c.character_maximum_length AS Lunghezza,
+                   CASE WHEN kcu.column_name IS NOT NULL THEN 'PK' ELSE '' END AS PK,
+                   CASE WHEN fkcu.column_name IS NOT NULL THEN 'FK' ELSE '' END AS FK,
+                   c.is_nullable AS IsNullable,
+                   c.column_default AS DefaultValue
+            FROM INFORMATION_SCHEMA.COLUMNS c
+            LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+            FROM INFORMATION_SCHEMA.COLUMNS c
+            LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE kcu
+                ON c.table_name = kcu.table_name AND c.column_name = kcu.column_name AND kcu.constraint_name LIKE 'PK%'
+            LEFT JOIN INFORMATION_SCHEMA.CONSTRAINT_COLUMN_USAGE fkcu
+                ON c.table_name = fkcu.table_name AND c.column_name = fkcu.column_name AND fkcu.constraint_name LIKE 'FK%'
+            WHERE c.table_name = '{params['table']}' AND c.table_schema = '{params['schema']}'
+            """
+            estrai_e_append(
+                conn,
+                col_query,
+                struttura_colonne,
+                lambda col: [{
+                    "Nome Tabella": col[0],
+                    "Nome Colonna": col[1],
+                    "Tipo Dato": col[2],
+                    "Lunghezza": col[3],
+                    "PK": col[4],
+                    "FK": col[5],
+                    "IsNullable": col[6],
+                    "DefaultValue": col[7],
+                    "Descrizione": None
+                }],
+                f"Errore struttura colonne per {params['table']}"
+            )
+    except Exception as e:
+        print(f"Errore connessione a {params['server']}/{params['db_name']}: {e}")
+    # Un arco per dipendenza distinta (sys.sql_expression_dependencies ripete il riferimento
+    # per ogni colonna negli oggetti schema-bound)
+    dipendenze = [(params, dep) for dep in dict.fromkeys(dep for _, dep in dipendenze)]
+    return dipendenze, elenco_tabelle, struttura_colonne
+
+def main():
+    df = raggruppa_duplicati(filtra_righe_sql(pd.read_excel(excel_path, engine=EXCEL_READ_ENGINE)))
+
+    results = []
+    dipendenze = []
+    dipendenze_inverse = []
+    elenco_tabelle = []
+    struttura_colonne = []
+    righe_per_db = {}
+    lavori = []
+
+    # Colonne estratte in blocco: niente Series (iterrows) ne' dict intermedio (to_dict) per riga
+    for params in iter_conn_params(df):
+        # --- RISULTATI --- (raccolti per DB, eseguiti in batch dopo il ciclo)
+        righe_per_db.setdefault((params['server'], params['db_name']), []).append(params)
+        lavori.append(params)
+
+    def _dettagli(params):
+        # get_engine e' thread-safe: l'engine di un DB viene creato dal primo worker che lo chiede
+        return estrai_dettagli_tabella(get_engine(params['server'], params['db_name']), params)
+
+    # Le tabelle sono indipendenti: le query girano in parallelo, una connessione per tabella.
+    # pyodbc rilascia il GIL durante execute/fetch, quindi i thread sovrappongono l'attesa di rete
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for dip, tab, col in executor.map(_dettagli, lavori):
+            dipendenze.extend(dip)
+            elenco_tabelle.extend(tab)
+            struttura_colonne.extend(col)
+
+    # --- RISULTATI ---
+    for (server, db_name), righe in righe_per_db.items():
+        estrai_risultati_batch(get_engine(server, db_name), righe, results)
+
+    # --- DIPENDENZE INVERSE --- (una query per blocco di tabelle dello stesso DB)
+    for (server, db_name), righe in righe_per_db.items():
+        estrai_dipendenze_inverse_batch(get_engine(server, db_name), righe, dipendenze_inverse)
+
+    # Colonne note a priori: ogni dict di un foglio ha esattamente queste chiavi
+    scrivi_fogli(output_path, (
+        (elenco_tabelle, ELENCO_TABELLE_FIELDS, 'ElencoTabelle'),
+        (struttura_colonne, STRUTTURA_COLONNE_FIELDS, 'StrutturaColonne'),
+        (results, RESULTS_FIELDS, 'Risultati'),
+        (RigheEspanse(dipendenze, riga_dipendenza), DIPENDENZE_FIELDS, 'Dipendenze'),
+        (RigheEspanse(dipendenze_inverse, riga_dipendenza_inversa), DIPENDENZE_INVERSE_FIELDS, 'DipendenzeTabella'),
+    ))
     print(f"Risultati esportati in: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -64,6 +64,12 @@ columns_sql_into_from_join = ['File_Name','Into','From','Join']
 
 ranges = _chunk_ranges(len(excel_files_list), CHUNK_SIZE)
 
+# I fogli SQL non dipendono dal range: file elencati e analizzati una volta sola,
+# poi scritti in ogni report
+sql_file_list_rows = bl_obj.sql_file_list()
+# SQL INTO/FROM/JOIN summary (all SQL files scanned)
+sql_into_from_join_rows = bl_obj.sql_into_from_join()
+
 for r_start, r_end in ranges:
     suffix = f"{r_start}-{r_end}"
     out_name = f"Report_Connessioni_{suffix}.xlsx"
@@ -76,16 +82,13 @@ for r_start, r_end in ranges:
     #aggregated_info_chunk = bl_obj.get_aggregated_info_for_files(paths_chunk)
     #writer.write_excel(columns_connessioni, aggregated_info_chunk, sheet_name='Connessioni')
     #connection_list_No_Power_Query_chunk = bl_obj.get_excel_connections_without_txt_for_files(paths_chunk)
-    connection_list_No_Power_Query_chunk = bl_obj.connessioni_xml(paths_chunk)
+    # Connessioni e JOIN in un solo passaggio sui workbook del range
+    connection_list_No_Power_Query_chunk, connection_list_with_join_chunk = bl_obj.connessioni_xml_e_join(paths_chunk)
     writer.write_excel(columns_connection_no_power_query, connection_list_No_Power_Query_chunk, sheet_name='Connessioni_Senza_Power_Query')
     # Foglio aggiuntivo con le informazioni di JOIN (solo File e Join)
     columns_connection_with_join = ['File_Name','Join']
-    connection_list_with_join_chunk = bl_obj.connessioni_xml_with_join(paths_chunk)
     writer.write_excel(columns_connection_with_join, connection_list_with_join_chunk, sheet_name='Connessioni_Join')
-    sql_file_list_chunk = bl_obj.sql_file_list()
-    writer.write_excel(columns_sql_list, sql_file_list_chunk, sheet_name='Lista file SQL')
-    # SQL INTO/FROM/JOIN summary (all SQL files scanned)
-    sql_into_from_join_rows = bl_obj.sql_into_from_join()
+    writer.write_excel(columns_sql_list, sql_file_list_rows, sheet_name='Lista file SQL')
     writer.write_excel(columns_sql_into_from_join, sql_into_from_join_rows, sheet_name='SQL_Into_From_Join')
     print(f"Creato: {out_name} per range {suffix}")
 
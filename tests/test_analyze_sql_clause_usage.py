@@ -151,3 +151,94 @@ def test_matches_bracketed_and_fully_qualified_names(tmp_path):
 
     clause = rows[0][-1]
     assert "FROM" in clause
+
+
+def test_overlapping_clauses_found_in_single_pass():
+    analyzer = SQLClauseAnalyzer.__new__(SQLClauseAnalyzer)
+
+    script = "DELETE FROM dbo.MyTable; SELECT * FROM a LEFT JOIN dbo.MyTable b ON 1=1"
+
+    # Clauses that share text (DELETE FROM / FROM, LEFT JOIN / JOIN) are all reported,
+    # in the declared clause order
+    assert analyzer._find_sql_clauses(script, "dbo", "MyTable") == ["DELETE FROM", "LEFT JOIN", "JOIN", "FROM"]
+
+
+def test_script_is_scanned_once_for_all_referenced_tables():
+    analyzer = SQLClauseAnalyzer.__new__(SQLClauseAnalyzer)
+    SQLClauseAnalyzer._scan_clause_refs.cache_clear()
+
+    script = "INSERT INTO dbo.Target SELECT * FROM dbo.Source s JOIN dbo.Lookup l ON 1=1"
+
+    assert analyzer._find_sql_clauses(script, "dbo", "Target") == ["INSERT INTO"]
+    assert analyzer._find_sql_clauses(script, "dbo", "Source") == ["FROM"]
+    assert analyzer._find_sql_clauses(script, "DBO", "lookup") == ["JOIN"]
+
+    info = SQLClauseAnalyzer._scan_clause_refs.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+
+def test_write_pass_skipped_without_write_keywords(monkeypatch):
+    scanned = []
+
+    class _Spy:
+        def __init__(self, label, regex):
+            self.label, self.regex = label, regex
+
+        def finditer(self, text):
+            scanned.append(self.label)
+            return self.regex.finditer(text)
+
+    (write_kw, write_re), (read_kw, read_re) = SQLClauseAnalyzer.CLAUSE_PASSES
+    monkeypatch.setattr(SQLClauseAnalyzer, "CLAUSE_PASSES", [
+        (write_kw, _Spy("write", write_re)),
+        (read_kw, _Spy("read", read_re)),
+    ])
+    SQLClauseAnalyzer._scan_clause_refs.cache_clear()
+    analyzer = SQLClauseAnalyzer.__new__(SQLClauseAnalyzer)
+
+    assert analyzer._find_sql_clauses("SELECT * FROM dbo.T1 -- insert into dbo.T1", "dbo", "T1") == ["FROM"]
+    assert scanned == ["read"]
+    SQLClauseAnalyzer._scan_clause_refs.cache_clear()
+
+
+def test_parallel_scan_matches_sequential(tmp_path, monkeypatch):
+    import estrazione_sp.Analyze_SQL_Clause_Usage as mod
+
+    xlsx_in = tmp_path / "in.xlsx"
+    rows = []
+    for i in range(6):
+        script = f"CREATE PROCEDURE dbo.usp_{i} AS UPDATE dbo.T{i} SET c = 1; SELECT * FROM dbo.T{i + 1};"
+        rows.append(["EPCP3", "db1", "dbo", f"T{i}", f"dbo.usp_{i}", "Stored Procedure", script])
+        rows.append(["EPCP3", "db1", "dbo", f"T{i + 1}", f"dbo.usp_{i}", "Stored Procedure", script])
+    _write_input_excel(str(xlsx_in), rows=rows)
+
+    results = {}
+    for label, workers, threshold in (("seq", 1, 1000), ("par", 2, 1)):
+        monkeypatch.setattr(mod, "MAX_PROCESSES", workers)
+        monkeypatch.setattr(mod, "PARALLEL_MIN_SCRIPTS", threshold)
+        xlsx_out = tmp_path / f"out_{label}.xlsx"
+        SQLClauseAnalyzer(str(xlsx_in), str(xlsx_out), sheet_name="Sheet1").process()
+        results[label] = _read_output_rows(str(xlsx_out))
+
+    assert results["par"] == results["seq"]
+    assert [r[-1] for r in results["seq"][:2]] == ["UPDATE", "FROM"]
+
+
+def test_single_file_fallback_writes_rows(tmp_path, monkeypatch):
+    # Report.Excel_Writer non disponibile: si usa il salvataggio su singolo file
+    monkeypatch.setitem(sys.modules, "Report.Excel_Writer", None)
+    inp = tmp_path / "in.xlsx"
+    out = tmp_path / "out.xlsx"
+    _write_input_excel(str(inp), [])
+    analyzer = SQLClauseAnalyzer(str(inp), str(out))
+
+    analyzer._create_output_excel([
+        ("S", "D", "dbo", "T1", "usp_a", "SQL_STORED_PROCEDURE", "SELECT 1 FROM dbo.T1", "FROM"),
+        ("S", "D", "dbo", "T2", "usp_b", "SQL_STORED_PROCEDURE", "DELETE dbo.T2", "DELETE"),
+    ])
+
+    wb = openpyxl.load_workbook(str(out))
+    ws = wb.active
+    assert ws["A1"].value == "Server" and ws["A1"].font.bold
+    wb.close()
+    assert [(r[3], r[7]) for r in _read_output_rows(str(out))] == [("T1", "FROM"), ("T2", "DELETE")]
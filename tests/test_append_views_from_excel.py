@@ -62,3 +62,18 @@ def test_handles_empty_ddl(tmp_path):
     assert "-- 1 srvD\\dbD\\schD\\viewD.sql" in txt
     # The file should end with a newline
     assert txt.endswith("\n")
+
+
+def test_missing_view_name_is_taken_from_ddl(tmp_path):
+    rows = [
+        ["srvE", "dbE", "", "", "view", "create or alter view [schE].[viewE] as select 1 as c;"],
+        ["srvF", "dbF", "", "", "view", "CREATE VIEW viewF AS SELECT 1 AS c;"],
+    ]
+    excel_path = create_excel(rows)
+    out_txt = tmp_path / "out.txt"
+
+    ViewsDDLAppender(excel_path, str(out_txt), sheet_name="Sheet1").run()
+
+    txt = read_text(str(out_txt))
+    assert "-- 1 srvE\\dbE\\schE\\viewE.sql" in txt
+    assert "-- 2 srvF\\dbF\\viewF.sql" in txt
@@ -0,0 +1,159 @@
+import os
+import sys
+
+# Ensure workspace root in path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from openpyxl import load_workbook
+
+import Report.Excel_Writer as ew
+
+
+def test_rows_are_streamed_into_parts(tmp_path, monkeypatch):
+    # openpyxl write_only fallback
+    monkeypatch.setattr(ew, "xlsxwriter", None)
+    monkeypatch.setattr(ew, "_DATA_ROWS_PER_SHEET", 2)
+    base = str(tmp_path / "out.xlsx")
+
+    rows = ((i, f"r{i}") for i in range(5))
+    written = ew.write_rows_split_across_files(["Id", "Nome"], rows, base, sheet_name="Dati", column_widths=[8, 20])
+
+    assert written == [base, str(tmp_path / "out_part2.xlsx"), str(tmp_path / "out_part3.xlsx")]
+    ws = load_workbook(written[0])["Dati"]
+    assert [[c.value for c in r] for r in ws.iter_rows()] == [["Id", "Nome"], [0, "r0"], [1, "r1"]]
+    assert ws["A1"].font.bold
+    assert ws.column_dimensions["B"].width == 20
+    last = load_workbook(written[2])["Dati"]
+    assert [[c.value for c in r] for r in last.iter_rows()] == [["Id", "Nome"], [4, "r4"]]
+
+
+def test_rows_are_streamed_with_xlsxwriter_constant_memory(tmp_path, monkeypatch):
+    import pytest
+
+    pytest.importorskip("xlsxwriter")
+    monkeypatch.setattr(ew, "_DATA_ROWS_PER_SHEET", 2)
+    base = str(tmp_path / "sub" / "out.xlsx")
+
+    rows = ((i, f"=r{i}") for i in range(3))
+    written = ew.write_rows_split_across_files(["Id", "Nome"], rows, base, sheet_name="Dati", column_widths=[8, 20])
+
+    assert written == [base, str(tmp_path / "sub" / "out_part2.xlsx")]
+    ws = load_workbook(written[0])["Dati"]
+    # Strings are written as text, never as formulas
+    assert [[c.value for c in r] for r in ws.iter_rows()] == [["Id", "Nome"], [0, "=r0"], [1, "=r1"]]
+    assert ws["A1"].font.bold
+    # xlsxwriter stores the Excel column width including cell padding
+    assert round(ws.column_dimensions["B"].width) == 21
+    last = load_workbook(written[1])["Dati"]
+    assert [[c.value for c in r] for r in last.iter_rows()] == [["Id", "Nome"], [2, "=r2"]]
+
+
+def test_non_finite_floats_are_written_as_blank_cells(tmp_path, monkeypatch):
+    import pandas as pd
+
+    rows = [["a", float("nan")], ["b", float("inf")], ["c", float("-inf")], ["d", 1.5]]
+    expected = [["Nome", "Valore"], ["a", None], ["b", None], ["c", None], ["d", 1.5]]
+    for engine in (ew.xlsxwriter, None):
+        if engine is None:
+            monkeypatch.setattr(ew, "xlsxwriter", None)
+        base = str(tmp_path / f"nan_{engine is None}.xlsx")
+
+        ew.write_rows_split_across_files(["Nome", "Valore"], rows, base)
+        ws = load_workbook(base).active
+        assert [[c.value for c in r] for r in ws.iter_rows()] == expected
+
+        df_base = str(tmp_path / f"nan_df_{engine is None}.xlsx")
+        ew.write_dataframe_split_across_files(pd.DataFrame(rows, columns=["Nome", "Valore"]), df_base)
+        ws = load_workbook(df_base).active
+        assert [[c.value for c in r] for r in ws.iter_rows()] == expected
+
+
+def test_cells_after_an_over_long_string_are_kept(tmp_path, monkeypatch, capsys):
+    headers = ["Server", "DB", "Schema", "Table", "ObjectName", "ObjectType", "Definition", "Clause"]
+    rows = [
+        ["S", "D", "dbo", "T", "usp_a", "P", "x" * 40000, "FROM"],
+        ["S", "D", "dbo", "T", "usp_b", "P", "short", "JOIN"],
+    ]
+    for engine in (ew.xlsxwriter, None):
+        if engine is None:
+            monkeypatch.setattr(ew, "xlsxwriter", None)
+        base = str(tmp_path / f"long_{engine is None}.xlsx")
+
+        ew.write_rows_split_across_files(headers, rows, base)
+
+        values = [[c.value for c in r] for r in load_workbook(base).active.iter_rows(min_row=2)]
+        # The over-long cell is cut at Excel's limit by both engines; later columns survive
+        assert values[0][6] == "x" * ew.EXCEL_MAX_CELL_CHARS
+        assert values[0][7] == "FROM"
+        assert values[1] == rows[1]
+        if engine is not None:
+            # xlsxwriter reports the truncated cell instead of cutting it silently
+            assert "row 2, column Definition truncated" in capsys.readouterr().out
+
+
+def test_empty_rows_still_write_header(tmp_path):
+    base = str(tmp_path / "empty.xlsx")
+
+    written = ew.write_rows_split_across_files(["Id"], [], base)
+
+    assert written == [base]
+    ws = load_workbook(base).active
+    assert [[c.value for c in r] for r in ws.iter_rows()] == [["Id"]]
+
+
+def test_dataframe_split_streams_rows_and_blanks_missing(tmp_path, monkeypatch):
+    import pandas as pd
+
+    monkeypatch.setattr(ew, "_DATA_ROWS_PER_SHEET", 2)
+    base = str(tmp_path / "df.xlsx")
+    df = pd.DataFrame(
+        {
+            "Nome": ["a", "b", "c"],
+            "Valore": [1.5, float("nan"), 3.0],
+            "Intero": pd.array([1, None, 3], dtype="Int64"),
+        }
+    )
+
+    written = ew.write_dataframe_split_across_files(df, base, sheet_name="Dati")
+
+    assert written == [base, str(tmp_path / "df_part2.xlsx")]
+    first = load_workbook(written[0])["Dati"]
+    assert [[c.value for c in r] for r in first.iter_rows()] == [
+        ["Nome", "Valore", "Intero"],
+        ["a", 1.5, 1],
+        ["b", None, None],
+    ]
+    second = load_workbook(written[1])["Dati"]
+    assert [[c.value for c in r] for r in second.iter_rows()] == [["Nome", "Valore", "Intero"], ["c", 3, 3]]
+
+
+def test_write_excel_strips_illegal_characters(tmp_path):
+    writer = ew.ExcelWriter(str(tmp_path), "report.xlsx")
+
+    writer.write_excel(["Nome", "Valore"], [["a\x01b", 1], ["pulito", None]], sheet_name="Dati\x02")
+
+    ws = load_workbook(str(tmp_path / "report.xlsx"))["Dati"]
+    assert [[c.value for c in r] for r in ws.iter_rows()] == [["Nome", "Valore"], ["ab", 1], ["pulito", None]]
+
+
+def test_illegal_characters_table_matches_regex():
+    text = "".join(chr(c) for c in range(0x80))
+    assert text.translate(ew._ILLEGAL_CHARS_TABLE) == ew._ILLEGAL_CHARS.sub("", text)
+
+
+def test_repeated_cell_strings_are_cleaned_once(tmp_path):
+    ew._clean_cached.cache_clear()
+    writer = ew.ExcelWriter(str(tmp_path), "report.xlsx")
+    long_value = "x\x03" * ew._CLEAN_CACHE_MAX_LEN
+
+    writer.write_excel(["Server", "Def"], [["srv\x01", long_value]] * 5, sheet_name="Dati")
+
+    ws = load_workbook(str(tmp_path / "report.xlsx"))["Dati"]
+    rows = [[c.value for c in r] for r in ws.iter_rows()]
+    assert rows[1:] == [["srv", "x" * ew._CLEAN_CACHE_MAX_LEN]] * 5
+    info = ew._clean_cached.cache_info()
+    # Only the short values enter the cache (sheet name + server), repeats are hits
+    assert info.currsize == 2
+    assert info.misses == 2 and info.hits == 4
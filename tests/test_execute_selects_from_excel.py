@@ -73,3 +73,56 @@ finally:
             pass
         else:
             mod.pyodbc.connect = orig_connect
+
+
+def test_selects_run_in_parallel_keep_input_order(tmp_path, monkeypatch):
+    import threading
+    import time
+
+    xlsx_in = tmp_path / 'Selects.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Select'])
+    selects = [f'SELECT {i}' if i % 3 else f'SELECT FAIL {i}' for i in range(1, 13)]
+    for s in selects:
+        ws.append([s])
+    wb.save(xlsx_in)
+
+    opened = []
+
+    class SlowCursor(FakeCursor):
+        def execute(self, sql):
+            # Later selects finish first: the output must still follow input order
+            time.sleep(0.002 * (13 - int(sql.split()[-1])))
+            super().execute(sql)
+
+    class TrackingConn(FakeConn):
+        def __init__(self):
+            self.thread = threading.get_ident()
+            self.closed = False
+
+        def cursor(self):
+            # Each connection is only used by the thread that opened it
+            assert threading.get_ident() == self.thread
+            return SlowCursor()
+
+        def close(self):
+            self.closed = True
+
+    def connect(conn_str, timeout=None):
+        conn = TrackingConn()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(mod, 'pyodbc', SimpleNamespace(connect=connect))
+    monkeypatch.setattr(mod, 'MAX_WORKERS', 4)
+    monkeypatch.setattr(SelectsExecutor, '_build_conn_str', lambda self: 'DRIVER={stub};')
+
+    out = SelectsExecutor(str(xlsx_in), str(tmp_path / 'Esiti.xlsx')).run()
+
+    df = pd.read_excel(out).fillna('')
+    assert list(df['Select']) == selects
+    assert [bool(e) for e in df['Errore']] == ['FAIL' in s for s in selects]
+    # One connection per worker thread (the probe connection is stubbed out), all closed
+    assert 1 <= len(opened) <= 4
+    assert all(c.closed for c in opened)
@@ -0,0 +1,66 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import Export_Parsed_PowerQuery_Connections as mod
+from BusinessLogic.PowerQuerySourceConnectionParser import PowerQuerySourceConnectionParser
+
+
+class _CountingParser(PowerQuerySourceConnectionParser):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def parse_all(self, source):
+        self.calls.append(source)
+        return super().parse_all(source)
+
+
+def test_each_distinct_source_is_parsed_once():
+    src = 'Source = Sql.Database("EPCP3", "S1057B", [Query="SELECT * FROM S1259.dbo.A JOIN dbo.B b ON 1=1"])'
+    rows = [("p1", "a.xlsx", src), ("p2", "b.xlsx", "not a source"), ("p3", "c.xlsx", src)]
+    parser = _CountingParser()
+
+    parsed = mod.parse_sources(rows, parser)
+
+    assert parser.calls == [src, "not a source"]
+    assert parsed == parse_uncached(rows)
+    assert parsed[0][2:7] == parsed[2][2:7]
+
+
+def parse_uncached(rows):
+    # Reference: one parse per row, as the original loop did
+    parser = PowerQuerySourceConnectionParser()
+    out = []
+    for path, file, source in rows:
+        infos = parser.parse_all(source) or ([parser.parse(source)] if parser.parse(source) else [])
+        if not infos:
+            out.append((path, file, None, None, None, None, "", source))
+            continue
+        p = infos[0]
+        join_str = "; ".join(
+            ".".join(x for x in (i.get("database"), i.get("schema"), i.get("table")) if x) for i in infos[1:]
+        )
+        out.append((path, file, p.get("server"), p.get("database"), p.get("schema"), p.get("table"), join_str, source))
+    return out
+
+
+def test_read_sources_uses_header_positions(tmp_path):
+    from openpyxl import Workbook
+
+    path = tmp_path / "sources.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Source", "Extra", "File", "Path"])
+    ws.append(["Source = x", 1, "a.xlsx", "p1"])
+    ws.append([None, 2, "b.xlsx", "p2"])
+    ws.append(["Source = y", 3, None, None])
+    wb.save(path)
+
+    assert mod.read_sources_from_excel(str(path)) == [
+        ("p1", "a.xlsx", "Source = x"),
+        ("", "", "Source = y"),
+    ]
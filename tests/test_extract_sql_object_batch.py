@@ -0,0 +1,418 @@
+import os
+import re
+import sys
+
+# Ensure workspace root in path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import extract_sql_object_from_report_connessioni as mod
+
+
+class _FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def execute(self, stmt, params=None):
+        self.statements.append((str(stmt), params))
+        return iter(self.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FakeEngine:
+    def __init__(self, rows):
+        self.conn = _FakeConn(rows)
+
+    def connect(self):
+        return self.conn
+
+
+class _ChunkConn(_FakeConn):
+    """Only returns the rows whose table index was bound in the statement."""
+
+    def execute(self, stmt, params=None):
+        super().execute(stmt, params)
+        return iter([r for r in self.rows if f"t{r[0]}" in params])
+
+
+def _params(file_name, schema, table):
+    return {
+        "server": "EPCP3",
+        "db_name": "db1",
+        "schema": schema,
+        "table": table,
+        "file_name": file_name,
+        "type": "sql",
+        "schema_valid": bool(schema),
+        "file_names": [file_name],
+    }
+
+
+def test_batch_dispatches_modules_to_every_requesting_row():
+    modules = [
+        ("usp_load", "SQL_STORED_PROCEDURE", "INSERT INTO dbo.T9 SELECT * FROM [dbo].[T1]"),
+        ("v_t2", "VIEW", "select * from t2 x join dbo.T1 y on 1=1"),
+        ("usp_other", "SQL_STORED_PROCEDURE", "SELECT 1 FROM dbo.T3"),
+    ]
+    engine = _FakeEngine(modules)
+    righe = [_params("a.xlsx", "dbo", "T1"), _params("b.xlsx", "dbo", "T1"), _params("c.xlsx", None, "T2")]
+
+    results = []
+    mod.estrai_risultati_batch(engine, righe, results)
+
+    # Module definitions are read once for the whole database
+    assert len(engine.conn.statements) == 1
+
+    assert [(r["FileName"], r["Table"], r["ObjectName"]) for r in results] == [
+        ("a.xlsx", "dbo.T1", "usp_load"),
+        ("b.xlsx", "dbo.T1", "usp_load"),
+        ("a.xlsx", "dbo.T1", "v_t2"),
+        ("b.xlsx", "dbo.T1", "v_t2"),
+        ("c.xlsx", "T2", "v_t2"),
+    ]
+    # Rows carry exactly the fixed export columns
+    assert all(tuple(r) == mod.RESULTS_FIELDS for r in results)
+
+
+def test_filter_keeps_complete_sql_rows_and_flags_schema():
+    import pandas as pd
+
+    df = pd.DataFrame(
+        [
+            {"File_Name": "a", "Type": "SQL", "Server": "S", "Database": "D", "Schema": "dbo", "Table": "T1"},
+            {"File_Name": "b", "Type": "sql", "Server": "S", "Database": "D", "Schema": None, "Table": "T2"},
+            {"File_Name": "c", "Type": "excel", "Server": "S", "Database": "D", "Schema": "dbo", "Table": "T3"},
+            {"File_Name": "d", "Type": "sql", "Server": "S", "Database": None, "Schema": "dbo", "Table": "T4"},
+            {"File_Name": "e", "Type": "sql", "Server": "S", "Database": "D", "Schema": "dbo", "Table": ""},
+        ]
+    )
+
+    out = mod.filtra_righe_sql(df)
+
+    assert list(out["File_Name"]) == ["a", "b"]
+    assert list(out["schema_valid"]) == [True, False]
+
+
+def test_duplicate_tables_are_collapsed_keeping_all_file_names():
+    import pandas as pd
+
+    df = pd.DataFrame(
+        [
+            {"File_Name": "a", "Type": "sql", "Server": "S", "Database": "D", "Schema": "dbo", "Table": "T1"},
+            {"File_Name": "b", "Type": "sql", "Server": "S", "Database": "D", "Schema": None, "Table": "T2"},
+            {"File_Name": "c", "Type": "sql", "Server": "S", "Database": "D", "Schema": "dbo", "Table": "T1"},
+            {"File_Name": "d", "Type": "sql", "Server": "S", "Database": "D", "Schema": None, "Table": "T2"},
+        ]
+    )
+
+    out = mod.raggruppa_duplicati(df)
+
+    assert list(out["Table"]) == ["T1", "T2"]
+    assert list(out["file_names"]) == [["a", "c"], ["b", "d"]]
+
+
+def test_single_pass_keeps_prefix_matches_of_longer_tables():
+    modules = [("v_t10", "VIEW", "SELECT * FROM dbo.T10")]
+    engine = _FakeEngine(modules)
+    righe = [_params("a.xlsx", "dbo", "T10"), _params("b.xlsx", "dbo", "T1")]
+
+    results = []
+    mod.estrai_risultati_batch(engine, righe, results)
+
+    # Same substring semantics as CHARINDEX: 'FROM dbo.T1' is found inside 'FROM dbo.T10'
+    assert [(r["FileName"], r["Table"]) for r in results] == [
+        ("a.xlsx", "dbo.T10"),
+        ("b.xlsx", "dbo.T1"),
+    ]
+
+
+def test_conn_params_from_grouped_records():
+    import pandas as pd
+
+    df = pd.DataFrame(
+        [
+            {"File_Name": "a", "Type": "sql", "Server": "S", "Database": "D", "Schema": "dbo", "Table": "T1"},
+            {"File_Name": "b", "Type": "sql", "Server": "S", "Database": "D", "Schema": "dbo", "Table": "T1"},
+            {"File_Name": "c", "Type": "sql", "Server": "S", "Database": "D", "Schema": None, "Table": "T2"},
+        ]
+    )
+
+    params = [mod.get_conn_params(r) for r in mod.raggruppa_duplicati(mod.filtra_righe_sql(df)).to_dict("records")]
+
+    assert [(p["table"], p["schema_valid"], p["file_names"]) for p in params] == [
+        ("T1", True, ["a", "b"]),
+        ("T2", False, ["c"]),
+    ]
+
+
+def test_iter_conn_params_matches_per_record_params():
+    import pandas as pd
+
+    df = pd.DataFrame(
+        [
+            {"File_Name": "a", "Type": "sql", "Server": "S", "Database": "D", "Schema": "dbo", "Table": "T1"},
+            {"File_Name": "b", "Type": "sql", "Server": "S", "Database": "D", "Schema": "dbo", "Table": "T1"},
+            {"File_Name": "c", "Type": "sql", "Server": "S", "Database": "D2", "Schema": None, "Table": "T2"},
+        ]
+    )
+    grouped = mod.raggruppa_duplicati(mod.filtra_righe_sql(df))
+
+    assert list(mod.iter_conn_params(grouped)) == [mod.get_conn_params(r) for r in grouped.to_dict("records")]
+    # Missing optional columns behave like row.get()
+    plain = df.drop(columns=["Schema"])
+    assert list(mod.iter_conn_params(plain)) == [mod.get_conn_params(r) for r in plain.to_dict("records")]
+
+
+def test_inverse_dependencies_use_one_query_per_database(monkeypatch):
+    monkeypatch.setattr(mod, "INVERSE_BATCH_SIZE", 2)
+    # (k, referencing object, referencing type, referenced entity, referenced type)
+    rows = [
+        (2, "v_t2", "OBJECT_OR_COLUMN", "T2", "OBJECT_OR_COLUMN"),
+        (0, "usp_load", "OBJECT_OR_COLUMN", "T1", "OBJECT_OR_COLUMN"),
+    ]
+    engine = _FakeEngine(rows)
+    engine.conn = _ChunkConn(rows)
+    righe = [_params("a.xlsx", "dbo", "T1"), _params("b.xlsx", "dbo", "T9"), _params("c.xlsx", None, "T2")]
+    righe[0]["file_names"] = ["a.xlsx", "a2.xlsx"]
+
+    results = []
+    mod.estrai_dipendenze_inverse_batch(engine, righe, results)
+
+    # Three tables in chunks of two: two statements instead of three
+    assert len(engine.conn.statements) == 2
+    sql, params = engine.conn.statements[0]
+    assert "sys.sql_expression_dependencies" in sql
+    assert params == {"t0": "T1", "f0": "dbo.T1", "t1": "T9", "f1": "dbo.T9"}
+    assert engine.conn.statements[1][1] == {"t2": "T2", "f2": "T2"}
+
+    # One edge per dependency; rows are replicated for every file name when expanded
+    assert len(results) == 2
+    righe_out = list(mod.RigheEspanse(results, mod.riga_dipendenza_inversa))
+    # Rows follow input order
+    campi = [dict(zip(mod.DIPENDENZE_INVERSE_FIELDS, r)) for r in righe_out]
+    assert [(r["FileName"], r["Table"], r["ReferencingObject"]) for r in campi] == [
+        ("a.xlsx", "dbo.T1", "usp_load"),
+        ("a2.xlsx", "dbo.T1", "usp_load"),
+        ("c.xlsx", "T2", "v_t2"),
+    ]
+    # Flat tuples laid out on the sheet's fixed columns
+    assert all(len(r) == len(mod.DIPENDENZE_INVERSE_FIELDS) for r in righe_out)
+
+
+def test_equal_dependency_edges_share_one_tuple():
+    # Built from distinct string objects, as rows coming from different queries
+    first = mod.arco_condiviso("".join(["T", "1"]), "".join(["OBJECT_", "OR_COLUMN"]))
+    second = mod.arco_condiviso("".join(["T", "1"]), "".join(["OBJECT_", "OR_COLUMN"]))
+
+    assert first == ("T1", "OBJECT_OR_COLUMN")
+    assert first is second
+    assert first[1] is sys.intern("OBJECT_OR_COLUMN")
+    # Non-string values (e.g. NULL class desc) are kept as they are
+    assert mod.arco_condiviso("T1", None) == ("T1", None)
+
+
+def test_repeated_inverse_dependencies_become_one_edge():
+    # Schema-bound objects report one row per referenced column
+    rows = [
+        (0, "v_bound", "OBJECT_OR_COLUMN", "T1", "OBJECT_OR_COLUMN"),
+        (0, "v_bound", "OBJECT_OR_COLUMN", "T1", "OBJECT_OR_COLUMN"),
+        (0, "usp_load", "OBJECT_OR_COLUMN", "T1", "OBJECT_OR_COLUMN"),
+        (0, "v_bound", "OBJECT_OR_COLUMN", "T1", "OBJECT_OR_COLUMN"),
+    ]
+    engine = _FakeEngine(rows)
+    results = []
+
+    mod.estrai_dipendenze_inverse_batch(engine, [_params("a.xlsx", "dbo", "T1")], results)
+
+    assert [arco[1] for _, arco in results] == ["v_bound", "usp_load"]
+
+
+class _CatalogConn(_FakeConn):
+    """sys.objects/sys.sql_modules rows (name, type, type_desc, definition), filtered on the
+    o.type IN (...) list of the executed statement the way the server would."""
+
+    def execute(self, stmt, params=None):
+        super().execute(stmt, params)
+        types = re.search(r"o\.type IN \(([^)]*)\)", str(stmt)).group(1)
+        codes = {code.strip().strip("'") for code in types.split(",")}
+        return iter([(name, desc, definition) for name, code, desc, definition in self.rows if code in codes])
+
+
+def test_load_modules_keeps_procedures_triggers_and_functions_only():
+    engine = _FakeEngine([])
+    engine.conn = _CatalogConn([
+        ("usp_load", "P", "SQL_STORED_PROCEDURE", "CREATE PROCEDURE usp_load AS SELECT 1 FROM dbo.T1"),
+        ("trg_t1", "TR", "SQL_TRIGGER", "CREATE TRIGGER trg_t1 ON dbo.T1"),
+        ("tvf_t1", "TF", "SQL_TABLE_VALUED_FUNCTION", "CREATE FUNCTION tvf_t1() RETURNS @r TABLE"),
+        ("fn_t1", "FN", "SQL_SCALAR_FUNCTION", None),
+        ("v_t1", "V", "VIEW", "CREATE VIEW v_t1 AS SELECT 1 FROM dbo.T1"),
+        ("itvf_t1", "IF", "SQL_INLINE_TABLE_VALUED_FUNCTION", "CREATE FUNCTION itvf_t1() RETURNS TABLE"),
+    ])
+
+    moduli = mod.carica_moduli(engine)
+
+    # Views and inline functions are filtered out by the type codes, not returned
+    assert [(nome, tipo) for nome, tipo, _, _ in moduli] == [
+        ("usp_load", "SQL_STORED_PROCEDURE"),
+        ("trg_t1", "SQL_TRIGGER"),
+        ("tvf_t1", "SQL_TABLE_VALUED_FUNCTION"),
+        ("fn_t1", "SQL_SCALAR_FUNCTION"),
+    ]
+    assert moduli[0][3] == "create procedure usp_load as select 1 from dbo.t1"
+    # A NULL definition (encrypted module) is searched as an empty string
+    assert moduli[3][2:] == (None, "")
+    assert len(engine.conn.statements) == 1
+
+
+def test_sheets_are_streamed_from_record_dicts(tmp_path, monkeypatch):
+    from openpyxl import load_workbook
+
+    path = str(tmp_path / "out.xlsx")
+    righe = [
+        {"FileName": "a.xlsx", "Database": "D", "Table": "T1", "ObjectName": "T1", "ObjectType": None,
+         "Dipendenza": "=T2", "DipendenzaType": "OBJECT_OR_COLUMN"},
+    ]
+    fogli = ((righe, mod.DIPENDENZE_FIELDS, "Dipendenze"), ([], mod.RESULTS_FIELDS, "Risultati"))
+
+    for engine in (mod.xlsxwriter, None):
+        if engine is None:
+            monkeypatch.setattr(mod, "xlsxwriter", None)
+        mod.scrivi_fogli(path, fogli)
+
+        wb = load_workbook(path)
+        assert wb.sheetnames == ["Dipendenze", "Risultati"]
+        assert [list(r) for r in wb["Dipendenze"].iter_rows(values_only=True)] == [
+            list(mod.DIPENDENZE_FIELDS),
+            ["a.xlsx", "D", "T1", "T1", None, "=T2", "OBJECT_OR_COLUMN"],
+        ]
+        assert [list(r) for r in wb["Risultati"].iter_rows(values_only=True)] == [list(mod.RESULTS_FIELDS)]
+
+
+def test_long_definition_is_truncated_without_losing_later_columns(tmp_path, capsys):
+    import pytest
+    from openpyxl import load_workbook
+
+    pytest.importorskip("xlsxwriter")
+    path = str(tmp_path / "out.xlsx")
+    definition = "CREATE PROCEDURE usp_big AS " + "x" * 40000
+    results = [
+        {"FileName": "a.xlsx", "Server": "S", "Database": "D", "Table": "T1", "Type": "sql",
+         "ObjectName": "usp_big", "ObjectType": "SQL_STORED_PROCEDURE", "SQLDefinition": definition},
+    ]
+    # Same record with the definition in a middle column, as in the other sheets
+    colonne = ("FileName", "SQLDefinition", "ObjectName", "ObjectType")
+
+    mod.scrivi_fogli(path, ((results, mod.RESULTS_FIELDS, "Risultati"), (results, colonne, "Centrale")))
+
+    wb = load_workbook(path)
+    [riga] = wb["Risultati"].iter_rows(min_row=2, values_only=True)
+    assert riga[-1] == definition[:mod.EXCEL_MAX_CELL_CHARS]
+    [riga] = wb["Centrale"].iter_rows(min_row=2, values_only=True)
+    # The columns after the truncated definition are still written
+    assert riga == ("a.xlsx", definition[:mod.EXCEL_MAX_CELL_CHARS], "usp_big", "SQL_STORED_PROCEDURE")
+    out = capsys.readouterr().out
+    assert "Foglio Risultati: riga 2, colonna SQLDefinition troncata" in out
+    assert "Foglio Centrale: riga 2, colonna SQLDefinition troncata" in out
+
+
+def test_dependency_edges_are_expanded_per_file_name_while_writing(tmp_path, monkeypatch):
+    from openpyxl import load_workbook
+
+    params = _params("a.xlsx", "dbo", "T1")
+    params["file_names"] = ["a.xlsx", "b.xlsx"]
+    archi = [(params, ("T2", "OBJECT_OR_COLUMN")), (params, ("T3", "OBJECT_OR_COLUMN"))]
+    righe = mod.RigheEspanse(archi, mod.riga_dipendenza)
+
+    assert len(righe) == 4
+    assert next(iter(righe)) == ("a.xlsx", "db1", "T1", "T1", None, "T2", "OBJECT_OR_COLUMN")
+    path = str(tmp_path / "out.xlsx")
+    for engine in (mod.xlsxwriter, None):
+        if engine is None:
+            monkeypatch.setattr(mod, "xlsxwriter", None)
+        mod.scrivi_fogli(path, ((righe, mod.DIPENDENZE_FIELDS, "Dipendenze"),))
+
+        rows = list(load_workbook(path)["Dipendenze"].iter_rows(values_only=True))
+        assert [(r[0], r[5]) for r in rows[1:]] == [
+            ("a.xlsx", "T2"), ("b.xlsx", "T2"), ("a.xlsx", "T3"), ("b.xlsx", "T3"),
+        ]
+
+
+def test_sheets_over_excel_limit_go_to_parquet(tmp_path, monkeypatch):
+    import types
+    from openpyxl import load_workbook
+
+    written = {}
+
+    class _Table(dict):
+        pass
+
+    monkeypatch.setattr(mod, "pa", types.SimpleNamespace(table=_Table))
+    monkeypatch.setattr(mod, "pq", types.SimpleNamespace(
+        write_table=lambda table, path, compression=None: written.update({path: (dict(table), compression)})
+    ))
+    monkeypatch.setattr(mod, "EXCEL_MAX_DATA_ROWS", 1)
+
+    path = str(tmp_path / "out.xlsx")
+    tabelle = [{"Nome Tabella": "T1", "Schema": "dbo", "Tipo": "U", "Descrizione": None}]
+    inverse = [
+        {"FileName": f, "Database": "D", "Table": "T1", "ReferencingObject": "p", "ReferencingType": "P",
+         "ReferencedEntity": "T1", "ReferencedType": "U"}
+        for f in ("a.xlsx", "b.xlsx")
+    ]
+    params = _params("a.xlsx", "dbo", "T1")
+    params["file_names"] = ["a.xlsx", "b.xlsx"]
+    dipendenze = mod.RigheEspanse([(params, ("T2", "OBJECT_OR_COLUMN"))], mod.riga_dipendenza)
+    mod.scrivi_fogli(path, (
+        (tabelle, mod.ELENCO_TABELLE_FIELDS, "ElencoTabelle"),
+        (inverse, mod.DIPENDENZE_INVERSE_FIELDS, "DipendenzeTabella"),
+        (dipendenze, mod.DIPENDENZE_FIELDS, "Dipendenze"),
+    ))
+
+    assert load_workbook(path).sheetnames == ["ElencoTabelle"]
+    columns, compression = written[str(tmp_path / "out_DipendenzeTabella.parquet")]
+    assert compression == "zstd"
+    assert list(columns) == list(mod.DIPENDENZE_INVERSE_FIELDS)
+    assert columns["FileName"] == ["a.xlsx", "b.xlsx"]
+    # Tuple rows are read by position
+    columns, _ = written[str(tmp_path / "out_Dipendenze.parquet")]
+    assert list(columns) == list(mod.DIPENDENZE_FIELDS)
+    assert columns["FileName"] == ["a.xlsx", "b.xlsx"]
+    assert columns["Dipendenza"] == ["T2", "T2"]
+
+
+def test_get_engine_creates_one_engine_per_database_across_threads(monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    created = []
+    start = threading.Barrier(8)
+
+    class _Engine:
+        pass
+
+    def fake_create_engine(conn_str, **kwargs):
+        created.append(conn_str)
+        return _Engine()
+
+    monkeypatch.setattr(mod, "_engines", {})
+    monkeypatch.setattr(mod, "_engine_key_locks", {})
+    monkeypatch.setattr(mod, "create_engine", fake_create_engine)
+    monkeypatch.setattr(mod.event, "listens_for", lambda *a: (lambda fn: fn))
+
+    def worker(i):
+        start.wait()
+        return mod.get_engine("S", f"db{i % 2}")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        engines = list(executor.map(worker, range(8)))
+
+    assert len(created) == 2
+    assert len({id(e) for e in engines}) == 2
+    assert engines[0] is engines[2] is engines[4]
@@ -0,0 +1,31 @@
+import os
+import sys
+
+BASE = os.path.abspath(os.path.dirname(__file__))
+WORK = os.path.abspath(os.path.join(BASE, os.pardir))
+if WORK not in sys.path:
+    sys.path.insert(0, WORK)
+
+import analisi_viste.ExtractSqlTables as mod
+
+
+def test_repeated_identifiers_hit_the_normalization_cache():
+    mod._normalize_empty_schema.cache_clear()
+    sql = "\n".join(
+        [
+            "INSERT INTO db1..T1 (id) VALUES (1)",
+            "DELETE FROM db1..T1 WHERE id IN (SELECT id FROM #tmp)",
+            "SELECT * FROM db1..T1 a JOIN [srv].db1..T2 b ON a.id = b.id",
+        ]
+    )
+
+    matches = mod.extract_matches(sql)
+
+    assert [(m["Clause"], m["Table"]) for m in matches] == [
+        ("INSERT INTO", "db1.dbo.T1"),
+        ("DELETE FROM", "db1.dbo.T1"),
+        ("FROM", "db1.dbo.T1"),
+        ("FROM", "db1.dbo.T1"),
+        ("JOIN", "[srv].db1.dbo.T2"),
+    ]
+    assert mod._normalize_empty_schema.cache_info().hits > 0
@@ -0,0 +1,316 @@
+import importlib.util
+import os
+import sys
+
+# Ensure workspace root in path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_spec = importlib.util.spec_from_file_location(
+    "extract_writers_and_view_sources",
+    os.path.join(ROOT, "Estrazione dipendenze", "Extract_Writers_And_View_Sources.py"),
+)
+mod = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mod)
+
+
+class _FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, params=None):
+        self.params = params
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def fetchmany(self, size):
+        batch, self.rows = list(self.rows[:size]), self.rows[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+class _FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return _FakeCursor(self.rows)
+
+
+class _ModulesConn:
+    """Fake connection serving the dependency query and the sys.sql_modules lookup."""
+
+    def __init__(self, modules):
+        self.modules = modules
+        self.definition_reads = []
+
+    def cursor(self):
+        conn = self
+
+        class _Cursor(_FakeCursor):
+            def execute(self, sql, params=None):
+                if "FROM sys.sql_modules WHERE" in sql:
+                    conn.definition_reads.append(list(params))
+                    self.rows = [(m[0], m[3]) for m in conn.modules if m[0] in params]
+                else:
+                    self.rows = [m[:3] for m in conn.modules]
+
+        return _Cursor([])
+
+
+def test_find_writers_detects_dml_on_target_variants(monkeypatch):
+    # Rows are read in batches smaller than the result set
+    monkeypatch.setattr(mod, "FETCH_BATCH_SIZE", 2)
+    modules = [
+        (1, "usp_load", "SQL_STORED_PROCEDURE", "INSERT INTO [dbo].[Orders] SELECT 1; UPDATE dbo.Orders SET x = 1"),
+        (2, "usp_merge", "SQL_STORED_PROCEDURE", "MERGE Orders AS t USING src s ON 1=0"),
+        (3, "usp_read", "SQL_STORED_PROCEDURE", "SELECT * FROM dbo.Orders"),
+        (4, "usp_other", "SQL_STORED_PROCEDURE", "DELETE FROM dbo.Customers"),
+        (5, "usp_null", "SQL_STORED_PROCEDURE", None),
+    ]
+    extractor = mod.WritersAndViewSourcesExtractor.__new__(mod.WritersAndViewSourcesExtractor)
+
+    writers = extractor._find_writers(_ModulesConn(modules), "dbo", "Orders")
+
+    assert writers == [
+        ("usp_load", "SQL_STORED_PROCEDURE", "INSERT"),
+        ("usp_load", "SQL_STORED_PROCEDURE", "UPDATE"),
+        ("usp_merge", "SQL_STORED_PROCEDURE", "MERGE"),
+    ]
+
+
+def test_find_writers_reads_each_module_definition_once():
+    modules = [
+        (1, "usp_load", "SQL_STORED_PROCEDURE", "INSERT INTO dbo.Orders SELECT * FROM dbo.Customers"),
+        (2, "usp_fix", "SQL_STORED_PROCEDURE", "UPDATE dbo.Customers SET x = 1"),
+    ]
+    conn = _ModulesConn(modules)
+    extractor = mod.WritersAndViewSourcesExtractor.__new__(mod.WritersAndViewSourcesExtractor)
+    definitions = {}
+
+    orders = extractor._find_writers(conn, "dbo", "Orders", definitions)
+    customers = extractor._find_writers(conn, "dbo", "Customers", definitions)
+
+    assert orders == [("usp_load", "SQL_STORED_PROCEDURE", "INSERT")]
+    assert customers == [("usp_fix", "SQL_STORED_PROCEDURE", "UPDATE")]
+    # The second target reuses the definitions already read for the first one
+    assert conn.definition_reads == [[1, 2]]
+
+
+def test_run_queries_repeated_targets_once(tmp_path, monkeypatch):
+    from openpyxl import Workbook, load_workbook
+
+    xlsx_in = tmp_path / "in.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Server", "DB", "Schema", "Object"])
+    ws.append(["S", "D", "dbo", "Orders"])
+    ws.append(["S", "D", "dbo", "Orders"])
+    ws.append(["S", "D", "dbo", "v_Orders"])
+    wb.save(xlsx_in)
+
+    class _Pyodbc:
+        SQL_WCHAR, SQL_CHAR = -8, 1
+        decodings = []
+
+        @staticmethod
+        def connect(conn_str, timeout=None, **kwargs):
+            conn = _FakeConn([])
+            conn.setdecoding = lambda sqltype, encoding: _Pyodbc.decodings.append((sqltype, encoding))
+            conn.setencoding = lambda encoding: None
+            return conn
+
+    monkeypatch.setattr(mod, "pyodbc", _Pyodbc)
+    extractor = mod.WritersAndViewSourcesExtractor.__new__(mod.WritersAndViewSourcesExtractor)
+    extractor.input_excel = str(xlsx_in)
+    extractor.output_excel = str(tmp_path / "out.xlsx")
+    extractor.rows_per_file = 100
+    monkeypatch.setattr(extractor, "_build_conn_str", lambda server, db: "DSN=fake")
+
+    calls = []
+
+    def _analyze(conn, schema, name, info=None, definitions=None, modules=None):
+        calls.append(name)
+        if name == "v_Orders":
+            return "VIEW", [], [("dbo", "Orders", "USER_TABLE")]
+        return "USER_TABLE", [("usp_load", "SQL_STORED_PROCEDURE", "INSERT")], []
+
+    monkeypatch.setattr(extractor, "_analyze_target", _analyze)
+
+    extractor.run()
+
+    assert calls == ["Orders", "v_Orders"]
+    # nvarchar definitions are decoded straight from UTF-16LE
+    assert (-8, "utf-16le") in _Pyodbc.decodings
+    out = load_workbook(str(tmp_path / "out.xlsx"))
+    writers = [r for r in out["Writers"].iter_rows(min_row=2, values_only=True)]
+    assert [r[3] for r in writers] == ["Orders", "Orders"]
+    sources = [r for r in out["ViewSources"].iter_rows(min_row=2, values_only=True)]
+    assert sources == [("S", "D", "dbo", "v_Orders", "dbo", "Orders", "USER_TABLE")]
+
+
+def test_run_reuses_rows_of_repeated_targets(tmp_path, monkeypatch):
+    class _Pyodbc:
+        SQL_WCHAR, SQL_CHAR = -8, 1
+
+        @staticmethod
+        def connect(conn_str, timeout=None, **kwargs):
+            conn = _FakeConn([])
+            conn.setdecoding = lambda sqltype, encoding: None
+            conn.setencoding = lambda encoding: None
+            return conn
+
+    monkeypatch.setattr(mod, "pyodbc", _Pyodbc)
+    extractor = mod.WritersAndViewSourcesExtractor.__new__(mod.WritersAndViewSourcesExtractor)
+    extractor.output_excel = str(tmp_path / "out.xlsx")
+    extractor.rows_per_file = 100
+    monkeypatch.setattr(
+        extractor, "_read_items",
+        lambda: [("S", "D", "dbo", "v_A"), ("S", "D", "dbo", "B"), ("S", "D", "dbo", "v_A")],
+    )
+    monkeypatch.setattr(extractor, "_build_conn_str", lambda server, db: "DSN=fake")
+    monkeypatch.setattr(extractor, "_get_targets_info", lambda conn, targets: {})
+    monkeypatch.setattr(extractor, "_get_writer_modules", lambda conn, targets: {})
+    monkeypatch.setattr(
+        extractor, "_analyze_target",
+        lambda conn, schema, name, info=None, definitions=None, modules=None: (
+            "VIEW", [(f"usp_{name}", "SQL_STORED_PROCEDURE", "INSERT")], [("dbo", "T", "USER_TABLE")],
+        ),
+    )
+    written = []
+    monkeypatch.setattr(extractor, "_write_chunk", lambda out_path, w_rows, v_rows: written.append((w_rows, v_rows)))
+
+    extractor.run()
+
+    (w_rows, v_rows), = written
+    assert [r[3] for r in w_rows] == ["v_A", "B", "v_A"]
+    assert w_rows[2] == ["S", "D", "dbo", "v_A", "VIEW", "usp_v_A", "SQL_STORED_PROCEDURE", "INSERT"]
+    # The repeated target shares the rows built for its first occurrence
+    assert w_rows[2] is w_rows[0]
+    assert v_rows[2] is v_rows[0]
+
+
+
+def test_run_writes_chunks_on_a_background_thread(tmp_path, monkeypatch):
+    import threading
+
+    class _Pyodbc:
+        SQL_WCHAR, SQL_CHAR = -8, 1
+
+        @staticmethod
+        def connect(conn_str, timeout=None, **kwargs):
+            conn = _FakeConn([])
+            conn.setdecoding = lambda sqltype, encoding: None
+            conn.setencoding = lambda encoding: None
+            return conn
+
+    monkeypatch.setattr(mod, "pyodbc", _Pyodbc)
+    extractor = mod.WritersAndViewSourcesExtractor.__new__(mod.WritersAndViewSourcesExtractor)
+    extractor.output_excel = str(tmp_path / "out.xlsx")
+    extractor.rows_per_file = 1
+    monkeypatch.setattr(extractor, "_read_items", lambda: [("S", "D", "dbo", "A"), ("S", "D", "dbo", "B")])
+    monkeypatch.setattr(extractor, "_build_conn_str", lambda server, db: "DSN=fake")
+    monkeypatch.setattr(extractor, "_get_targets_info", lambda conn, targets: {})
+    monkeypatch.setattr(
+        extractor, "_analyze_target",
+        lambda conn, schema, name, info=None, definitions=None, modules=None: ("USER_TABLE", [(f"usp_{name}", "SQL_STORED_PROCEDURE", "INSERT")], []),
+    )
+    written = []
+    monkeypatch.setattr(
+        extractor, "_write_chunk",
+        lambda out_path, w_rows, v_rows: written.append((out_path, [r[5] for r in w_rows], threading.current_thread())),
+    )
+
+    extractor.run()
+
+    assert [(p, names) for p, names, _ in written] == [
+        (str(tmp_path / "out.xlsx"), ["usp_A"]),
+        (str(tmp_path / "out_part2.xlsx"), ["usp_B"]),
+    ]
+    assert all(t is not threading.main_thread() for _, _, t in written)
+
+
+def test_targets_info_reads_types_and_view_sources_in_one_query():
+    rows = [
+        ("dbo", "Orders", "U ", "USER_TABLE", None, None, None),
+        ("dbo", "v_Orders", "V ", "VIEW", "dbo", "Orders", "USER_TABLE"),
+        ("dbo", "v_Orders", "V ", "VIEW", "dbo", "Customers", "USER_TABLE"),
+        ("dbo", "Missing", None, None, None, None, None),
+    ]
+    executed = []
+
+    class _Cursor(_FakeCursor):
+        def execute(self, sql, params=None):
+            executed.append(list(params))
+
+    class _Conn(_FakeConn):
+        def cursor(self):
+            return _Cursor(self.rows)
+
+    extractor = mod.WritersAndViewSourcesExtractor.__new__(mod.WritersAndViewSourcesExtractor)
+
+    info = extractor._get_targets_info(_Conn(rows), [("dbo", "Orders"), ("dbo", "v_Orders"), ("dbo", "Missing")])
+
+    assert executed == [["dbo", "Orders", "dbo", "v_Orders", "dbo", "Missing"]]
+    assert info[("dbo", "Orders")] == ("U ", "USER_TABLE", [])
+    assert info[("dbo", "v_Orders")] == (
+        "V ", "VIEW", [("dbo", "Orders", "USER_TABLE"), ("dbo", "Customers", "USER_TABLE")]
+    )
+    assert info[("dbo", "Missing")] == ("", "NOT_FOUND", [])
+
+    # With prefetched info only the writers query runs
+    def _per_object_query(*args):
+        raise AssertionError("per-object query")
+
+    extractor._get_object_type = _per_object_query
+    extractor._find_view_sources = _per_object_query
+    assert extractor._analyze_target(_FakeConn([]), "dbo", "v_Orders", info=info[("dbo", "v_Orders")]) == (
+        "VIEW", [], [("dbo", "Orders", "USER_TABLE"), ("dbo", "Customers", "USER_TABLE")]
+    )
+
+
+def test_writer_modules_are_read_in_one_query_per_batch(monkeypatch):
+    monkeypatch.setattr(mod, "BATCH_TARGETS", 2)
+    modules = [
+        (1, "usp_load", "SQL_STORED_PROCEDURE", "INSERT INTO dbo.Orders SELECT * FROM dbo.Customers"),
+        (2, "usp_fix", "SQL_STORED_PROCEDURE", "UPDATE dbo.Customers SET x = 1"),
+    ]
+    # (schema, name) of the referenced target, then the referencing module
+    rows = [
+        ("dbo", "Orders", 1, "usp_load", "SQL_STORED_PROCEDURE"),
+        ("dbo", "Customers", 1, "usp_load", "SQL_STORED_PROCEDURE"),
+        ("dbo", "Customers", 2, "usp_fix", "SQL_STORED_PROCEDURE"),
+    ]
+    executed = []
+
+    class _Cursor(_FakeCursor):
+        def execute(self, sql, params=None):
+            executed.append(list(params))
+            self.rows = [r for r in rows if r[1] in params]
+
+    class _Conn(_FakeConn):
+        def cursor(self):
+            return _Cursor([])
+
+    extractor = mod.WritersAndViewSourcesExtractor.__new__(mod.WritersAndViewSourcesExtractor)
+    targets = [("dbo", "Orders"), ("dbo", "Customers"), ("dbo", "Empty")]
+
+    by_target = extractor._get_writer_modules(_Conn(rows), targets)
+
+    # Three targets in batches of two: two queries instead of three
+    assert executed == [["dbo", "Orders", "dbo", "Customers"], ["dbo", "Empty"]]
+    assert by_target == {
+        ("dbo", "Orders"): [(1, "usp_load", "SQL_STORED_PROCEDURE")],
+        ("dbo", "Customers"): [(1, "usp_load", "SQL_STORED_PROCEDURE"), (2, "usp_fix", "SQL_STORED_PROCEDURE")],
+        ("dbo", "Empty"): [],
+    }
+
+    # With prefetched modules only the definitions are read
+    conn = _ModulesConn(modules)
+    writers = extractor._find_writers(conn, "dbo", "Customers", {}, by_target[("dbo", "Customers")])
+    assert writers == [("usp_fix", "SQL_STORED_PROCEDURE", "UPDATE")]
+    assert conn.definition_reads == [[1, 2]]
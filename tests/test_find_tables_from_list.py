@@ -0,0 +1,76 @@
+import os
+import sys
+
+from openpyxl import load_workbook
+
+# Ensure workspace root in path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import analisi_viste.Find_Tables_From_List as finder_mod
+from analisi_viste.Find_Tables_From_List import ServerObjectFinder
+
+
+def test_run_matches_schema_and_table_case_insensitively(tmp_path):
+    finder = ServerObjectFinder.__new__(ServerObjectFinder)
+    finder.server = "S"
+    finder.output_excel = str(tmp_path / "out.xlsx")
+    finder._read_targets = lambda: [("DBO", "orders"), (None, "Customers"), ("sales", "Orders"), (None, "Missing")]
+    finder._list_user_databases = lambda: ["D1", "D2"]
+    finder._db_has_access = lambda db: True
+    objects = {
+        "D1": [("dbo", "Orders", "USER_TABLE"), ("dbo", "Customers", "USER_TABLE")],
+        "D2": [("Sales", "Orders", "VIEW"), ("crm", "customers", "USER_TABLE")],
+    }
+    finder._fetch_objects_in_db = lambda db: objects[db]
+
+    finder.run()
+
+    wb = load_workbook(finder.output_excel, read_only=True)
+    rows = [r[1:5] for r in wb.active.iter_rows(min_row=2, values_only=True)]
+    wb.close()
+    assert rows == [
+        ("D1", "dbo", "Orders", "USER_TABLE"),
+        ("D1", "dbo", "Customers", "USER_TABLE"),
+        ("D2", "crm", "customers", "USER_TABLE"),
+        ("D2", "Sales", "Orders", "VIEW"),
+        (None, None, "Missing", None),
+    ]
+
+
+def test_objects_are_read_with_one_parameterized_query(monkeypatch):
+    executed = []
+
+    class _Cursor:
+        def execute(self, sql, params=None):
+            executed.append((sql, list(params or [])))
+
+        def fetchall(self):
+            return [("dbo", "Orders", "USER_TABLE"), ("dbo", "v_Orders", "VIEW")]
+
+    class _Conn:
+        def cursor(self):
+            return _Cursor()
+
+        def close(self):
+            pass
+
+    class _Pyodbc:
+        @staticmethod
+        def connect(conn_str, timeout=None):
+            return _Conn()
+
+    monkeypatch.setattr(finder_mod, "pyodbc", _Pyodbc)
+    monkeypatch.setattr(finder_mod, "INCLUDE_SYNONYMS", False)
+    finder = ServerObjectFinder.__new__(ServerObjectFinder)
+    finder.server = "S"
+
+    found = finder._fetch_objects_in_db("D1")
+
+    assert found == {("dbo", "Orders", "USER_TABLE"), ("dbo", "v_Orders", "VIEW")}
+    assert len(executed) == 1
+    sql, params = executed[0]
+    # Type codes are bound, not interpolated into the query text
+    assert "sys.objects" in sql and "IN (?, ?)" in sql
+    assert params == ["U", "V"]
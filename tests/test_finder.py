@@ -0,0 +1,98 @@
+import os
+import sys
+
+# Ensure workspace root in path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from Finder.Excel_Finder import ExcelFinder
+
+
+def _walk_reference(root, extension):
+    found = []
+    for dirpath, _, files in os.walk(root):
+        for f in files:
+            if f.endswith(extension) and not f.startswith("~$"):
+                found.append(os.path.join(dirpath, f))
+    return found
+
+
+def test_file_finder_matches_os_walk(tmp_path):
+    for rel in [
+        "a.xlsx",
+        "~$a.xlsx",
+        "note.txt",
+        "sub1/b.xlsx",
+        "sub1/deep/c.xlsx",
+        "sub1/deep/c.xlsm",
+        "sub2/d.xlsx",
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+    (tmp_path / "empty").mkdir()
+
+    found = ExcelFinder(str(tmp_path)).file_finder()
+
+    assert found == _walk_reference(str(tmp_path), ".xlsx")
+    assert sorted(os.path.relpath(p, tmp_path) for p in found) == sorted(
+        os.path.normpath(p) for p in ["a.xlsx", "sub1/b.xlsx", "sub1/deep/c.xlsx", "sub2/d.xlsx"]
+    )
+
+
+def test_file_finder_missing_root_returns_empty(tmp_path):
+    assert ExcelFinder(str(tmp_path / "missing")).file_finder() == []
+
+
+def test_files_by_extension_single_walk_keeps_per_extension_order(tmp_path):
+    from Finder.IFinder import IFinder
+
+    for rel in ["a.xlsx", "a.xlsm", "sub/b.xlsm", "sub/b.xlsx", "sub/~$b.xlsx", "c.txt"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+
+    found = IFinder.files_by_extension(str(tmp_path), (".xlsm", ".xlsx"))
+
+    assert found[".xlsm"] == _walk_reference(str(tmp_path), ".xlsm")
+    assert found[".xlsx"] == _walk_reference(str(tmp_path), ".xlsx")
+
+
+def test_parallel_walk_keeps_os_walk_order(tmp_path, monkeypatch):
+    import Finder.IFinder as ifinder
+
+    for i in range(5):
+        for rel in [f"d{i}/f{i}.xlsx", f"d{i}/inner/g{i}.xlsx"]:
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"")
+    (tmp_path / "root.xlsx").write_bytes(b"")
+
+    monkeypatch.setattr(ifinder, "SCAN_WORKERS", 4)
+    parallel = ExcelFinder(str(tmp_path)).file_finder()
+    monkeypatch.setattr(ifinder, "SCAN_WORKERS", 1)
+    sequential = ExcelFinder(str(tmp_path)).file_finder()
+
+    assert parallel == sequential == _walk_reference(str(tmp_path), ".xlsx")
+
+
+def test_file_finder_handles_trees_deeper_than_the_recursion_limit(tmp_path):
+    deep = tmp_path
+    for _ in range(sys.getrecursionlimit() + 50):
+        deep = deep / "a"
+        deep.mkdir()
+    (deep / "deep.xlsx").write_bytes(b"")
+    (tmp_path / "top.xlsx").write_bytes(b"")
+
+    try:
+        found = ExcelFinder(str(tmp_path)).file_finder()
+    finally:
+        # shutil.rmtree (used by pytest to clean old tmp dirs) recurses per level:
+        # remove the chain bottom-up so it cannot hit the recursion limit later
+        (deep / "deep.xlsx").unlink()
+        while deep != tmp_path:
+            deep.rmdir()
+            deep = deep.parent
+
+    assert [os.path.basename(p) for p in found] == ["top.xlsx", "deep.xlsx"]
@@ -0,0 +1,117 @@
+import importlib.util
+import os
+import sys
+import types
+
+import pandas as pd
+
+# Ensure workspace root in path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+_spec = importlib.util.spec_from_file_location(
+    "Gap_Analysis_From_Excel", os.path.join(ROOT, "Gap analysis", "Gap_Analysis_From_Excel.py")
+)
+mod = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mod)
+
+
+def test_rows_are_built_per_column_in_input_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(mod, "pyodbc", types.SimpleNamespace(connect=lambda *a, **k: object()))
+    items = [
+        ("EPCP3", "db1", "dbo", "t1", "USER_TABLE", "CREATE TABLE t1"),
+        ("EPCP3", "db1", "dbo", "empty", "VIEW", "CREATE VIEW empty"),
+        ("EPCP3", "db2", "dbo", "t2", "USER_TABLE", "CREATE TABLE t2"),
+    ]
+    columns = {
+        "t1": [
+            {"column_id": 1, "column": "id", "type_name": "INT", "max_length": 4, "precision": 10, "scale": 0, "is_nullable": False},
+            {"column_id": 2, "column": "name", "type_name": "NVARCHAR", "max_length": 20, "precision": 0, "scale": 0, "is_nullable": True},
+        ],
+        "empty": [],
+        "t2": [
+            {"column_id": 1, "column": "amount", "type_name": "DECIMAL", "max_length": 9, "precision": 18, "scale": 2, "is_nullable": True},
+        ],
+    }
+    A = mod.GapAnalyzer
+    monkeypatch.setattr(A, "_read_items", lambda self: items)
+    monkeypatch.setattr(A, "_build_conn_str", lambda self, db: db)
+    monkeypatch.setattr(A, "_resolve_objects", lambda self, c, targets: {})
+    monkeypatch.setattr(A, "_get_obj_type_code", lambda self, c, s, n: ("U", "USER_TABLE"))
+    monkeypatch.setattr(A, "_get_obj_id", lambda self, c, s, n: n)
+    monkeypatch.setattr(A, "_get_columns_info", lambda self, c, obj_id: columns[obj_id])
+    monkeypatch.setattr(A, "_pk_members", lambda self, c, obj_id: [1] if obj_id == "t1" else [])
+    monkeypatch.setattr(A, "_fk_members", lambda self, c, obj_id: [1] if obj_id == "t2" else [])
+    monkeypatch.setattr(A, "_sample_row", lambda self, c, s, n, t: {"id": 7} if n == "t1" else None)
+
+    out = A(str(tmp_path / "in.xlsx"), str(tmp_path / "gap.xlsx")).run()
+
+    df = pd.read_excel(out, sheet_name="Gap")
+    assert list(df.columns) == mod.GAP_COLUMNS
+    df = df.astype(object).where(df.notna(), None)
+    assert [tuple(r) for r in df.values] == [
+        ("EPCP3", "db1", "dbo", "t1", "USER_TABLE", "CREATE TABLE t1", "id", "INT", "N", "Y", "N", 7),
+        ("EPCP3", "db1", "dbo", "t1", "USER_TABLE", "CREATE TABLE t1", "name", "NVARCHAR(10)", "Y", "N", "N", None),
+        ("EPCP3", "db2", "dbo", "t2", "USER_TABLE", "CREATE TABLE t2", "amount", "DECIMAL(18,2)", "Y", "N", "Y", None),
+    ]
+
+
+def test_objects_are_resolved_in_one_query_per_database(tmp_path, monkeypatch):
+    executed = []
+
+    class _Cursor:
+        def execute(self, sql, params=None):
+            executed.append((self.db, list(params)))
+            found = {("dbo", "t1"): (11, "U "), ("dbo", "f1"): (12, "IF")}
+            self.rows = [
+                (params[i], params[i + 1]) + found.get((params[i], params[i + 1]), (None, None))
+                for i in range(0, len(params), 2)
+            ]
+
+        def fetchall(self):
+            return self.rows
+
+    class _Conn:
+        def __init__(self, db):
+            self.db = db
+
+        def cursor(self):
+            cur = _Cursor()
+            cur.db = self.db
+            return cur
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(mod, "pyodbc", types.SimpleNamespace(connect=lambda conn_str, timeout=None: _Conn(conn_str)))
+    items = [
+        ("EPCP3", "db1", "dbo", "t1", "USER_TABLE", ""),
+        ("EPCP3", "db1", "dbo", "f1", "SQL_INLINE_TABLE_VALUED_FUNCTION", ""),
+        ("EPCP3", "db1", "dbo", "missing", "USER_TABLE", ""),
+        ("EPCP3", "db1", "dbo", "t1", "USER_TABLE", ""),
+    ]
+    A = mod.GapAnalyzer
+    monkeypatch.setattr(A, "_read_items", lambda self: items)
+    monkeypatch.setattr(A, "_build_conn_str", lambda self, db: db)
+
+    def _per_object_query(*args):
+        raise AssertionError("per-object query")
+
+    monkeypatch.setattr(A, "_get_obj_type_code", _per_object_query)
+    monkeypatch.setattr(A, "_get_obj_id", _per_object_query)
+    column = {"column_id": 1, "column": "c", "type_name": "INT", "max_length": 4, "precision": 10, "scale": 0}
+    monkeypatch.setattr(A, "_get_columns_info", lambda self, c, obj_id: [dict(column, column=f"c{obj_id}")])
+    monkeypatch.setattr(A, "_get_columns_info_info_schema", lambda self, c, s, n: [dict(column, column=f"c_{n}")])
+    monkeypatch.setattr(A, "_pk_members", lambda self, c, obj_id: [])
+    monkeypatch.setattr(A, "_fk_members", lambda self, c, obj_id: [])
+    sample_types = []
+    monkeypatch.setattr(A, "_sample_row", lambda self, c, s, n, t: sample_types.append((n, t)))
+
+    out = A(str(tmp_path / "in.xlsx"), str(tmp_path / "gap.xlsx")).run()
+
+    # Distinct objects of the database resolved with a single VALUES query
+    assert executed == [("db1", ["dbo", "t1", "dbo", "f1", "dbo", "missing"])]
+    assert sample_types == [("t1", "U "), ("f1", "IF"), ("missing", ""), ("t1", "U ")]
+    df = pd.read_excel(out, sheet_name="Gap")
+    assert list(df["Column"]) == ["c11", "c12", "c_missing", "c11"]
@@ -0,0 +1,177 @@
+import os
+import sys
+from types import SimpleNamespace
+
+# Ensure workspace root in path
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from estrazione_sp import Get_SP_From_SQL_Table as mod
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        self.conn.executed.append((query, list(params or [])))
+        if "AS ids(object_id)" in query:
+            # Definition lookup: (object_id, definition) for the requested ids
+            self.rows = [(oid, self.conn.definitions[oid]) for oid in params if oid in self.conn.definitions]
+        else:
+            self.rows = list(self.conn.rows)
+
+    def fetchall(self):
+        return self.conn.rows
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+class _FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.definitions = {r.object_id: r.object_definition for r in rows}
+        self.executed = []
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+
+_OBJECT_IDS = {}
+
+
+def _row(schema, table, name, obj_type, definition):
+    return SimpleNamespace(
+        schema_name=schema, table_name=table, object_id=_OBJECT_IDS.setdefault(name, len(_OBJECT_IDS) + 1),
+        object_name=name, object_type=obj_type, object_definition=definition,
+    )
+
+
+def _extractor(conn):
+    ex = object.__new__(mod.SQLObjectExtractor)
+    ex.connections_cache = {}
+    ex.definitions_cache = {}
+    ex._get_connection = lambda server, database: conn
+    return ex
+
+
+def test_batch_reads_all_tables_of_a_db_in_one_query():
+    conn = _FakeConn([
+        _row("dbo", "T1", "usp_a", "P ", "CREATE PROCEDURE usp_a AS SELECT 1 FROM dbo.T1"),
+        _row("dbo", "T2", "trg_b", "TR", "CREATE TRIGGER trg_b ON dbo.T2"),
+        _row("dbo", "T2", "usp_a", "P ", "CREATE PROCEDURE usp_a AS SELECT 1 FROM dbo.T2"),
+    ])
+    ex = _extractor(conn)
+
+    found = ex._find_associated_objects_batch("S", "D", [("dbo", "T1"), ("DBO", "t2"), ("dbo", "T3")])
+
+    # One dependency query for all tables, then one definition lookup for the distinct objects
+    assert len(conn.executed) == 2
+    assert conn.executed[0][1] == ["dbo", "T1", "DBO", "t2", "dbo", "T3"]
+    assert "OBJECT_DEFINITION(o.object_id) AS" not in conn.executed[0][0]
+    assert sorted(conn.executed[1][1]) == sorted({_OBJECT_IDS["usp_a"], _OBJECT_IDS["trg_b"]})
+    assert [o[:2] for o in found[("dbo", "t1")]] == [("usp_a", "Stored Procedure")]
+    assert [o[:2] for o in found[("dbo", "t2")]] == [("trg_b", "Trigger"), ("usp_a", "Stored Procedure")]
+    assert ("dbo", "t3") not in found
+
+
+def test_definitions_are_read_once_per_object_across_batches():
+    conn = _FakeConn([_row("dbo", "T1", "usp_a", "P ", "CREATE PROCEDURE usp_a AS SELECT 1")])
+    ex = _extractor(conn)
+
+    first = ex._find_associated_objects_batch("S", "D", [("dbo", "T1")])
+    second = ex._find_associated_objects_batch("S", "D", [("dbo", "T1")])
+
+    assert first == second
+    [(name, obj_type, blob)] = first[("dbo", "t1")]
+    # Cached definitions stay compressed until a row is emitted
+    assert isinstance(blob, bytes)
+    assert (name, obj_type, mod._unpack_definition(blob)) == ("usp_a", "Stored Procedure", "CREATE PROCEDURE usp_a AS SELECT 1")
+    # The second call only repeats the dependency query: the definition comes from the cache
+    assert ["ids(object_id)" in query for query, _ in conn.executed] == [False, True, False]
+
+def test_batch_sends_names_in_their_original_case():
+    conn = _FakeConn([_row("Sales", "OrderLines", "usp_a", "P ", "CREATE PROCEDURE usp_a AS SELECT 1")])
+    ex = _extractor(conn)
+
+    found = ex._find_associated_objects_batch("S", "D", [("Sales", "OrderLines"), ("sales", "orderlines")])
+
+    # Case-sensitive collations only match the names as written; duplicates differing
+    # in case are sent once, with the first spelling
+    assert conn.executed[0][1] == ["Sales", "OrderLines"]
+    assert [o[:2] for o in found[("sales", "orderlines")]] == [("usp_a", "Stored Procedure")]
+
+
+def test_batch_respects_parameter_limit(monkeypatch):
+    conn = _FakeConn([])
+    ex = _extractor(conn)
+    monkeypatch.setattr(mod, "BATCH_TABLES", 2)
+
+    ex._find_associated_objects_batch("S", "D", [("dbo", f"T{i}") for i in range(5)])
+
+    assert [len(params) for _, params in conn.executed] == [4, 4, 2]
+
+
+def test_process_queries_databases_in_parallel(monkeypatch):
+    import threading
+
+    tables = [("S", "D1", "dbo", "T1"), ("S", "D2", "dbo", "T2"), ("S", "D1", "dbo", "T3"), ("S", "BAD", "dbo", "T4")]
+    barrier = threading.Barrier(3, timeout=5)
+
+    def _batch(server, database, targets):
+        # Every database query must be in flight at the same time to pass the barrier
+        barrier.wait()
+        if database == "BAD":
+            raise RuntimeError("connessione fallita")
+        return {(s.lower(), t.lower()): [(f"usp_{t}", "Stored Procedure", mod._pack_definition(f"def {t}"))] for s, t in targets}
+
+    written = []
+    ex = _extractor(_FakeConn([]))
+    ex._read_input_excel = lambda: tables
+    ex._find_associated_objects_batch = _batch
+    ex._create_output_excel = lambda data, file_num: written.append(list(data))
+
+    ex.process()
+
+    assert [row[:2] for row in written[0]] == [
+        ("S.D1.dbo.T1", "usp_T1"),
+        ("S.D2.dbo.T2", "usp_T2"),
+        ("S.D1.dbo.T3", "usp_T3"),
+    ]
+    # Definitions are decompressed when rows are emitted
+    assert [row[3] for row in written[0]] == ["def T1", "def T2", "def T3"]
+
+
+def test_process_decompresses_shared_definitions_once_per_file(monkeypatch):
+    blob = mod._pack_definition("CREATE PROCEDURE usp_shared AS SELECT 1")
+    tables = [("S", "D", "dbo", "T1"), ("S", "D", "dbo", "T2"), ("S", "D", "dbo", "T3")]
+    unpacks = []
+    real_unpack = mod._unpack_definition
+
+    def _counting_unpack(b):
+        unpacks.append(b)
+        return real_unpack(b)
+
+    monkeypatch.setattr(mod, "_unpack_definition", _counting_unpack)
+    monkeypatch.setattr(mod, "CONNECTIONS_PER_FILE", 2)
+    written = []
+    ex = _extractor(_FakeConn([]))
+    ex._read_input_excel = lambda: tables
+    ex._find_associated_objects_batch = lambda server, database, targets: {
+        (s.lower(), t.lower()): [("usp_shared", "Stored Procedure", blob)] for s, t in targets
+    }
+    ex._create_output_excel = lambda data, file_num: written.append(list(data))
+
+    ex.process()
+
+    # One decompression per output file; rows of the same file share the string
+    assert len(unpacks) == 2
+    assert [len(rows) for rows in written] == [2, 1]
+    assert written[0][0][3] is written[0][1][3]
+    assert written[1][0][3] == "CREATE PROCEDURE usp_shared AS SELECT 1"
@@ -70,3 +70,95 @@ def test_partial_files_are_non_overlapping(tmp_path, monkeypatch):
 
     # Ensure no overlap between partials
     assert set(df2["Table"].str.lower()).isdisjoint(set(df4["Table"].str.lower()))
+
+
+def test_repeated_tables_are_fetched_once(tmp_path, monkeypatch):
+    xlsx_in = tmp_path / "input.xlsx"
+    rows = [["EPCP3", "db", "dbo", "t1"], ["EPCP3", "db", "dbo", "t2"], ["EPCP3", "db", "dbo", "t1"]]
+    _write_input_excel(str(xlsx_in), rows, ["Server", "DB", "Schema", "Table"])
+    out_xlsx = tmp_path / "out.xlsx"
+
+    fetched = []
+    connects = []
+
+    def fake_fetch(self, conn, schema, table):
+        fetched.append(table)
+        return [(f"v_{table}", f"SELECT * FROM {schema}.{table}")]
+
+    def fake_connect(*a, **k):
+        connects.append(a)
+        return types.SimpleNamespace(close=lambda: None)
+
+    monkeypatch.setattr(mod, "pyodbc", types.SimpleNamespace(connect=fake_connect), raising=False)
+    monkeypatch.setattr(TableViewsExtractor, "_fetch_views_for_table", fake_fetch, raising=False)
+    monkeypatch.setattr(TableViewsExtractor, "_build_conn_str", lambda self, s, d: "DRIVER={stub};", raising=False)
+
+    TableViewsExtractor(str(xlsx_in), str(out_xlsx)).run()
+
+    assert fetched == ["t1", "t2"]
+    assert len(connects) == 1
+    # Duplicated input rows are still reported in the output
+    df = pd.read_excel(out_xlsx, sheet_name="Viste")
+    assert list(df["Table"]) == ["t1", "t2", "t1"]
+
+
+def test_lookup_cursors_are_reused_per_connection(tmp_path, monkeypatch):
+    xlsx_in = tmp_path / "input.xlsx"
+    rows = [["EPCP3", "db", "dbo", f"t{i}"] for i in range(1, 4)]
+    _write_input_excel(str(xlsx_in), rows, ["Server", "DB", "Schema", "Table"])
+    out_xlsx = tmp_path / "out.xlsx"
+
+    cursors = []
+
+    class FakeCursor:
+        closed = False
+
+        def execute(self, sql, params=None):
+            self.sql, self.params = sql, params
+            return self
+
+        def fetchall(self):
+            # The dependency query finds nothing for t2, which goes through the fallback
+            if "sql_expression_dependencies" in self.sql and self.params[1] == "t2":
+                return []
+            return [(f"v_{self.params[1]}", "def")]
+
+        def close(self):
+            self.closed = True
+
+    class FakeConn:
+        def cursor(self):
+            cur = FakeCursor()
+            cursors.append(cur)
+            return cur
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(mod, "pyodbc", types.SimpleNamespace(connect=lambda *a, **k: FakeConn()), raising=False)
+    monkeypatch.setattr(TableViewsExtractor, "_build_conn_str", lambda self, s, d: "DRIVER={stub};", raising=False)
+
+    TableViewsExtractor(str(xlsx_in), str(out_xlsx)).run()
+
+    # One cursor for the dependency query and one for the fallback, closed at the end
+    assert len(cursors) == 2
+    assert all(c.closed for c in cursors)
+    df = pd.read_excel(out_xlsx, sheet_name="Viste")
+    assert list(df["Object_Name"]) == ["v_t1", "v_t2", "v_t3"]
+
+
+def test_schema_bound_duplicates_are_collapsed():
+    rows = [("v_bound", "def1"), ("v_bound", "def1"), ("v_other", "def2"), ("v_bound", "def1")]
+
+    class Cursor:
+        def execute(self, sql, params=None):
+            return self
+
+        def fetchall(self):
+            return rows
+
+    conn = types.SimpleNamespace(cursor=Cursor)
+    extractor = TableViewsExtractor.__new__(TableViewsExtractor)
+    extractor._cursors = {}
+
+    assert extractor._fetch_views_for_table(conn, "dbo", "t1") == [("v_bound", "def1"), ("v_other", "def2")]
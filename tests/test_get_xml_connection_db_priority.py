@@ -1,5 +1,5 @@
 import unittest
-from Connection.Get_Xml_Connection import GetXmlConnection
+from Connection.Get_Xml_Connection import GetXmlConnection, _choose_database
 
 class TestDbPriority(unittest.TestCase):
     def setUp(self):
@@ -55,6 +55,22 @@ class TestDbPriority(unittest.TestCase):
         cmd_db = None
         chosen = self.decide(conn_db, cmd_db)
         self.assertEqual(chosen, 's1057b')
+    def test_choose_database_matches_rules(self):
+        cases = [
+            ('ANALISI', 's1057b'),
+            ('analisi_x', 's1057b'),
+            ('s1057b', 's1057'),
+            (' S1057B ', 's1057b'),
+            ('s1057b', None),
+            (None, 's1057b'),
+            (None, None),
+        ]
+        for conn_db, cmd_db in cases:
+            chosen, mismatch = _choose_database(conn_db, cmd_db)
+            self.assertEqual(chosen, self.decide(conn_db, cmd_db))
+            expected_mismatch = bool(conn_db and cmd_db
+                                     and conn_db.strip().lower() != cmd_db.strip().lower())
+            self.assertEqual(mismatch, expected_mismatch)
 
 if __name__ == '__main__':
     unittest.main()
@@ -40,5 +40,40 @@ class TestGetXmlConnectionDSN(unittest.TestCase):
             self.assertEqual(r['Tabella'], 'pmor_SVG_in_redazione')
 
 
+class TestParseTablesDedup(unittest.TestCase):
+    def test_repeated_joins_are_listed_once_in_first_seen_order(self):
+        gx = GetXmlConnection('unused.xlsx')
+        cmd = (
+            'SELECT * FROM dbo.A a JOIN dbo.B b ON 1=1 '
+            'JOIN dbo.A a2 ON 1=1 JOIN [dbo].[C] c ON 1=1 JOIN dbo.B b2 ON 1=1'
+        )
+        self.assertEqual(gx._parse_all_tables(cmd), [('dbo', 'A'), ('dbo', 'B'), ('dbo', 'C')])
+        self.assertEqual(gx._parse_join_tables(cmd), [('dbo', 'B'), ('dbo', 'A'), ('dbo', 'C')])
+
+
+class TestWorkbookTables(unittest.TestCase):
+    def test_tables_are_grouped_by_connection_in_one_scan(self):
+        workbook_xml = (
+            '<workbook><definedNames>'
+            '<x name="T1" a="1" connection="SRV DB Multiple Tables"/>'
+            '<x name="ThisWorkbookDataModel" connection="SRV DB Multiple Tables"/>'
+            '<x name="T2" connection="srv db multiple tables"/>'
+            '<x name="T3" connection="Other"/>'
+            '</definedNames></workbook>'
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            xlsx_path = os.path.join(tmp, 'sample.xlsx')
+            with zipfile.ZipFile(xlsx_path, 'w') as z:
+                z.writestr('xl/workbook.xml', workbook_xml)
+            gx = GetXmlConnection(xlsx_path)
+            with zipfile.ZipFile(xlsx_path) as z:
+                self.assertEqual(
+                    gx._workbook_tables_by_connection(z),
+                    {'srv db multiple tables': ['T1', 'T2'], 'other': ['T3']},
+                )
+                self.assertEqual(gx._tables_from_workbook(z, 'SRV DB Multiple Tables'), ['T1', 'T2'])
+                self.assertEqual(gx._tables_from_workbook(z, 'missing'), [])
+
+
 if __name__ == '__main__':
     unittest.main()
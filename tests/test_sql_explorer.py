@@ -0,0 +1,41 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from BusinessLogic.SQL_Explorer import SqlExplorer
+
+
+SQL = """/* header
+   comment with select x into y from z */
+-- line comment with select into x from y
+SELECT a, b INTO [dbo].[Tgt1] FROM dbo.Src1 s INNER JOIN [stg] . [Src2] x ON 1=1 LEFT OUTER JOIN "q"."Src3" z ON 1=1 WHERE a = 1;
+GO
+select * into tmp_t from Src4, dbo.Src5 cross join Src6
+select 1 from (select 2 from t) d;
+INSERT INTO dbo.Log (a) VALUES (1);
+insert   into [dbo].[Hist] select * from dbo.Src7 h join dbo.Src8 k on 1=1 group by x;
+"""
+
+
+def test_sql_clause_rows(tmp_path):
+    path = tmp_path / "script.sql"
+    path.write_text(SQL, encoding="utf-8")
+
+    assert SqlExplorer(str(path)).sql_clause() == [
+        ["script.sql", "dbo.Tgt1", "dbo.Src1", "stg.Src2; q.Src3"],
+        ["script.sql", "tmp_t", "Src4; dbo.Src5", "Src6"],
+        ["script.sql", "dbo.Log", "", ""],
+        ["script.sql", "dbo.Hist", "dbo.Src7", "dbo.Src8"],
+    ]
+
+
+def test_sample_sql_file():
+    path = os.path.join(os.path.dirname(__file__), "sample_sql.sql")
+
+    assert SqlExplorer(path).sql_clause() == [
+        ["sample_sql.sql", "dbo.NewTable", "dbo.Source1", "dbo.Source2; sales.Orders"],
+        ["sample_sql.sql", "dbo.OtherNew", "", ""],
+    ]
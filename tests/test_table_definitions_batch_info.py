@@ -0,0 +1,211 @@
+import os
+import sys
+import types
+from openpyxl import Workbook
+import pandas as pd
+
+BASE = os.path.abspath(os.path.dirname(__file__))
+WORK = os.path.abspath(os.path.join(BASE, os.pardir))
+if WORK not in sys.path:
+    sys.path.insert(0, WORK)
+
+import analisi_viste.Get_Table_Definitions_From_Excel as mod
+from analisi_viste.Get_Table_Definitions_From_Excel import TableDefinitionExtractor
+
+
+def test_object_types_are_read_once_per_database(tmp_path, monkeypatch):
+    inp = tmp_path / 'tables.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Server', 'DB', 'Schema', 'Table'])
+    ws.append(['EPCP3', 'db1', 'dbo', 'v1'])
+    ws.append(['EPCP3', 'db1', 'dbo', 't1'])
+    ws.append(['EPCP3', 'db1', 'dbo', 'missing'])
+    wb.save(str(inp))
+
+    statements = []
+    fetch_sizes = []
+
+    class FakeCursor:
+        def execute(self, sql, params=()):
+            statements.append((sql, list(params)))
+            self.rows = [
+                ('dbo', 'v1', 'V', 'VIEW', 'CREATE VIEW [dbo].[v1] AS SELECT 1'),
+                ('dbo', 't1', 'U', 'USER_TABLE', None),
+                ('dbo', 'missing', None, None, None),
+            ]
+        def fetchmany(self, size):
+            fetch_sizes.append(size)
+            batch, self.rows = self.rows[:size], self.rows[size:]
+            return batch
+        def fetchone(self):
+            return ['CREATE TABLE [dbo].[t1] ( [id] int NOT NULL )']
+        def close(self):
+            pass
+
+    class FakeConn:
+        def cursor(self):
+            return FakeCursor()
+        def close(self):
+            pass
+
+    monkeypatch.setattr(mod, 'pyodbc', types.SimpleNamespace(connect=lambda *a, **k: FakeConn()))
+    monkeypatch.setattr(TableDefinitionExtractor, '_build_conn_str', lambda self, s, d: 'DRIVER={test};')
+    monkeypatch.setattr(mod, 'FETCH_BATCH_SIZE', 2)
+
+    def no_single_lookup(*args, **kwargs):
+        raise AssertionError('per-object lookup should not be used')
+    monkeypatch.setattr(TableDefinitionExtractor, '_get_object_type_info', no_single_lookup)
+    monkeypatch.setattr(TableDefinitionExtractor, '_fetch_view_definition', no_single_lookup)
+
+    out = TableDefinitionExtractor(str(inp), str(tmp_path / 'ddl.xlsx')).run()
+
+    # One batched lookup for the three objects of db1
+    batched = [s for s in statements if 'FROM (VALUES' in s[0]]
+    assert len(batched) == 1
+    assert batched[0][1] == ['dbo', 'v1', 'dbo', 't1', 'dbo', 'missing']
+    # Rows are streamed in batches instead of a single fetchall
+    assert fetch_sizes == [2, 2, 2]
+
+    df = pd.read_excel(out)
+    assert list(df['ObjectType']) == ['VIEW', 'USER_TABLE', 'Non trovato']
+    assert str(df.loc[0, 'DDL']).startswith('CREATE VIEW')
+    assert str(df.loc[1, 'DDL']).startswith('CREATE TABLE')
+
+
+def test_databases_are_processed_independently_in_input_order(tmp_path, monkeypatch):
+    inp = tmp_path / 'tables.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Server', 'DB', 'Schema', 'Table'])
+    ws.append(['EPCP3', 'db1', 'dbo', 't1'])
+    ws.append(['EPCP3', 'down', 'dbo', 't2'])
+    ws.append(['EPCP3', 'db2', 'dbo', 't3'])
+    ws.append(['EPCP3', 'db1', 'dbo', 't4'])
+    wb.save(str(inp))
+
+    class FakeCursor:
+        def __init__(self, db):
+            self.db = db
+            self.params = ()
+        def execute(self, sql, params=()):
+            self.params = list(params)
+        def fetchmany(self, size):
+            pairs = list(zip(self.params[::2], self.params[1::2]))
+            self.params = []
+            return [(s, t, 'U', 'USER_TABLE', None) for s, t in pairs]
+        def fetchone(self):
+            return [f'CREATE TABLE {self.db}.{self.params[1]}']
+        def close(self):
+            pass
+
+    connected = []
+
+    class FakeConn:
+        def __init__(self, db):
+            self.db = db
+        def cursor(self):
+            return FakeCursor(self.db)
+        def close(self):
+            pass
+
+    def fake_connect(conn_str, **kwargs):
+        db = conn_str.split('DATABASE=')[1].rstrip(';')
+        if db == 'down':
+            raise RuntimeError('login failed')
+        connected.append(db)
+        return FakeConn(db)
+
+    monkeypatch.setattr(mod, 'pyodbc', types.SimpleNamespace(connect=fake_connect))
+    monkeypatch.setattr(TableDefinitionExtractor, '_build_conn_str', lambda self, s, d: f'DATABASE={d};')
+
+    out = TableDefinitionExtractor(str(inp), str(tmp_path / 'ddl.xlsx')).run()
+
+    # One connection per database, not per row
+    assert sorted(connected) == ['db1', 'db2']
+    df = pd.read_excel(out)
+    assert list(df['Table']) == ['t1', 't2', 't3', 't4']
+    assert list(df['DDL']) == [
+        'CREATE TABLE db1.t1',
+        'Connessione fallita: login failed',
+        'CREATE TABLE db2.t3',
+        'CREATE TABLE db1.t4',
+    ]
+    assert df.loc[1, 'ObjectType'] == 'ERROR'
+
+
+def test_input_rows_read_with_calamine_match_openpyxl(tmp_path, monkeypatch):
+    inp = tmp_path / 'tables.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Server', 'DB', 'Schema', 'Table'])
+    ws.append(['EPCP3', 2024, None, 't1'])
+    ws.append([None, 'db1', 'sales', 't2'])
+    wb.save(str(inp))
+
+    monkeypatch.setattr(mod, 'pyodbc', types.SimpleNamespace(connect=None))
+    monkeypatch.setattr(mod, 'CalamineWorkbook', None)
+    expected = TableDefinitionExtractor(str(inp), '')._read_items()
+
+    # calamine yields "" for empty cells and floats for numbers
+    calamine_rows = [['Server', 'DB', 'Schema', 'Table'], ['EPCP3', 2024.0, '', 't1'], ['', 'db1', 'sales', 't2']]
+
+    class FakeSheet:
+        def to_python(self, skip_empty_area=True):
+            assert skip_empty_area is False
+            return calamine_rows
+
+    class FakeCalamine:
+        @staticmethod
+        def from_path(path):
+            return types.SimpleNamespace(get_sheet_by_index=lambda i: FakeSheet())
+
+    monkeypatch.setattr(mod, 'CalamineWorkbook', FakeCalamine)
+    assert TableDefinitionExtractor(str(inp), '')._read_items() == expected == [
+        ('EPCP3', '2024', 'dbo', 't1'),
+        ('EPCP3', 'db1', 'sales', 't2'),
+    ]
+
+
+def test_object_types_are_normalized_and_interned_at_read():
+    code = mod._object_type('V ')
+    assert code == 'V'
+    assert code is mod._object_type(''.join(['V', ' ']))
+    assert mod._object_type(None) == ''
+    assert mod._is_view(code, 'VIEW', 'VIEW')
+    assert mod._is_view('', '', 'Vista')
+    assert not mod._is_view('U', 'USER_TABLE', 'USER_TABLE')
+
+
+def test_output_rows_are_streamed_to_the_writer(tmp_path, monkeypatch):
+    import Report.Excel_Writer as ew
+
+    inp = tmp_path / 'tables.xlsx'
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Server', 'DB', 'Schema', 'Table'])
+    ws.append(['EPCP3', 'db1', 'dbo', 't1'])
+    ws.append(['EPCP3', 'db1', 'dbo', 't2'])
+    wb.save(str(inp))
+
+    monkeypatch.setattr(mod, 'pyodbc', types.SimpleNamespace(connect=lambda *a, **k: object()))
+    monkeypatch.setattr(
+        TableDefinitionExtractor, '_process_db',
+        lambda self, server, db, targets: {t: ('USER_TABLE', f'CREATE TABLE {t[1]}') for t in targets},
+    )
+    received = []
+
+    def fake_write(headers, rows, base_output_path, sheet_name='Sheet1', column_widths=None):
+        # Rows arrive as an iterator, not as a list materialized beforehand
+        assert not isinstance(rows, (list, tuple))
+        received.extend(rows)
+        return [base_output_path]
+
+    monkeypatch.setattr(ew, 'write_rows_split_across_files', fake_write)
+
+    TableDefinitionExtractor(str(inp), str(tmp_path / 'ddl.xlsx')).run()
+
+    assert received == [
+        ['EPCP3', 'db1', 'dbo', 't1', 'USER_TABLE', 'CREATE TABLE t1'],
+        ['EPCP3', 'db1', 'dbo', 't2', 'USER_TABLE', 'CREATE TABLE t2'],
+    ]
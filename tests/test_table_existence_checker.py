@@ -15,6 +15,9 @@ if BL not in sys.path:
 import analisi_viste.Table_Existence_Checker as mod
 from analisi_viste.Table_Existence_Checker import TableExistenceChecker
 
+# Some tests below replace methods on the class directly; keep the real one
+_REAL_FETCH_TABLES = TableExistenceChecker._fetch_tables_in_db
+
 
 def _write_input_excel(path, rows, header):
     wb = Workbook()
@@ -176,3 +179,216 @@ def test_checker_includes_views(tmp_path, monkeypatch):
     assert df.iloc[0]["DB"] == "db1"
     assert df.iloc[0]["Schema"].lower() == "dbo"
     assert df.iloc[0]["Table"].lower() == "v1"
+
+
+def test_read_targets_splits_schema_and_falls_back_to_first_value(tmp_path):
+    xlsx_in = tmp_path / "in.xlsx"
+    _write_input_excel(
+        str(xlsx_in),
+        rows=[
+            ["DB1", "dbo", "T1"],
+            [None, None, " sales.Orders "],
+            [None, "x", None],
+            [None, None, "   "],
+        ],
+        header=["DB", "Schema", "Table"],
+    )
+    checker = TableExistenceChecker.__new__(TableExistenceChecker)
+    checker.input_excel = str(xlsx_in)
+
+    assert checker._read_targets() == [
+        ("DB1", "dbo", "T1"),
+        (None, "sales", "Orders"),
+        (None, "x", "x"),
+    ]
+
+
+def test_checker_matches_targets_per_database_in_input_order(tmp_path, monkeypatch):
+    xlsx_in = tmp_path / "input.xlsx"
+    _write_input_excel(
+        str(xlsx_in),
+        rows=[["DB1", "dbo", "T1"], [None, None, "shared"], ["db2", "DBO", "t2"], ["DB1", None, "missing"]],
+        header=["DB", "Schema", "Table"],
+    )
+    out_xlsx = tmp_path / "out.xlsx"
+
+    monkeypatch.setattr(mod, "pyodbc", types.SimpleNamespace(connect=lambda *a, **k: None))
+    tables = {
+        "DB1": [("dbo", "t1", "USER_TABLE"), ("dbo", "shared", "VIEW")],
+        "db2": [("dbo", "T2", "USER_TABLE"), ("x", "SHARED", "USER_TABLE")],
+    }
+    monkeypatch.setattr(TableExistenceChecker, "_fetch_tables_in_db", lambda self, db: tables[db])
+    monkeypatch.setattr(TableExistenceChecker, "_get_ddl", lambda self, db, s, n, t: f"DDL {db}.{s}.{n}")
+
+    TableExistenceChecker(str(xlsx_in), str(out_xlsx), server="EPCP3").run()
+
+    df = pd.read_excel(out_xlsx, sheet_name="Tabelle").fillna("")
+    assert [tuple(r) for r in df[["DB", "Schema", "Table", "Error"]].values] == [
+        ("DB1", "dbo", "t1", ""),
+        ("DB1", "dbo", "shared", ""),
+        ("db2", "x", "SHARED", ""),
+        ("db2", "dbo", "T2", ""),
+        ("DB1", "", "missing", "Cercata ma non trovata"),
+    ]
+
+
+def test_connection_probe_runs_once_per_database(tmp_path, monkeypatch):
+    probes = []
+
+    class _Conn:
+        def close(self):
+            pass
+
+    def fake_connect(conn_str, timeout=None):
+        probes.append(conn_str)
+        if "DATABASE=down;" in conn_str:
+            raise RuntimeError("login failed")
+        return _Conn()
+
+    monkeypatch.setattr(mod, "pyodbc", types.SimpleNamespace(connect=fake_connect))
+    monkeypatch.setattr(mod, "ODBC_DRIVERS", ["D1", "D2"])
+    checker = TableExistenceChecker(str(tmp_path / "in.xlsx"), str(tmp_path / "out.xlsx"), server="S")
+
+    first = checker._build_conn_str("db1")
+    assert checker._build_conn_str("db1") == first
+    for _ in range(2):
+        try:
+            checker._build_conn_str("down")
+        except RuntimeError as e:
+            assert "login failed" in str(e)
+        else:
+            raise AssertionError("expected a connection error")
+
+    # db1: first driver works; down: both drivers tried once, never re-probed
+    assert len(probes) == 3
+
+
+def test_checker_fetches_ddl_once_per_matched_object(tmp_path, monkeypatch):
+    xlsx_in = tmp_path / "input.xlsx"
+    _write_input_excel(
+        str(xlsx_in),
+        rows=[["db1", "dbo", "t1"], ["db1", None, "t1"], ["db1", "dbo", "t1"]],
+        header=["DB", "Schema", "Table"],
+    )
+    monkeypatch.setattr(mod, "pyodbc", types.SimpleNamespace(connect=lambda *a, **k: None))
+    monkeypatch.setattr(TableExistenceChecker, "_fetch_tables_in_db", lambda self, db: [("dbo", "t1", "USER_TABLE")])
+    calls = []
+
+    def fake_ddl(self, db, s, n, t):
+        calls.append((db, s, n, t))
+        return "CREATE TABLE [dbo].[t1]"
+
+    monkeypatch.setattr(TableExistenceChecker, "_get_ddl", fake_ddl)
+
+    TableExistenceChecker(str(xlsx_in), str(tmp_path / "out.xlsx"), server="S").run()
+
+    assert calls == [("db1", "dbo", "t1", "USER_TABLE")]
+    df = pd.read_excel(tmp_path / "out.xlsx", sheet_name="Tabelle")
+    assert list(df["DDL"]) == ["CREATE TABLE [dbo].[t1]"] * 3
+
+
+def test_catalog_and_ddl_share_one_connection_per_database(tmp_path, monkeypatch):
+    xlsx_in = tmp_path / "input.xlsx"
+    _write_input_excel(
+        str(xlsx_in),
+        rows=[["db1", "dbo", "t1"], ["db1", "dbo", "v1"], ["db2", "dbo", "t2"]],
+        header=["DB", "Schema", "Table"],
+    )
+    connects = []
+    closed = []
+
+    class _Cursor:
+        def __init__(self, db):
+            self.db = db
+            self.row = None
+
+        def execute(self, sql, params):
+            if "sys.objects" in sql:
+                self.rows = {"db1": [("dbo", "t1", "USER_TABLE"), ("dbo", "v1", "VIEW")],
+                             "db2": [("dbo", "t2", "USER_TABLE")]}[self.db]
+            else:
+                self.row = (f"DDL {self.db}.{params[1]}",)
+
+        def fetchall(self):
+            return self.rows
+
+        def fetchone(self):
+            return self.row
+
+        def nextset(self):
+            return False
+
+        def close(self):
+            closed.append(("cursor", self.db))
+
+    class _Conn:
+        def __init__(self, db):
+            self.db = db
+
+        def cursor(self):
+            return _Cursor(self.db)
+
+        def close(self):
+            closed.append(("conn", self.db))
+
+    def fake_connect(conn_str, timeout=None):
+        connects.append(conn_str)
+        return _Conn(conn_str)
+
+    monkeypatch.setattr(mod, "pyodbc", types.SimpleNamespace(connect=fake_connect))
+    monkeypatch.setattr(TableExistenceChecker, "_build_conn_str", lambda self, db: db)
+    monkeypatch.setattr(TableExistenceChecker, "_fetch_tables_in_db", _REAL_FETCH_TABLES)
+    # Sequential scan so the global connect/close order below is deterministic
+    monkeypatch.setattr(mod, "MAX_DB_WORKERS", 1)
+
+    checker = TableExistenceChecker(str(xlsx_in), str(tmp_path / "out.xlsx"), server="S")
+    checker.run()
+
+    # One connection per database for the catalog scan and every DDL lookup, closed after the scan
+    assert connects == ["db1", "db2"]
+    assert closed == [("cursor", "db1"), ("conn", "db1"), ("cursor", "db2"), ("conn", "db2")]
+    assert checker._db_conns == {} and checker._db_cursors == {}
+    df = pd.read_excel(tmp_path / "out.xlsx", sheet_name="Tabelle")
+    assert list(df["DDL"]) == ["DDL db1.t1", "DDL db1.v1", "DDL db2.t2"]
+
+
+def test_databases_are_scanned_in_parallel_keeping_output_order(tmp_path, monkeypatch):
+    import threading
+    import time
+
+    xlsx_in = tmp_path / "input.xlsx"
+    _write_input_excel(str(xlsx_in), [["t1"], ["t2"], ["missing"]], ["table"])
+
+    tables = {
+        "db1": [("dbo", "t1", "USER_TABLE")],
+        "db2": [("dbo", "t2", "USER_TABLE")],
+        "db3": [("dbo", "t1", "USER_TABLE")],
+    }
+    threads = {}
+
+    def fake_fetch(self, db):
+        # The first databases are the slowest: results must still follow database order
+        time.sleep({"db1": 0.05, "db2": 0.02, "db3": 0.0}.get(db, 0))
+        threads[db] = threading.get_ident()
+        if db == "bad":
+            raise RuntimeError("denied")
+        return tables[db]
+
+    monkeypatch.setattr(mod, "pyodbc", types.SimpleNamespace(connect=lambda *a, **k: None))
+    monkeypatch.setattr(mod, "MAX_DB_WORKERS", 4)
+    monkeypatch.setattr(TableExistenceChecker, "_list_user_databases", lambda self: ["db1", "bad", "db2", "db3"])
+    monkeypatch.setattr(TableExistenceChecker, "_fetch_tables_in_db", fake_fetch)
+    monkeypatch.setattr(TableExistenceChecker, "_get_ddl", lambda self, db, s, n, t: f"DDL {db}.{n}")
+
+    TableExistenceChecker(str(xlsx_in), str(tmp_path / "out.xlsx"), server="S").run()
+
+    assert len(set(threads.values())) > 1
+    df = pd.read_excel(tmp_path / "out.xlsx", sheet_name="Tabelle").fillna("")
+    assert list(zip(df["DB"], df["Table"], df["DDL"])) == [
+        ("db1", "t1", "DDL db1.t1"),
+        ("bad", "", ""),
+        ("db2", "t2", "DDL db2.t2"),
+        ("db3", "t1", "DDL db3.t1"),
+        ("", "missing", ""),
+    ]
+    assert "Non analizzati: bad" in df["Error"].iloc[-1]
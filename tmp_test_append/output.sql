@@ -1,7 +1,7 @@
---1 C:\Users\giuseppe.tanda\Desktop\doValueExcelExplorer\tmp_test_append\a.sql
+--1 /root/package/tmp_test_append/a.sql
 SELECT 1 AS One;
 
---2 C:\Users\giuseppe.tanda\Desktop\doValueExcelExplorer\tmp_test_append\b.sql
+--2 /root/package/tmp_test_append/b.sql
 -- comment in source
 SELECT 2 AS Two;
 
@@ -1,6 +1,6 @@
---1 C:\Users\giuseppe.tanda\Desktop\doValueExcelExplorer\tmp_test_append_join\sqls\j1.sql
+--1 /root/package/tmp_test_append_join/sqls/j1.sql
 SELECT 'J1' AS J;
 
---2 C:\Users\giuseppe.tanda\Desktop\doValueExcelExplorer\tmp_test_append_join\sqls\j2.sql
+--2 /root/package/tmp_test_append_join/sqls/j2.sql
 SELECT 'J2' AS J;
 